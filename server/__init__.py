@@ -32,6 +32,17 @@ def create_app():
 
     init_db()
 
+    from .pipeline.runner import restore_parked_runs, restore_queued_runs
+
+    try:
+        restore_queued_runs()
+    except Exception:
+        logger.exception("Failed to restore queued runs")
+    try:
+        restore_parked_runs()
+    except Exception:
+        logger.exception("Failed to restore parked runs")
+
     from .api import register_blueprints
 
     register_blueprints(app)
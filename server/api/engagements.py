@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request
 
+from ..db import documents as doc_store
 from ..db import engagements as store
+from ..pipeline import documents
 
 bp = Blueprint("engagements", __name__)
 
@@ -47,3 +49,32 @@ def rename(engagement_id):
 def delete(engagement_id):
     store.delete_engagement(engagement_id)
     return jsonify({"ok": True})
+
+
+@bp.get("/engagements/<int:engagement_id>/documents")
+def list_documents(engagement_id):
+    return jsonify(doc_store.list_documents(engagement_id))
+
+
+@bp.post("/engagements/<int:engagement_id>/documents")
+def add_document(engagement_id):
+    """Index client material ({name, content, format: text|markdown|html})
+    for the engagement's later runs."""
+    if not store.get_engagement(engagement_id):
+        return jsonify({"error": {"code": "not_found", "message": "Engagement not found"}}), 404
+    data = request.get_json(force=True, silent=True) or {}
+    name = (data.get("name") or "").strip()
+    if not name or not data.get("content"):
+        return jsonify({"error": {"code": "bad_request", "message": "name and content are required"}}), 400
+    try:
+        document_id = documents.ingest(engagement_id, name, data["content"], fmt=data.get("format") or "text")
+    except ValueError as exc:
+        return jsonify({"error": {"code": "bad_request", "message": str(exc)}}), 400
+    return jsonify({"id": document_id, "duplicate": document_id is None}), 201
+
+
+@bp.delete("/engagements/<int:engagement_id>/documents/<int:document_id>")
+def delete_document(engagement_id, document_id):
+    if not doc_store.delete_document(engagement_id, document_id):
+        return jsonify({"error": {"code": "not_found", "message": "Document not found"}}), 404
+    return jsonify({"ok": True})
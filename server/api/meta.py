@@ -4,7 +4,9 @@ import logging
 from flask import Blueprint, jsonify, request
 
 from ..modes import MODE_REGISTRY
+from ..pipeline.admission import ADMISSION
 from ..pipeline.estimate import estimate_run
+from ..pipeline.scheduler import get_scheduler
 from ..venice.models import get_catalog
 
 logger = logging.getLogger(__name__)
@@ -25,6 +27,11 @@ def list_modes():
     return jsonify([spec.to_public() for spec in MODE_REGISTRY.values()])
 
 
+@bp.get("/scheduler")
+def scheduler_stats():
+    return jsonify({**get_scheduler().stats(), "admission": ADMISSION.stats()})
+
+
 @bp.post("/estimate")
 def estimate():
     data = request.get_json(force=True, silent=True) or {}
@@ -1,16 +1,22 @@
 """Run lifecycle: create, stream events (SSE), poll, answer, cancel."""
+import gzip
 import logging
 import queue
+import time
 
 from flask import Blueprint, Response, jsonify, request
 
-from ..pipeline.events import REGISTRY, sse_format
-from ..pipeline.runner import start_run
+from ..pipeline.events import REGISTRY, TERMINAL_EVENTS, parse_batch_window, sse_format, sse_format_batch
+from ..pipeline.admission import QueueFullError
+from ..pipeline.runner import cancel_run, resume_run, start_run
 
 logger = logging.getLogger(__name__)
 bp = Blueprint("runs", __name__)
 
 HEARTBEAT_SECONDS = 15
+MAX_BATCH_EVENTS = 500
+MAX_LONG_POLL_SECONDS = 30
+GZIP_MIN_BYTES = 1024
 
 
 @bp.post("/runs")
@@ -20,6 +26,10 @@ def create_run():
         run, engagement_id, estimate = start_run(payload)
     except (ValueError, KeyError) as exc:
         return jsonify({"error": {"code": "bad_request", "message": str(exc)}}), 400
+    except QueueFullError as exc:
+        resp = jsonify({"error": {"code": "queue_full", "message": str(exc)}})
+        resp.headers["Retry-After"] = str(exc.retry_after)
+        return resp, 429
     return (
         jsonify({"runId": run.id, "engagementId": engagement_id, "estimate": estimate}),
         202,
@@ -28,19 +38,69 @@ def create_run():
 
 @bp.get("/runs/<run_id>")
 def get_run(run_id):
+    """Poll a run. `?sinceSeq=N` returns only events after N; `?wait=S`
+    long-polls until a newer event exists or the status changes. Responses carry a strong ETag over
+    (status, last seq) and honor If-None-Match with 304."""
     run = REGISTRY.get(run_id)
     if not run:
         return jsonify({"error": {"code": "not_found", "message": "Run not found"}}), 404
-    return jsonify(
+    since = request.args.get("sinceSeq", type=int)
+    if since is not None and since < 0:
+        return jsonify({"error": {"code": "bad_request", "message": "sinceSeq must be >= 0"}}), 400
+    wait = max(0.0, min(request.args.get("wait", 0, type=float), MAX_LONG_POLL_SECONDS))
+
+    etag = _run_etag(run)
+    client_has_current = etag in _if_none_match()
+    status = run.status
+    if wait and status not in ("completed", "failed", "cancelled"):
+        baseline = since if since is not None else (run.last_seq if client_has_current else None)
+        if baseline is not None and run.wait_for_events(baseline, wait, status):
+            etag = _run_etag(run)
+            client_has_current = etag in _if_none_match()
+    if client_has_current:
+        resp = Response(status=304)
+        resp.headers["ETag"] = etag
+        return resp
+
+    events = run.events_since(since) if since is not None else run.events[-200:]
+    resp = jsonify(
         {
             "runId": run.id,
             "mode": run.mode,
             "engagementId": run.engagement_id,
             "status": run.status,
-            "events": run.events[-200:],
+            "lastSeq": events[-1]["seq"] if events else (since or 0),
+            "events": events,
             "error": run.error,
         }
     )
+    resp.headers["ETag"] = etag
+    resp.headers["Cache-Control"] = "no-cache"
+    return _maybe_gzip(resp)
+
+
+def _run_etag(run):
+    return f'"{run.id}-{run.status}-{run.last_seq}"'
+
+
+def _if_none_match():
+    # Strip the -gzip suffix so compressed and identity copies validate alike.
+    return {t.strip().replace("-gzip\"", '"') for t in request.headers.get("If-None-Match", "").split(",") if t.strip()}
+
+
+def _maybe_gzip(resp):
+    resp.headers.add("Vary", "Accept-Encoding")
+    if "gzip" not in request.headers.get("Accept-Encoding", "").lower():
+        return resp
+    body = resp.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return resp
+    resp.set_data(gzip.compress(body, compresslevel=6))
+    resp.headers["Content-Encoding"] = "gzip"
+    etag = resp.headers.get("ETag")
+    if etag:
+        resp.headers["ETag"] = etag[:-1] + '-gzip"'
+    return resp
 
 
 @bp.get("/runs/<run_id>/events")
@@ -54,6 +114,9 @@ def stream_events(run_id):
         last_id = int(last_id)
     except ValueError:
         last_id = 0
+    # Opt-in coalescing (?batch=250ms): events arriving within one window go
+    # out as a single `batch` frame instead of one frame each.
+    batch_window = parse_batch_window(request.args.get("batch"))
 
     def generate():
         q = run.subscribe(after_seq=last_id)
@@ -66,8 +129,19 @@ def stream_events(run_id):
                         break
                     yield ": ping\n\n"
                     continue
-                yield sse_format(event)
-                if event["type"] in ("run.completed", "run.error"):
+                events = [event]
+                if batch_window:
+                    deadline = time.monotonic() + batch_window
+                    while events[-1]["type"] not in TERMINAL_EVENTS and len(events) < MAX_BATCH_EVENTS:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            events.append(q.get(timeout=remaining))
+                        except queue.Empty:
+                            break
+                yield sse_format(event) if len(events) == 1 else sse_format_batch(events)
+                if events[-1]["type"] in TERMINAL_EVENTS:
                     break
         finally:
             run.unsubscribe(q)
@@ -89,7 +163,8 @@ def provide_answers(run_id):
     if not run:
         return jsonify({"error": {"code": "not_found", "message": "Run not found"}}), 404
     data = request.get_json(force=True, silent=True) or {}
-    run.provide_answers(data.get("answers") or {})
+    if not resume_run(run, data.get("answers") or {}):
+        return jsonify({"error": {"code": "not_waiting", "message": "Run is not waiting for answers"}}), 409
     return jsonify({"ok": True})
 
 
@@ -98,6 +173,5 @@ def cancel(run_id):
     run = REGISTRY.get(run_id)
     if not run:
         return jsonify({"error": {"code": "not_found", "message": "Run not found"}}), 404
-    run.cancel_requested.set()
-    run.provide_answers({})  # unblock any clarify wait
+    cancel_run(run)
     return jsonify({"ok": True})
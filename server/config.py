@@ -12,7 +12,38 @@ class Config:
     DEFAULT_PANEL_SIZE = int(os.environ.get("DEFAULT_PANEL_SIZE", "20"))
     MAX_PANEL_SIZE = int(os.environ.get("MAX_PANEL_SIZE", "100"))
     PANEL_CONCURRENCY = int(os.environ.get("PANEL_CONCURRENCY", "8"))
+    # Process-wide worker budget shared by all runs, plus optional per-model
+    # caps as "model-id=4,other-model=8"
+    SCHEDULER_CONCURRENCY = int(os.environ.get("SCHEDULER_CONCURRENCY", "24"))
+    MODEL_CONCURRENCY_CAPS = os.environ.get("MODEL_CONCURRENCY_CAPS", "")
+    # How long expert analyses wait for the market digest before running without it
+    MARKET_DIGEST_WAIT_SECONDS = int(os.environ.get("MARKET_DIGEST_WAIT_SECONDS", "90"))
+    # Adaptive Quick Pulse (panel.adaptive): stop asking seats once the
+    # mean-stance CI half-width is within this many stance points
+    PULSE_ADAPTIVE_TOLERANCE = float(os.environ.get("PULSE_ADAPTIVE_TOLERANCE", "0.15"))
+    PULSE_ADAPTIVE_MIN_SEATS = int(os.environ.get("PULSE_ADAPTIVE_MIN_SEATS", "20"))
+    # Admission control: runs beyond MAX_CONCURRENT_RUNS wait in a durable
+    # queue; beyond MAX_QUEUED_RUNS new runs are refused with 429
+    MAX_CONCURRENT_RUNS = int(os.environ.get("MAX_CONCURRENT_RUNS", "4"))
+    MAX_QUEUED_RUNS = int(os.environ.get("MAX_QUEUED_RUNS", "20"))
+    DEFAULT_RUN_SECONDS = int(os.environ.get("DEFAULT_RUN_SECONDS", "240"))
     RUN_ANSWER_TIMEOUT_SECONDS = int(os.environ.get("RUN_ANSWER_TIMEOUT_SECONDS", "1800"))
+    RESUME_WORKERS = int(os.environ.get("RESUME_WORKERS", "4"))
+
+    # Client URL scraping: overall deadline before the architect goes ahead
+    # without the stragglers, and the cross-run cache of cleaned page text
+    SCRAPE_DEADLINE_SECONDS = int(os.environ.get("SCRAPE_DEADLINE_SECONDS", "30"))
+    SCRAPE_CACHE_TTL_HOURS = float(os.environ.get("SCRAPE_CACHE_TTL_HOURS", "24"))
+    SCRAPE_CACHE_MAX_ENTRIES = int(os.environ.get("SCRAPE_CACHE_MAX_ENTRIES", "500"))
+
+    # Market research answers are reused across engagements for near-identical
+    # questions (same model and channel) up to this age; search.maxAgeHours
+    # overrides it per run and 0 disables reuse
+    RESEARCH_CACHE_MAX_AGE_HOURS = float(os.environ.get("RESEARCH_CACHE_MAX_AGE_HOURS", "168"))
+    RESEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("RESEARCH_CACHE_MAX_ENTRIES", "2000"))
+
+    # Context window assumed for models the catalog does not describe
+    DEFAULT_CONTEXT_TOKENS = int(os.environ.get("DEFAULT_CONTEXT_TOKENS", "32768"))
 
     # Cost governance: abort a run whose actual spend exceeds this multiple of the estimate
     COST_CIRCUIT_BREAKER_MULTIPLIER = float(os.environ.get("COST_CIRCUIT_BREAKER_MULTIPLIER", "3.0"))
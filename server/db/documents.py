@@ -0,0 +1,113 @@
+"""Client document store: documents linked to an engagement, split into
+chunks, with a term → chunk inverted index for BM25 retrieval. Chunking,
+tokenization and scoring live with the caller (pipeline/documents.py);
+this module stores rows and reads back postings."""
+from . import connect
+
+
+def add_document(engagement_id, name, source, content_hash, chars, chunks, replace=False):
+    """chunks: [(text, {term: tf})]. Returns the document id, or None when
+    the engagement already holds identical content. With `replace`, earlier
+    documents of the same name and source (a scraped URL) are dropped when
+    the content has changed."""
+    conn = connect()
+    try:
+        if replace:
+            rows = conn.execute(
+                "SELECT id, content_hash FROM documents WHERE engagement_id = ? AND source = ? AND name = ?",
+                (engagement_id, source, name),
+            ).fetchall()
+            if any(r["content_hash"] == content_hash for r in rows):
+                return None
+            conn.executemany("DELETE FROM documents WHERE id = ?", [(r["id"],) for r in rows])
+        cur = conn.execute(
+            """INSERT OR IGNORE INTO documents (engagement_id, name, source, content_hash, chars, chunks)
+               VALUES (?, ?, ?, ?, ?, ?)""",
+            (engagement_id, name, source, content_hash, chars, len(chunks)),
+        )
+        if not cur.rowcount:
+            return None
+        document_id = cur.lastrowid
+        for ord_, (text, terms) in enumerate(chunks):
+            chunk_id = conn.execute(
+                "INSERT INTO doc_chunks (document_id, engagement_id, ord, length, text) VALUES (?, ?, ?, ?, ?)",
+                (document_id, engagement_id, ord_, sum(terms.values()), text),
+            ).lastrowid
+            conn.executemany(
+                "INSERT INTO doc_postings (engagement_id, term, chunk_id, tf) VALUES (?, ?, ?, ?)",
+                [(engagement_id, term, chunk_id, tf) for term, tf in terms.items()],
+            )
+        conn.commit()
+        return document_id
+    finally:
+        conn.close()
+
+
+def list_documents(engagement_id):
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT id, name, source, chars, chunks, created_at FROM documents WHERE engagement_id = ? ORDER BY id",
+            (engagement_id,),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def delete_document(engagement_id, document_id):
+    conn = connect()
+    try:
+        cur = conn.execute("DELETE FROM documents WHERE id = ? AND engagement_id = ?", (document_id, engagement_id))
+        conn.commit()
+        return bool(cur.rowcount)
+    finally:
+        conn.close()
+
+
+def corpus_stats(engagement_id):
+    """(chunk count, mean chunk length in terms)."""
+    conn = connect()
+    try:
+        row = conn.execute(
+            "SELECT COUNT(*) AS n, AVG(length) AS avg FROM doc_chunks WHERE engagement_id = ?", (engagement_id,)
+        ).fetchone()
+        return row["n"], row["avg"] or 0.0
+    finally:
+        conn.close()
+
+
+def postings(engagement_id, terms):
+    """[(term, chunk_id, tf, chunk length)] for every chunk holding one of `terms`."""
+    terms = list(terms)
+    if not terms:
+        return []
+    marks = ", ".join("?" for _ in terms)
+    conn = connect()
+    try:
+        return conn.execute(
+            f"""SELECT p.term, p.chunk_id, p.tf, c.length
+                FROM doc_postings p JOIN doc_chunks c ON c.id = p.chunk_id
+                WHERE p.engagement_id = ? AND p.term IN ({marks})""",
+            (engagement_id, *terms),
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def get_chunks(chunk_ids):
+    """{chunk_id: {text, name, ord}}."""
+    chunk_ids = list(chunk_ids)
+    if not chunk_ids:
+        return {}
+    marks = ", ".join("?" for _ in chunk_ids)
+    conn = connect()
+    try:
+        rows = conn.execute(
+            f"""SELECT c.id, c.text, c.ord, d.name FROM doc_chunks c JOIN documents d ON d.id = c.document_id
+                WHERE c.id IN ({marks})""",
+            chunk_ids,
+        ).fetchall()
+        return {r["id"]: {"text": r["text"], "name": r["name"], "ord": r["ord"]} for r in rows}
+    finally:
+        conn.close()
@@ -59,6 +59,29 @@ def add_revision(engagement_id, input_data, result=None, usage=None, note=None,
         conn.close()
 
 
+def add_spend(engagement_id, usage):
+    """Charge usage to an engagement without a revision (e.g. a cancelled
+    run's partial spend)."""
+    usage = usage or {}
+    conn = connect()
+    try:
+        conn.execute(
+            """UPDATE engagements SET
+                 updated_at = datetime('now'),
+                 total_cost_usd = total_cost_usd + ?,
+                 total_tokens = total_tokens + ?
+               WHERE id = ?""",
+            (
+                float(usage.get("total_cost_usd", 0.0)),
+                int(usage.get("total_prompt_tokens", 0)) + int(usage.get("total_completion_tokens", 0)),
+                engagement_id,
+            ),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
 def set_status(engagement_id, status, title=None):
     conn = connect()
     try:
@@ -0,0 +1,66 @@
+"""Persona library: every generated persona, indexed by normalized
+discipline, industries and seniority so later runs can seat them again
+instead of paying for generation. Normalization lives with the caller
+(pipeline/personas.py); this module only stores and matches keys."""
+import json
+
+from . import connect
+
+
+def save_personas(rows):
+    """rows: [{signature, discipline, seniority, industries, persona}].
+    Personas whose signature is already in the library are left alone."""
+    conn = connect()
+    try:
+        for row in rows:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO persona_library (signature, discipline, seniority, persona_json) VALUES (?, ?, ?, ?)",
+                (row["signature"], row["discipline"], row["seniority"], json.dumps(row["persona"])),
+            )
+            if cur.rowcount:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO persona_industries (persona_id, industry) VALUES (?, ?)",
+                    [(cur.lastrowid, industry) for industry in row["industries"]],
+                )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def find_personas(discipline, industries, seniority, limit):
+    """Candidates for one discipline, best first: most shared industries,
+    then matching seniority, then least reused."""
+    industries = list(industries)
+    overlap = "0"
+    if industries:
+        marks = ", ".join("?" for _ in industries)
+        overlap = f"(SELECT COUNT(*) FROM persona_industries i WHERE i.persona_id = l.id AND i.industry IN ({marks}))"
+    conn = connect()
+    try:
+        rows = conn.execute(
+            f"""SELECT l.id, l.signature, l.seniority, l.persona_json, {overlap} AS overlap
+                FROM persona_library l
+                WHERE l.discipline = ?
+                ORDER BY overlap DESC, l.seniority = ? DESC, l.uses, l.id DESC
+                LIMIT ?""",
+            (*industries, discipline, seniority or "", limit),
+        ).fetchall()
+        out = []
+        for row in rows:
+            d = dict(row)
+            d["persona"] = json.loads(d.pop("persona_json"))
+            out.append(d)
+        return out
+    finally:
+        conn.close()
+
+
+def mark_used(ids):
+    if not ids:
+        return
+    conn = connect()
+    try:
+        conn.executemany("UPDATE persona_library SET uses = uses + 1 WHERE id = ?", [(i,) for i in ids])
+        conn.commit()
+    finally:
+        conn.close()
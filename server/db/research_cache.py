@@ -0,0 +1,50 @@
+"""Market research cache: findings and citations of one search-augmented
+research call, keyed by a normalized question signature plus channel and
+model so near-identical questions across engagements share one answer.
+Signatures and freshness policy live with the caller
+(pipeline/market_intel.py)."""
+import json
+import time
+
+from . import connect
+
+
+def get_research(signature, channel, model, max_age_seconds):
+    """The cached research if younger than max_age_seconds, else None."""
+    conn = connect()
+    try:
+        row = conn.execute(
+            "SELECT * FROM research_cache WHERE signature = ? AND channel = ? AND model = ? AND created_at >= ?",
+            (signature, channel, model, time.time() - max_age_seconds),
+        ).fetchone()
+        if row is None:
+            return None
+        conn.execute(
+            "UPDATE research_cache SET hits = hits + 1 WHERE signature = ? AND channel = ? AND model = ?",
+            (signature, channel, model),
+        )
+        conn.commit()
+        d = dict(row)
+        d["citations"] = json.loads(d.pop("citations_json"))
+        return d
+    finally:
+        conn.close()
+
+
+def put_research(signature, channel, model, question, findings, citations, max_entries):
+    conn = connect()
+    try:
+        conn.execute(
+            """INSERT OR REPLACE INTO research_cache
+               (signature, channel, model, question, findings, citations_json, created_at)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (signature, channel, model, question, findings, json.dumps(citations), time.time()),
+        )
+        conn.execute(
+            """DELETE FROM research_cache WHERE rowid NOT IN
+               (SELECT rowid FROM research_cache ORDER BY created_at DESC LIMIT ?)""",
+            (max_entries,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
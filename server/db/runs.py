@@ -0,0 +1,149 @@
+"""Run-level persistence beyond engagements: the durable admission queue,
+parked-run continuations, and historical stage timings used for queue ETAs."""
+import json
+
+from . import connect
+
+
+def enqueue_run(run_id, engagement_id, mode, priority, payload):
+    conn = connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO run_queue (run_id, engagement_id, mode, priority, payload_json) VALUES (?, ?, ?, ?, ?)",
+            (run_id, engagement_id, mode, priority, json.dumps(payload)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def dequeue_run(run_id):
+    conn = connect()
+    try:
+        conn.execute("DELETE FROM run_queue WHERE run_id = ?", (run_id,))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def list_queued_runs():
+    conn = connect()
+    try:
+        rows = conn.execute("SELECT * FROM run_queue ORDER BY priority, created_at, rowid").fetchall()
+        out = []
+        for row in rows:
+            d = dict(row)
+            d["payload"] = json.loads(d.pop("payload_json"))
+            out.append(d)
+        return out
+    finally:
+        conn.close()
+
+
+def save_continuation(run_id, engagement_id, mode, state, deadline):
+    """Persist a parked run. `deadline` is a unix timestamp."""
+    conn = connect()
+    try:
+        conn.execute(
+            "INSERT OR REPLACE INTO run_continuations (run_id, engagement_id, mode, state_json, deadline) VALUES (?, ?, ?, ?, ?)",
+            (run_id, engagement_id, mode, json.dumps(state), float(deadline)),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def claim_continuation(run_id, answers):
+    """Record the answers a parked run resumes with. Returns False if it was
+    already claimed or is gone (exactly one caller wins). The row stays
+    until the resumed run starts, so a restart in between re-admits it."""
+    conn = connect()
+    try:
+        cur = conn.execute(
+            "UPDATE run_continuations SET answers_json = ? WHERE run_id = ? AND answers_json IS NULL",
+            (json.dumps(answers), run_id),
+        )
+        conn.commit()
+        return cur.rowcount == 1
+    finally:
+        conn.close()
+
+
+def take_continuation(run_id):
+    """Remove a parked run: returns its row (with the claimed answers, if
+    any), or None if another caller already took it."""
+    conn = connect()
+    try:
+        row = conn.execute("SELECT * FROM run_continuations WHERE run_id = ?", (run_id,)).fetchone()
+        if row is None:
+            return None
+        cur = conn.execute("DELETE FROM run_continuations WHERE run_id = ?", (run_id,))
+        conn.commit()
+        if cur.rowcount != 1:
+            return None
+        d = _continuation(row)
+        d["state"] = json.loads(d.pop("state_json"))
+        return d
+    finally:
+        conn.close()
+
+
+def list_continuations():
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT run_id, engagement_id, mode, deadline, answers_json FROM run_continuations"
+        ).fetchall()
+        return [_continuation(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def _continuation(row):
+    d = dict(row)
+    answers = d.pop("answers_json")
+    d["claimed"] = answers is not None
+    d["answers"] = json.loads(answers) if answers is not None else None
+    return d
+
+
+def load_run_events(run_id):
+    conn = connect()
+    try:
+        rows = conn.execute(
+            "SELECT seq, event_type, data_json FROM run_events WHERE run_id = ? ORDER BY seq", (run_id,)
+        ).fetchall()
+        return [{"seq": r["seq"], "type": r["event_type"], "data": json.loads(r["data_json"])} for r in rows]
+    finally:
+        conn.close()
+
+
+def record_stage_timings(mode, durations):
+    """durations: {stage: seconds}; the pseudo-stage "run" is the wall clock."""
+    if not durations:
+        return
+    conn = connect()
+    try:
+        conn.executemany(
+            "INSERT INTO stage_timings (mode, stage, seconds) VALUES (?, ?, ?)",
+            [(mode, stage, float(seconds)) for stage, seconds in durations.items()],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def average_stage_timings(mode, window=50):
+    """Mean seconds per stage over the most recent `window` samples each."""
+    conn = connect()
+    try:
+        rows = conn.execute(
+            """SELECT stage, AVG(seconds) AS avg_seconds FROM (
+                 SELECT stage, seconds, ROW_NUMBER() OVER (PARTITION BY stage ORDER BY id DESC) AS rn
+                 FROM stage_timings WHERE mode = ?
+               ) WHERE rn <= ? GROUP BY stage""",
+            (mode, window),
+        ).fetchall()
+        return {r["stage"]: r["avg_seconds"] for r in rows}
+    finally:
+        conn.close()
@@ -33,3 +33,111 @@ CREATE TABLE IF NOT EXISTS run_events (
 
 CREATE INDEX IF NOT EXISTS idx_engagements_mode ON engagements(mode, updated_at DESC);
 CREATE INDEX IF NOT EXISTS idx_revisions_engagement ON revisions(engagement_id, rev DESC);
+
+CREATE TABLE IF NOT EXISTS run_queue (
+  run_id TEXT PRIMARY KEY,
+  engagement_id INTEGER NOT NULL,
+  mode TEXT NOT NULL,
+  priority INTEGER NOT NULL DEFAULT 1,
+  payload_json TEXT NOT NULL,
+  created_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS stage_timings (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  mode TEXT NOT NULL,
+  stage TEXT NOT NULL,
+  seconds REAL NOT NULL,
+  created_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_stage_timings_mode ON stage_timings(mode, stage, id DESC);
+
+CREATE TABLE IF NOT EXISTS run_continuations (
+  run_id TEXT PRIMARY KEY,
+  engagement_id INTEGER NOT NULL,
+  mode TEXT NOT NULL,
+  state_json TEXT NOT NULL,
+  deadline REAL NOT NULL,
+  answers_json TEXT,
+  created_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS persona_library (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  signature TEXT NOT NULL UNIQUE,
+  discipline TEXT NOT NULL,
+  seniority TEXT NOT NULL,
+  persona_json TEXT NOT NULL,
+  uses INTEGER NOT NULL DEFAULT 0,
+  created_at TEXT DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_persona_library_discipline ON persona_library(discipline, seniority, uses);
+
+CREATE TABLE IF NOT EXISTS persona_industries (
+  persona_id INTEGER NOT NULL REFERENCES persona_library(id) ON DELETE CASCADE,
+  industry TEXT NOT NULL,
+  PRIMARY KEY (industry, persona_id)
+);
+
+CREATE TABLE IF NOT EXISTS scrape_cache (
+  url_key TEXT PRIMARY KEY,
+  content TEXT NOT NULL,
+  etag TEXT,
+  last_modified TEXT,
+  fetched_at REAL NOT NULL,
+  used_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_scrape_cache_used ON scrape_cache(used_at);
+
+CREATE TABLE IF NOT EXISTS research_cache (
+  signature TEXT NOT NULL,
+  channel TEXT NOT NULL,
+  model TEXT NOT NULL,
+  question TEXT NOT NULL,
+  findings TEXT NOT NULL,
+  citations_json TEXT NOT NULL,
+  created_at REAL NOT NULL,
+  hits INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (signature, channel, model)
+);
+
+CREATE INDEX IF NOT EXISTS idx_research_cache_created ON research_cache(created_at);
+
+CREATE TABLE IF NOT EXISTS documents (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  engagement_id INTEGER NOT NULL REFERENCES engagements(id) ON DELETE CASCADE,
+  name TEXT NOT NULL,
+  source TEXT NOT NULL,
+  content_hash TEXT NOT NULL,
+  chars INTEGER NOT NULL,
+  chunks INTEGER NOT NULL,
+  created_at TEXT DEFAULT (datetime('now')),
+  UNIQUE (engagement_id, content_hash)
+);
+
+CREATE INDEX IF NOT EXISTS idx_documents_name ON documents(engagement_id, source, name);
+
+CREATE TABLE IF NOT EXISTS doc_chunks (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  document_id INTEGER NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+  engagement_id INTEGER NOT NULL,
+  ord INTEGER NOT NULL,
+  length INTEGER NOT NULL,
+  text TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_doc_chunks_engagement ON doc_chunks(engagement_id);
+
+-- Inverted index: one row per (term, chunk) with the term's count in the chunk
+CREATE TABLE IF NOT EXISTS doc_postings (
+  engagement_id INTEGER NOT NULL,
+  term TEXT NOT NULL,
+  chunk_id INTEGER NOT NULL REFERENCES doc_chunks(id) ON DELETE CASCADE,
+  tf INTEGER NOT NULL,
+  PRIMARY KEY (engagement_id, term, chunk_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_doc_postings_chunk ON doc_postings(chunk_id);
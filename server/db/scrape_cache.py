@@ -0,0 +1,54 @@
+"""Scrape cache: cleaned text of client-provided URLs, keyed by normalized
+URL, with the origin's validators for revalidation once the TTL lapses.
+Freshness and normalization live with the caller (pipeline/market_intel.py);
+this module stores rows and keeps the table within its LRU bound."""
+import time
+
+from . import connect
+
+
+def get_entries(url_keys):
+    """{url_key: row} for the keys present, marking them used."""
+    url_keys = list(url_keys)
+    if not url_keys:
+        return {}
+    marks = ", ".join("?" for _ in url_keys)
+    conn = connect()
+    try:
+        rows = conn.execute(f"SELECT * FROM scrape_cache WHERE url_key IN ({marks})", url_keys).fetchall()
+        conn.execute(f"UPDATE scrape_cache SET used_at = ? WHERE url_key IN ({marks})", (time.time(), *url_keys))
+        conn.commit()
+        return {row["url_key"]: dict(row) for row in rows}
+    finally:
+        conn.close()
+
+
+def put_entry(url_key, content, etag, last_modified, max_entries):
+    now = time.time()
+    conn = connect()
+    try:
+        conn.execute(
+            """INSERT INTO scrape_cache (url_key, content, etag, last_modified, fetched_at, used_at)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT(url_key) DO UPDATE SET content = excluded.content, etag = excluded.etag,
+                 last_modified = excluded.last_modified, fetched_at = excluded.fetched_at,
+                 used_at = excluded.used_at""",
+            (url_key, content, etag, last_modified, now, now),
+        )
+        conn.execute(
+            "DELETE FROM scrape_cache WHERE url_key NOT IN (SELECT url_key FROM scrape_cache ORDER BY used_at DESC LIMIT ?)",
+            (max_entries,),
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def mark_fresh(url_key):
+    """The origin confirmed the cached copy is current: restart its TTL."""
+    conn = connect()
+    try:
+        conn.execute("UPDATE scrape_cache SET fetched_at = ? WHERE url_key = ?", (time.time(), url_key))
+        conn.commit()
+    finally:
+        conn.close()
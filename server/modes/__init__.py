@@ -46,6 +46,7 @@ register(
         insight_schema=PULSE_SCHEMA,
         quantitative=True,
         include_market_intel=False,
+        priority="interactive",
     )
 )
 
@@ -58,6 +59,7 @@ register(
         default_panel_size=8,
         max_panel_size=12,
         include_market_intel=False,
+        priority="interactive",
         mode_brief=(
             "Staff a board of directors: CEO-type, CFO-type, CTO-type, independent directors "
             "with governance experience, an activist investor, and relevant domain outsiders."
@@ -72,6 +74,7 @@ register(
         description="Map a process today vs. its AI-agent future: owners, agent functions, reusable agent assets, time/cost/FTE deltas — plus breakthrough redesign opportunities.",
         flow="workchart",
         include_market_intel=False,
+        priority="interactive",
     )
 )
 
@@ -17,6 +17,7 @@ class ModeSpec:
     mode_brief: str = ""  # injected into the architect's seed perspectives
     quantitative: bool = False  # pulse-style aggregation
     include_market_intel: bool = True
+    priority: str = "batch"  # scheduler class: interactive runs are served before batch runs
     defaults: dict = field(default_factory=dict)
 
     def to_public(self):
@@ -26,6 +27,7 @@ class ModeSpec:
             "description": self.description,
             "status": "available" if self.available else "coming_soon",
             "flow": self.flow,
+            "quantitative": self.quantitative,
             "defaults": {
                 "panelSize": self.default_panel_size,
                 "maxPanelSize": self.max_panel_size,
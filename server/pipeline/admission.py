@@ -0,0 +1,211 @@
+"""Run admission control.
+
+At most MAX_CONCURRENT_RUNS runs execute at once; further submissions wait in
+a priority queue (interactive modes first, FIFO within a class) that is
+mirrored to SQLite so queued runs survive a restart. Queued runs receive
+`run.queued` events with their position and an ETA simulated from historical
+stage durations. Once MAX_QUEUED_RUNS are waiting, submissions are rejected
+with QueueFullError (HTTP 429 + Retry-After).
+"""
+import logging
+import math
+import threading
+import time
+
+from ..config import Config
+from ..db import runs as run_store
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_RANK = {"interactive": 0, "batch": 1}
+TIMINGS_TTL_SECONDS = 300
+
+
+class QueueFullError(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Run queue is full; retry in about {retry_after}s")
+        self.retry_after = retry_after
+
+
+class _Ticket:
+    __slots__ = ("run", "launch", "rank", "seq", "started_at")
+
+    def __init__(self, run, launch, rank, seq):
+        self.run = run
+        self.launch = launch
+        self.rank = rank
+        self.seq = seq
+        self.started_at = None
+
+
+class AdmissionController:
+    def __init__(self, max_running, max_queued):
+        self.max_running = max(1, int(max_running))
+        self.max_queued = max(0, int(max_queued))
+        self._lock = threading.Lock()
+        self._running = {}  # run_id -> ticket
+        self._queue = []  # tickets sorted by (rank, seq)
+        self._reserved = 0
+        self._seq = 0
+        self._timings = {}  # mode -> (fetched_at, {stage: seconds})
+
+    # ------------------------------------------------------------- intake
+    def reserve(self):
+        """Claim capacity before any engagement is created; raises
+        QueueFullError when the queue is full. Pair with submit() or
+        release_reservation()."""
+        with self._lock:
+            free_slots = self.max_running - len(self._running)
+            full = len(self._queue) + self._reserved >= self.max_queued + max(free_slots, 0)
+            if not full:
+                self._reserved += 1
+                return
+        timings = self._current_timings()
+        with self._lock:
+            raise QueueFullError(self._retry_after_locked(timings))
+
+    def reserve_restored(self):
+        """Reservation for a run restored from the durable queue; restored
+        runs were already admitted, so capacity is not re-checked."""
+        with self._lock:
+            self._reserved += 1
+
+    def release_reservation(self):
+        with self._lock:
+            self._reserved = max(0, self._reserved - 1)
+
+    def submit(self, run, launch, priority="batch", payload=None, persist=True):
+        """Start `launch()` now if a slot is free, otherwise queue it. The
+        launched callable must call finished(run) when the run ends."""
+        with self._lock:
+            self._reserved = max(0, self._reserved - 1)
+            self._seq += 1
+            ticket = _Ticket(run, launch, PRIORITY_RANK.get(priority, 1), self._seq)
+            if len(self._running) < self.max_running and not self._queue:
+                ticket.started_at = time.time()
+                self._running[run.id] = ticket
+                start = True
+            else:
+                self._queue.append(ticket)
+                self._queue.sort(key=lambda t: (t.rank, t.seq))
+                run.status = "queued"
+                start = False
+        if start:
+            launch()
+            return
+        if persist:
+            run_store.enqueue_run(run.id, run.engagement_id, run.mode, ticket.rank, payload or {})
+        self._announce_positions()
+
+    def finished(self, run):
+        """Free the run's slot and start the next queued run(s)."""
+        with self._lock:
+            self._running.pop(run.id, None)
+        self._drain()
+
+    def cancel(self, run):
+        """Remove a queued run. Returns True if it was still waiting."""
+        with self._lock:
+            ticket = next((t for t in self._queue if t.run.id == run.id), None)
+            if ticket is None:
+                return False
+            self._queue.remove(ticket)
+        run_store.dequeue_run(run.id)
+        self._announce_positions()
+        return True
+
+    def _drain(self):
+        to_start = []
+        with self._lock:
+            while self._queue and len(self._running) < self.max_running:
+                ticket = self._queue.pop(0)
+                ticket.started_at = time.time()
+                self._running[ticket.run.id] = ticket
+                to_start.append(ticket)
+        for ticket in to_start:
+            try:
+                run_store.dequeue_run(ticket.run.id)
+            except Exception:
+                logger.exception("Failed to remove run %s from the durable queue", ticket.run.id)
+            ticket.run.status = "running"
+            ticket.launch()
+        if to_start:
+            self._announce_positions()
+
+    # --------------------------------------------------------------- ETAs
+    def _announce_positions(self):
+        timings = self._current_timings()
+        with self._lock:
+            queued = list(self._queue)
+            etas = self._simulate_locked(timings)
+        for position, ticket in enumerate(queued, start=1):
+            ticket.run.emit(
+                "run.queued",
+                {"position": position, "queueLength": len(queued), "etaSeconds": etas.get(ticket.run.id)},
+            )
+
+    def _simulate_locked(self, timings):
+        """Start-time estimates for every queued run: slots free up as running
+        runs finish (expected duration minus elapsed), and each queued run
+        takes the earliest free slot."""
+        now = time.time()
+        slots = sorted(
+            max(0.0, _expected_seconds(timings.get(t.run.mode)) - (now - (t.started_at or now)))
+            for t in self._running.values()
+        )
+        slots += [0.0] * max(0, self.max_running - len(slots))
+        etas = {}
+        for ticket in self._queue:
+            slots.sort()
+            start = slots[0]
+            etas[ticket.run.id] = int(math.ceil(start))
+            slots[0] = start + _expected_seconds(timings.get(ticket.run.mode))
+        return etas
+
+    def _retry_after_locked(self, timings):
+        etas = self._simulate_locked(timings)
+        first = min(etas.values()) if etas else 0
+        return max(1, min(int(first) or 30, 600))
+
+    def _current_timings(self):
+        """{mode: {stage: seconds}} for every running and queued mode. Stale
+        entries are re-read from SQLite without holding the lock, so intake
+        and completion never wait on database I/O."""
+        now = time.time()
+        with self._lock:
+            modes = {t.run.mode for t in self._running.values()} | {t.run.mode for t in self._queue}
+            stale = [
+                m for m in modes
+                if m not in self._timings or now - self._timings[m][0] > TIMINGS_TTL_SECONDS
+            ]
+        fresh = {}
+        for mode in stale:
+            try:
+                fresh[mode] = run_store.average_stage_timings(mode)
+            except Exception:
+                logger.exception("Stage timing lookup failed for %s", mode)
+                fresh[mode] = {}
+        with self._lock:
+            for mode, timings in fresh.items():
+                self._timings[mode] = (now, timings)
+            return {mode: timings for mode, (_, timings) in self._timings.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                "maxRunning": self.max_running,
+                "maxQueued": self.max_queued,
+                "running": len(self._running),
+                "queued": len(self._queue),
+            }
+
+
+def _expected_seconds(timings):
+    timings = timings or {}
+    if timings.get("run"):
+        return timings["run"]
+    stages = sum(v for k, v in timings.items() if k != "run")
+    return stages or Config.DEFAULT_RUN_SECONDS
+
+
+ADMISSION = AdmissionController(Config.MAX_CONCURRENT_RUNS, Config.MAX_QUEUED_RUNS)
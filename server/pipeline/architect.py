@@ -1,11 +1,24 @@
-"""Stage 1: the Panel Architect designs a coverage blueprint for the panel."""
+"""Stage 1: the Panel Architect designs a coverage blueprint for the panel.
+
+The model's blueprint is made seatable locally (postprocess_blueprint):
+seat arithmetic, duplicate disciplines and guardrails are fixed without a
+second reasoning call; the model is asked again only when nothing usable
+came back."""
+import json
 import logging
+import math
 
-from ..prompts.loader import render
+from ..prompts.packing import Section, render_packed
 from ..venice.client import get_client
+from .textsim import features
 
 logger = logging.getLogger(__name__)
 
+# Generous: the default architect is a thinking model and reasoning tokens
+# count against the completion limit.
+ARCHITECT_COMPLETION_TOKENS = 12000
+NAME_SIMILARITY = 0.6  # term overlap at which two discipline names are one
+
 BLUEPRINT_SCHEMA = {
     "type": "object",
     "properties": {
@@ -47,48 +60,168 @@ def design_blueprint(client, model, problem, panel_size, guardrails, context_doc
     guardrails = guardrails or {}
     context_section = ""
     if context_docs:
-        joined = "\n\n".join(context_docs)[:12000]
+        joined = "\n\n".join(context_docs)
         context_section = f"## Additional context (scraped from client-provided URLs)\n{joined}"
 
-    prompt = render(
+    prompt = render_packed(
         "panel/architect",
+        model,
+        ARCHITECT_COMPLETION_TOKENS,
+        [Section("context_section", context_section)],
+        ledger=ledger,
+        stage="architect",
         panel_size=panel_size,
         problem=problem,
-        context_section=context_section,
         pinned_experts=", ".join(guardrails.get("pinnedExperts") or []) or "none",
         excluded_domains=", ".join(guardrails.get("excludedDomains") or []) or "none",
         seed_perspectives=guardrails.get("seedPerspectives") or "none specified",
     )
     messages = [{"role": "user", "content": prompt}]
-    # Generous budget: the default architect is a thinking model and reasoning
-    # tokens count against the completion limit.
     blueprint = client.structured(
         model, messages, "PanelBlueprint", BLUEPRINT_SCHEMA,
-        max_completion_tokens=12000, ledger=ledger, stage="architect",
+        max_completion_tokens=ARCHITECT_COMPLETION_TOKENS, ledger=ledger, stage="architect",
     )
-
-    total = sum(d["count"] for d in blueprint["disciplines"])
-    if total != panel_size:
-        logger.warning("Blueprint seat count %d != %d; requesting correction", total, panel_size)
-        messages.append({"role": "assistant", "content": str(blueprint)})
+    try:
+        return postprocess_blueprint(blueprint, panel_size, guardrails)
+    except UnusableBlueprint as exc:
+        # Seat arithmetic is fixed locally; only a blueprint with nothing to
+        # work from goes back to the model
+        logger.warning("Blueprint unusable (%s); asking the architect again", exc)
+        messages.append({"role": "assistant", "content": json.dumps(blueprint)})
         messages.append(
             {
                 "role": "user",
                 "content": (
-                    f"Your discipline counts sum to {total}, but the panel must have exactly "
-                    f"{panel_size} seats. Rebalance the counts (same disciplines unless one must "
-                    f"go) so they sum to exactly {panel_size} and return the corrected JSON."
+                    f"That blueprint cannot be used: {exc}. Return a corrected blueprint with 4-10 named "
+                    f"disciplines (none in the excluded domains) whose counts sum to exactly {panel_size}."
                 ),
             }
         )
         blueprint = client.structured(
             model, messages, "PanelBlueprint", BLUEPRINT_SCHEMA,
-            max_completion_tokens=12000, ledger=ledger, stage="architect",
+            max_completion_tokens=ARCHITECT_COMPLETION_TOKENS, ledger=ledger, stage="architect",
         )
-        total = sum(d["count"] for d in blueprint["disciplines"])
-        if total != panel_size:
-            # Deterministic rebalance: trim/pad the largest discipline
-            diff = panel_size - total
-            largest = max(blueprint["disciplines"], key=lambda d: d["count"])
-            largest["count"] = max(1, largest["count"] + diff)
-    return blueprint
+        return postprocess_blueprint(blueprint, panel_size, guardrails)
+
+
+class UnusableBlueprint(ValueError):
+    """The blueprint has no discipline left to seat anyone in."""
+
+
+def _terms(text):
+    return set(features(text))
+
+
+def _matches(a, b, containment=True):
+    """Whether two names cover the same ground: their terms overlap heavily
+    or (with `containment`, for guardrails) one's terms contain the other's,
+    so excluding "crypto" also excludes "Crypto Regulation"."""
+    a, b = _terms(a), _terms(b)
+    if not a or not b:
+        return False
+    return (containment and (a <= b or b <= a)) or len(a & b) / len(a | b) >= NAME_SIMILARITY
+
+
+def apportion(weights, total, minimums):
+    """Largest-remainder apportionment of `total` seats proportional to
+    `weights`, with every entry held at or above its minimum."""
+    weight_sum = sum(weights) or len(weights)
+    quotas = [total * (w or 1) / weight_sum for w in weights]
+    seats = [max(m, math.floor(q)) for m, q in zip(minimums, quotas)]
+    while sum(seats) < total:
+        i = max(range(len(seats)), key=lambda i: quotas[i] - seats[i])
+        seats[i] += 1
+    while sum(seats) > total:
+        i = max((i for i in range(len(seats)) if seats[i] > minimums[i]), key=lambda i: seats[i] - quotas[i])
+        seats[i] -= 1
+    return seats
+
+
+def postprocess_blueprint(blueprint, panel_size, guardrails):
+    """Make the architect's blueprint seatable without another model call:
+    drop disciplines in excluded domains, merge duplicate or near-duplicate
+    names, give every pinned expert type a discipline, make the first
+    discipline (which hosts the contrarian seats) big enough for all of
+    them, and apportion exactly `panel_size` seats by largest remainder in
+    proportion to the model's counts. What changed is listed under
+    "adjustments". Raises UnusableBlueprint when no discipline survives."""
+    guardrails = guardrails or {}
+    excluded = [e for e in guardrails.get("excludedDomains") or [] if _terms(e)]
+    pinned = [p for p in guardrails.get("pinnedExperts") or [] if _terms(p)]
+    contrarians = list(blueprint.get("mandatedContrarians") or [])
+    adjustments = []
+
+    disciplines = []
+    for disc in blueprint.get("disciplines") or []:
+        name = (disc.get("name") or "").strip()
+        if not _terms(name):
+            continue
+        domain = next((e for e in excluded if _matches(e, name)), None)
+        if domain:
+            adjustments.append(f"Dropped {name} (excluded domain: {domain})")
+            continue
+        industries = [i for i in disc.get("industries") or [] if not any(_matches(e, i) for e in excluded)]
+        twin = next((d for d in disciplines if _matches(d["name"], name, containment=False)), None)
+        if twin:
+            adjustments.append(f"Merged {name} into {twin['name']}")
+            twin["weight"] += max(1, int(disc.get("count") or 1))
+            twin["industries"] += [i for i in industries if i not in twin["industries"]]
+            if disc.get("rationale") and disc["rationale"] not in twin["rationale"]:
+                twin["rationale"] = f"{twin['rationale']} {disc['rationale']}".strip()
+            continue
+        disciplines.append({
+            "name": name,
+            "weight": max(1, int(disc.get("count") or 1)),
+            "rationale": disc.get("rationale") or "",
+            "industries": industries,
+            "seniorityMix": disc.get("seniorityMix") or "mixed",
+        })
+    if not disciplines:
+        raise UnusableBlueprint("no disciplines outside the excluded domains")
+
+    for expert in pinned:
+        disc = next((d for d in disciplines if _matches(d["name"], expert)), None)
+        if disc is None:
+            adjustments.append(f"Added a seat for pinned expert type {expert}")
+            disc = {
+                "name": expert,
+                "weight": 1,
+                "rationale": "Required by the client.",
+                "industries": [],
+                "seniorityMix": "senior",
+            }
+            disciplines.append(disc)
+        disc["pinned"] = True
+
+    # Every discipline needs a seat: past panel_size, the lightest unpinned
+    # ones go (the contrarian host stays)
+    while len(disciplines) > panel_size:
+        droppable = [d for d in disciplines[1:] if not d.get("pinned")] or disciplines[1:]
+        if not droppable:
+            break
+        drop = min(droppable, key=lambda d: d["weight"])
+        adjustments.append(f"Dropped {drop['name']} to fit {panel_size} seats")
+        disciplines.remove(drop)
+
+    minimums = [1] * len(disciplines)
+    minimums[0] = max(1, min(len(contrarians), panel_size - (len(disciplines) - 1)))
+    if len(contrarians) > minimums[0]:
+        adjustments.append(f"Kept {minimums[0]} of {len(contrarians)} contrarian seats to fit {panel_size} seats")
+        contrarians = contrarians[: minimums[0]]
+    weights = [d["weight"] for d in disciplines]
+    counts = apportion(weights, panel_size, minimums)
+    if counts != weights:
+        adjustments.append(f"Rebalanced seats from {sum(weights)} to {panel_size}" if sum(weights) != panel_size
+                           else "Rebalanced seats to guarantee the contrarian and pinned seats")
+
+    for disc, count in zip(disciplines, counts):
+        del disc["weight"]
+        disc["count"] = count
+    if adjustments:
+        logger.info("Blueprint adjusted locally: %s", "; ".join(adjustments))
+    return {
+        **blueprint,
+        "disciplines": disciplines,
+        "mandatedContrarians": contrarians,
+        "adjustments": adjustments,
+    }
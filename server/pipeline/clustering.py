@@ -0,0 +1,130 @@
+"""Local theme clustering for hierarchical synthesis.
+
+Insights are embedded as hashed TF-IDF rows (textsim) and grouped with
+spherical k-means (cosine k-means++ seeding, mean-direction centroids, best
+of a few restarts). k is picked automatically by a simplified silhouette —
+each point's similarity to its own centroid minus its best other centroid —
+scored on a sample when the corpus is large. Candidates run from MIN_K up
+to about √(n/2) (k_ceiling), so larger panels can surface more themes;
+MAX_K bounds the number of theme summaries a synthesis pays for. Nothing
+here calls a model, so it scales to thousands of insights; the synthesizer
+only names the groups afterwards.
+"""
+from collections import Counter
+
+import numpy as np
+
+from .textsim import features, tfidf_matrix
+
+MIN_K, MAX_K = 3, 16
+K_SAMPLE = 1000  # rows used to score candidate k
+ITERATIONS = 25
+RESTARTS = 4
+
+
+def spherical_kmeans(m, k, seed=0, iterations=ITERATIONS, restarts=RESTARTS):
+    """Cluster unit rows of `m` into k groups; returns (labels, centroids).
+    k-means++ seeding can still drop two seeds into one group, so the most
+    cohesive of `restarts` runs is kept."""
+    rng = np.random.default_rng(seed)
+    best, best_cohesion = None, -np.inf
+    for _ in range(restarts):
+        labels, centroids = _kmeans(m, k, rng, iterations)
+        cohesion = float((m @ centroids.T)[np.arange(len(m)), labels].sum())
+        if cohesion > best_cohesion:
+            best, best_cohesion = (labels, centroids), cohesion
+    return best
+
+
+def _kmeans(m, k, rng, iterations):
+    n = len(m)
+    first = int(rng.integers(n))
+    centroids = [m[first]]
+    dist = 1.0 - m @ m[first]
+    for _ in range(1, k):
+        weights = np.clip(dist, 0.0, None)
+        total = weights.sum()
+        pick = int(rng.choice(n, p=weights / total)) if total > 0 else int(rng.integers(n))
+        centroids.append(m[pick])
+        dist = np.minimum(dist, 1.0 - m @ m[pick])
+    centroids = np.stack(centroids)
+    labels = None
+    for _ in range(iterations):
+        sims = m @ centroids.T
+        new = sims.argmax(axis=1)
+        if labels is not None and np.array_equal(new, labels):
+            break
+        labels = new
+        for j in range(k):
+            members = m[labels == j]
+            if not len(members):
+                # Re-seed an empty cluster with the worst-served point
+                far = int(sims.max(axis=1).argmin())
+                centroids[j] = m[far]
+                labels[far] = j
+                continue
+            total = members.sum(axis=0)
+            centroids[j] = total / max(float(np.linalg.norm(total)), 1e-12)
+    return labels, centroids
+
+
+def _separation(m, labels, centroids):
+    sims = m @ centroids.T
+    own = sims[np.arange(len(m)), labels]
+    sims[np.arange(len(m)), labels] = -np.inf
+    return float(np.mean(own - sims.max(axis=1)))
+
+
+def k_ceiling(n):
+    """Largest k worth trying for n texts: the √(n/2) rule of thumb, kept
+    within MIN_K..MAX_K."""
+    return min(MAX_K, max(MIN_K, round((n / 2) ** 0.5)))
+
+
+def choose_k(m, min_k=MIN_K, max_k=None, seed=0):
+    n = len(m)
+    if max_k is None:
+        max_k = k_ceiling(n)
+    max_k = min(max_k, n // 2)
+    if max_k <= min_k:
+        return max(1, min(min_k, n))
+    sample = m
+    if n > K_SAMPLE:
+        sample = m[np.random.default_rng(seed).choice(n, K_SAMPLE, replace=False)]
+    scores = {}
+    for k in range(min_k, max_k + 1):
+        labels, centroids = spherical_kmeans(sample, k, seed=seed)
+        scores[k] = _separation(sample, labels, centroids)
+    return max(scores, key=scores.get)
+
+
+def top_terms(texts, members, limit=6):
+    """Words most over-represented in a cluster relative to the corpus."""
+    corpus = Counter(w for t in texts for w in set(features(t)))
+    local = Counter(w for i in members for w in set(features(texts[i])))
+    scored = sorted(local, key=lambda w: (-local[w] * local[w] / corpus[w], w))
+    return [w for w in scored if local[w] > 1][:limit]
+
+
+def cluster_texts(texts, min_k=MIN_K, max_k=None, representatives=5, seed=0):
+    """Group texts into themes; max_k defaults to k_ceiling(len(texts)). Returns clusters largest first, each
+    {"indices", "terms", "representatives"} where representatives are the
+    indices closest to the centroid."""
+    if not texts:
+        return []
+    m = tfidf_matrix(texts)
+    k = choose_k(m, min_k, max_k, seed)
+    labels, centroids = spherical_kmeans(m, k, seed=seed)
+    clusters = []
+    for j in range(k):
+        members = np.nonzero(labels == j)[0]
+        if not len(members):
+            continue
+        closeness = m[members] @ centroids[j]
+        clusters.append({
+            "indices": members.tolist(),
+            "terms": top_terms(texts, members),
+            "representatives": members[np.argsort(-closeness)[:representatives]].tolist(),
+        })
+    clusters.sort(key=lambda c: -len(c["indices"]))
+    return clusters
@@ -0,0 +1,155 @@
+"""Dependency-graph executor for pipeline stages.
+
+A node runs as soon as its hard dependencies have finished. Soft dependencies
+are awaited only until the node's deadline; after that the node runs with
+whatever is available (missing soft inputs are None). Nodes may be added while
+the graph runs — the panel flow adds one insight node per persona as persona
+batches land, so experts start without waiting for the whole cast.
+
+Coordinator nodes (ones that fan out further) run on the graph's own small
+thread pool; leaf nodes added with `pool=` run on that scheduler pool instead
+(see scheduler.py), so Venice calls share the process-wide budget.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .scheduler import bind_lane, current_lane
+
+logger = logging.getLogger(__name__)
+
+
+class _Node:
+    __slots__ = ("name", "fn", "deps", "soft", "deadline", "required", "pool", "state")
+
+    def __init__(self, name, fn, deps, soft, deadline, required, pool):
+        self.name = name
+        self.fn = fn
+        self.deps = tuple(deps)
+        self.soft = tuple(soft)
+        self.deadline = deadline
+        self.required = required
+        self.pool = pool
+        self.state = "pending"  # pending | running | done | failed | skipped
+
+
+class TaskGraph:
+    def __init__(self, max_workers, name="dag"):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lane = current_lane()
+        self._pools = []
+        self._cond = threading.Condition()
+        self._nodes = {}
+        self._results = {}
+        self._errors = {}
+
+    def add(self, name, fn, deps=(), soft=(), soft_deadline=None, required=True, pool=None):
+        """Register fn(inputs) to run once `deps` are done. `soft` deps are
+        waited on until `soft_deadline` (a time.monotonic() value). A failing
+        required node aborts the graph; a failing optional node only skips
+        its hard dependents. Leaf nodes pass the scheduler `pool` to run on."""
+        with self._cond:
+            if name in self._nodes:
+                raise ValueError(f"Duplicate graph node {name}")
+            if pool is not None and pool not in self._pools:
+                self._pools.append(pool)
+            self._nodes[name] = _Node(name, fn, deps, soft, soft_deadline, required, pool)
+            self._cond.notify_all()
+
+    def result(self, name, default=None):
+        with self._cond:
+            return self._results.get(name, default)
+
+    def run(self, cancel_event=None):
+        """Drive the graph to completion on the calling thread. Returns the
+        results dict; re-raises the first failure of a required node without
+        waiting for unrelated nodes still in flight. Once cancel_event is set
+        no new nodes start."""
+        try:
+            with self._cond:
+                while True:
+                    fatal = next(
+                        (self._errors[n.name] for n in self._nodes.values() if n.state == "failed" and n.required),
+                        None,
+                    )
+                    if fatal is not None:
+                        raise fatal
+                    stopping = cancel_event is not None and cancel_event.is_set()
+                    wake_at = self._dispatch_ready_locked(stopping)
+                    running = any(n.state == "running" for n in self._nodes.values())
+                    pending = any(n.state == "pending" for n in self._nodes.values())
+                    if not running and (not pending or stopping):
+                        return dict(self._results)
+                    if not running and wake_at is None:
+                        stuck = ", ".join(n.name for n in self._nodes.values() if n.state == "pending")
+                        raise RuntimeError(f"Graph cannot make progress; unresolved nodes: {stuck}")
+                    timeout = None if wake_at is None else max(0.0, wake_at - time.monotonic())
+                    if cancel_event is not None:
+                        timeout = 0.5 if timeout is None else min(timeout, 0.5)
+                    self._cond.wait(timeout)
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            for pool in self._pools:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+    # ------------------------------------------------------------ internals
+    def _dispatch_ready_locked(self, stopping):
+        """Submit every ready node; returns the earliest soft deadline that
+        still gates a node (so the driver knows when to re-check)."""
+        now = time.monotonic()
+        wake_at = None
+        for node in list(self._nodes.values()):
+            if node.state != "pending":
+                continue
+            states = [self._nodes[d].state if d in self._nodes else "pending" for d in node.deps]
+            if any(s in ("failed", "skipped") for s in states):
+                node.state = "skipped"
+                logger.info("Skipping graph node %s: a dependency failed", node.name)
+                continue
+            if stopping or any(s != "done" for s in states):
+                continue
+            soft_waiting = [
+                d for d in node.soft
+                if d in self._nodes and self._nodes[d].state in ("pending", "running")
+            ]
+            if soft_waiting and node.deadline is not None and now < node.deadline:
+                wake_at = node.deadline if wake_at is None else min(wake_at, node.deadline)
+                continue
+            if soft_waiting and node.deadline is None:
+                continue
+            inputs = {d: self._results.get(d) for d in node.deps + node.soft}
+            node.state = "running"
+            if node.pool is not None:
+                fut = node.pool.submit(self._execute, node, inputs)
+                fut.add_done_callback(lambda f, node=node: f.cancelled() and self._dropped(node))
+            else:
+                self._executor.submit(self._execute, node, inputs)
+        return wake_at
+
+    def _dropped(self, node):
+        with self._cond:
+            node.state = "skipped"
+            self._cond.notify_all()
+
+    def _execute(self, node, inputs):
+        try:
+            if node.pool is None and self._lane is not None:
+                with bind_lane(self._lane):
+                    result = node.fn(inputs)
+            else:
+                result = node.fn(inputs)
+        except Exception as exc:
+            if node.required:
+                logger.warning("Graph node %s failed: %s", node.name, exc)
+            else:
+                logger.exception("Optional graph node %s failed", node.name)
+            with self._cond:
+                node.state = "failed"
+                self._errors[node.name] = exc
+                self._cond.notify_all()
+            return
+        with self._cond:
+            node.state = "done"
+            self._results[node.name] = result
+            self._cond.notify_all()
@@ -0,0 +1,155 @@
+"""Board-debate context management.
+
+Rather than handing every member the full previous round (prompt tokens grow
+with members² per round) and the minutes a truncated transcript, the board
+flow keeps:
+
+- a structured digest per round, produced while the next round is being
+  spoken (so it adds no wall-clock time);
+- relevance-routed context per member: the previous round's statements that
+  name them, that they named, or that the digests mark as opposing them, in
+  full; everyone else as a short gist; earlier rounds as digest summaries.
+
+Minutes are then written from the round digests plus the closing round.
+"""
+import re
+
+from ..prompts.loader import render
+
+DIRECTED_LIMIT = 4  # full statements routed to one member per round
+GIST_CHARS = 320
+# Token caps for the packed prompt sections (see prompts.packing)
+HISTORY_TOKENS = 1500
+CLOSING_TOKENS = 6000
+
+DIGEST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "positions": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "member": {"type": "string"},
+                    "stance": {"type": "string"},
+                    "key_claim": {"type": "string"},
+                    "challenges": {"type": "array", "items": {"type": "string"}},
+                    "concedes_to": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["member", "stance", "key_claim", "challenges", "concedes_to"],
+                "additionalProperties": False,
+            },
+        },
+    },
+    "required": ["summary", "positions"],
+    "additionalProperties": False,
+}
+
+
+def digest_round(client, model, problem, round_no, turns, ledger):
+    """Structured digest of one round: a short summary plus each member's
+    stance and who they challenged or conceded to."""
+    statements = "\n\n".join(f"{t['speaker']}: {t['statement']}" for t in turns)
+    digest = client.structured(
+        model,
+        [{"role": "user", "content": render("modes/board_digest", problem=problem, round_no=round_no, statements=statements)}],
+        "BoardRoundDigest",
+        DIGEST_SCHEMA,
+        temperature=0.2,
+        max_completion_tokens=2500,
+        ledger=ledger,
+        stage="debate",
+    )
+    digest["round"] = round_no
+    return digest
+
+
+def _name_patterns(name):
+    """Full name plus surname, matched as whole words."""
+    parts = [p for p in re.split(r"\s+", (name or "").strip()) if p]
+    names = {name.strip()} if parts else set()
+    if len(parts) > 1 and len(parts[-1]) >= 3:
+        names.add(parts[-1])
+    return [re.compile(rf"\b{re.escape(n)}\b", re.IGNORECASE) for n in names]
+
+
+def _mentions(text, name):
+    return any(p.search(text or "") for p in _name_patterns(name))
+
+
+def _opponents(digests, name):
+    """Members the digests record as challenging `name`, or challenged by
+    them."""
+    out = set()
+    for digest in digests:
+        for pos in digest.get("positions") or []:
+            member = pos.get("member", "")
+            if _same(member, name):
+                out.update(pos.get("challenges") or [])
+            elif any(_same(c, name) for c in pos.get("challenges") or []):
+                out.add(member)
+    return out
+
+
+def _same(a, b):
+    return (a or "").strip().lower() == (b or "").strip().lower() or _mentions(a, b)
+
+
+def gist(statement, limit=GIST_CHARS):
+    """First two sentences, clipped."""
+    sentences = re.split(r"(?<=[.!?])\s+", (statement or "").strip())
+    text = " ".join(sentences[:2])
+    return text if len(text) <= limit else text[: limit - 1].rstrip() + "…"
+
+
+def route_context(member, previous_turns, digests):
+    """Context for `member`'s next statement: (history, directed, brief).
+    `previous_turns` is the round just spoken; `digests` are the digests
+    available so far (older rounds)."""
+    name = member["name"]
+    own = next((t["statement"] for t in previous_turns if t["speaker"] == name), "")
+    opponents = _opponents(digests, name)
+    scored = []
+    for t in previous_turns:
+        if t["speaker"] == name:
+            continue
+        score = 0
+        if _mentions(t["statement"], name):
+            score += 2
+        if _mentions(own, t["speaker"]):
+            score += 1
+        if any(_same(o, t["speaker"]) for o in opponents):
+            score += 1
+        scored.append((score, t))
+    ranked = sorted((s for s in scored if s[0] > 0), key=lambda s: -s[0])
+    directed = [t for _, t in ranked[:DIRECTED_LIMIT]]
+    rest = [t for _, t in scored if not any(t is d for d in directed)]
+
+    history = format_digests(digests)
+    return (
+        history or "(this is the first exchange)",
+        "\n\n".join(f"{t['speaker']}: {t['statement']}" for t in directed) or "(no one addressed you directly)",
+        "\n".join(f"- {t['speaker']}: {gist(t['statement'])}" for t in rest) or "(nothing else)",
+    )
+
+
+def format_digests(digests):
+    """Digests as markdown, latest round first (so packing a prompt to its
+    budget drops the oldest rounds)."""
+    blocks = []
+    for d in digests:
+        lines = [f"### Round {d['round']}", d.get("summary", "")]
+        for pos in d.get("positions") or []:
+            line = f"- {pos.get('member')}: {pos.get('stance')} — {pos.get('key_claim')}"
+            if pos.get("challenges"):
+                line += f" (challenged {', '.join(pos['challenges'])})"
+            if pos.get("concedes_to"):
+                line += f" (conceded to {', '.join(pos['concedes_to'])})"
+            lines.append(line)
+        blocks.insert(0, "\n".join(lines))
+    return "\n\n".join(blocks)
+
+
+def closing_statements(turns):
+    return "\n\n".join(f"{t['speaker']}: {t['statement']}" for t in turns)
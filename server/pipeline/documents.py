@@ -0,0 +1,200 @@
+"""Client documents: ingestion into the engagement's chunk index and BM25
+retrieval of the chunks each expert should see.
+
+Uploaded text, markdown or HTML and scraped pages are normalized, split into
+~250-token chunks on paragraph and sentence boundaries, and indexed by
+stemmed term (textsim.features) in SQLite. Each expert prompt then carries
+only its top chunks for the persona's focus areas and the problem, so a
+large body of client material grounds the panel while every prompt stays
+small.
+"""
+import hashlib
+import logging
+import re
+import threading
+from collections import Counter
+from html.parser import HTMLParser
+
+from ..db import documents as store
+from ..prompts.packing import estimate_tokens, truncate_tokens
+from .market_intel import persona_query
+from .textsim import bm25_weight, features
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("text", "markdown", "html")
+MAX_DOCUMENT_CHARS = 2_000_000
+CHUNK_TOKENS = 250
+TOP_K = 4
+CONTEXT_TOKENS = 1200  # client material per expert prompt
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_SKIP_TAGS = {"script", "style", "noscript", "svg", "nav", "footer", "header", "form", "template"}
+_BLOCK_TAGS = {"p", "div", "section", "article", "br", "li", "tr", "table", "blockquote", "pre",
+               "h1", "h2", "h3", "h4", "h5", "h6"}
+
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in _SKIP_TAGS:
+            self._skip += 1
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n\n")
+            if tag[0] == "h" and tag[1:].isdigit():
+                self.parts.append("#" * int(tag[1:]) + " ")
+
+    def handle_endtag(self, tag):
+        if tag in _SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+        elif tag in _BLOCK_TAGS:
+            self.parts.append("\n\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+
+def html_to_text(html):
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    return "".join(parser.parts)
+
+
+def normalize_text(text, limit=MAX_DOCUMENT_CHARS):
+    """Whitespace collapsed within lines and runs of blank lines reduced to
+    one, nothing else removed: client material keeps every line (scraped
+    pages arrive already stripped of site chrome by clean_scraped)."""
+    lines = [" ".join(line.split()) for line in text.replace("\r\n", "\n").split("\n")]
+    out, blank = [], False
+    for line in lines:
+        if not line:
+            blank = bool(out)
+            continue
+        if blank:
+            out.append("")
+            blank = False
+        out.append(line)
+    return "\n".join(out)[:limit]
+
+
+def chunk_text(text, target=CHUNK_TOKENS):
+    """Paragraphs packed into chunks of about `target` tokens; a paragraph
+    larger than that is split between sentences."""
+    chunks, current, size = [], [], 0
+
+    def flush():
+        nonlocal current, size
+        if current:
+            chunks.append("\n\n".join(current))
+        current, size = [], 0
+
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = estimate_tokens(paragraph)
+        if tokens > target:
+            flush()
+            for sentence in _SENTENCE_END.split(paragraph):
+                n = estimate_tokens(sentence)
+                if size and size + n > target:
+                    flush()
+                current.append(truncate_tokens(sentence, target * 2))
+                size += n
+            flush()
+            continue
+        if size + tokens > target:
+            flush()
+        current.append(paragraph)
+        size += tokens
+    flush()
+    return chunks
+
+
+def ingest(engagement_id, name, content, fmt="text", source="upload"):
+    """Clean, chunk and index one document for an engagement. Returns the
+    document id, or None when the engagement already holds this content.
+    Scraped pages are keyed by URL (`name`): a changed page replaces the
+    version indexed by an earlier run."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported document format {fmt!r} (expected one of {', '.join(FORMATS)})")
+    content = content or ""
+    if len(content) > MAX_DOCUMENT_CHARS:
+        raise ValueError(f"Document {name!r} exceeds {MAX_DOCUMENT_CHARS} characters")
+    text = html_to_text(content) if fmt == "html" else content
+    text = normalize_text(text)
+    chunks = [(c, Counter(features(c))) for c in chunk_text(text)]
+    chunks = [(c, terms) for c, terms in chunks if terms]
+    if not chunks:
+        return None
+    digest = hashlib.sha1(text.encode()).hexdigest()
+    document_id = store.add_document(
+        engagement_id, name, source, digest, len(text), chunks, replace=source == "scrape"
+    )
+    if document_id:
+        logger.info("Indexed %s for engagement %s: %d chunks", name, engagement_id, len(chunks))
+    return document_id
+
+
+class Retriever:
+    """BM25 over one engagement's chunks. Corpus statistics are read on first
+    use (after the run's scrapes are indexed) and shared by every expert."""
+
+    def __init__(self, engagement_id, k=TOP_K, budget=CONTEXT_TOKENS):
+        self.engagement_id = engagement_id
+        self.k = k
+        self.budget = budget
+        self._stats = None
+        self._lock = threading.Lock()
+
+    def _corpus(self):
+        with self._lock:
+            if self._stats is None:
+                self._stats = store.corpus_stats(self.engagement_id)
+            return self._stats
+
+    def search(self, weights):
+        """Top chunks for {term: query weight}: [{id, text, name, ord, score}]."""
+        n, avgdl = self._corpus()
+        if not n or not weights:
+            return []
+        rows = store.postings(self.engagement_id, weights)
+        df = Counter(row["term"] for row in rows)
+        scores = Counter()
+        for row in rows:
+            scores[row["chunk_id"]] += weights[row["term"]] * bm25_weight(
+                row["tf"], df[row["term"]], n, row["length"], avgdl
+            )
+        top = scores.most_common(self.k)
+        chunks = store.get_chunks(chunk_id for chunk_id, _ in top)
+        return [{"id": cid, **chunks[cid], "score": score} for cid, score in top if cid in chunks]
+
+    def for_persona(self, persona, problem):
+        return self.search(persona_query(persona, problem))
+
+    def section(self, persona, problem):
+        """Prompt section of the client material most relevant to `persona`,
+        within the token budget; empty when the engagement has none."""
+        try:
+            hits = self.for_persona(persona, problem)
+        except Exception:
+            logger.exception("Document retrieval failed for %s", persona.get("name"))
+            return ""
+        parts, remaining = [], self.budget
+        for hit in hits:
+            if remaining < 50:
+                break
+            text = truncate_tokens(hit["text"], remaining)
+            if not text:
+                break
+            parts.append(f"[{hit['name']} §{hit['ord'] + 1}]\n{text}")
+            remaining -= estimate_tokens(text)
+        if not parts:
+            return ""
+        return "## Client material (excerpts most relevant to your focus)\n" + "\n\n".join(parts)
@@ -12,22 +12,36 @@ import threading
 import time
 import uuid
 
+from ..venice.cancel import CancelToken
+
 
 class Run:
     def __init__(self, run_id, mode, engagement_id=None):
         self.id = run_id
         self.mode = mode
         self.engagement_id = engagement_id
-        self.status = "running"  # running | waiting_input | completed | failed | cancelled
+        self._status = "running"  # queued | running | waiting_input | completed | failed | cancelled
         self.created_at = time.time()
+        self.stage_durations = {}
+        self._stage_started = {}
         self.events = []
         self.result = None
         self.error = None
         self._subscribers = []
         self._lock = threading.Lock()
-        self._answers = None
-        self._answer_event = threading.Event()
-        self.cancel_requested = threading.Event()
+        self._changed = threading.Condition(self._lock)
+        self.cancel_requested = CancelToken()
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        # Wakes long-polls: a status change is news even without an event
+        with self._changed:
+            self._status = value
+            self._changed.notify_all()
 
     # ------------------------------------------------------------- events
     def emit(self, event_type, data):
@@ -35,11 +49,54 @@ class Run:
             seq = len(self.events) + 1
             event = {"seq": seq, "type": event_type, "data": data}
             self.events.append(event)
+            self._track_stage_locked(event_type, data)
             subscribers = list(self._subscribers)
+            self._changed.notify_all()
         for q in subscribers:
             q.put(event)
         return event
 
+    def emit_ephemeral(self, event_type, data, key=None):
+        """Send an event to current subscribers only: it gets no seq, is not
+        kept in the log (so neither replayed nor persisted) and must be
+        superseded by a regular event. Within one SSE batch only the latest
+        event per `key` is sent."""
+        event = {"type": event_type, "data": data, "key": key}
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            q.put(event)
+
+    def _track_stage_locked(self, event_type, data):
+        if event_type == "stage.started":
+            self._stage_started[data.get("stage")] = time.monotonic()
+        elif event_type == "stage.completed":
+            started = self._stage_started.pop(data.get("stage"), None)
+            if started is not None:
+                self.stage_durations[data.get("stage")] = time.monotonic() - started
+
+    def stages_in_progress(self):
+        with self._lock:
+            return list(self._stage_started)
+
+    @property
+    def last_seq(self):
+        return len(self.events)
+
+    def events_since(self, after_seq):
+        with self._lock:
+            return self.events[after_seq:]
+
+    def wait_for_events(self, after_seq, timeout, status=None):
+        """Block until an event newer than after_seq exists, the status moves
+        off `status` (when given) or timeout passes (long-polling). Returns
+        True if there is something new to report."""
+        with self._changed:
+            return self._changed.wait_for(
+                lambda: len(self.events) > after_seq or (status is not None and self._status != status),
+                timeout,
+            )
+
     def subscribe(self, after_seq=0):
         q = queue.Queue()
         with self._lock:
@@ -54,21 +111,14 @@ class Run:
             if q in self._subscribers:
                 self._subscribers.remove(q)
 
-    # ------------------------------------------------- interactive answers
-    def wait_for_answers(self, timeout):
-        self.status = "waiting_input"
-        got = self._answer_event.wait(timeout)
-        self.status = "running"
-        if not got:
-            raise TimeoutError("Timed out waiting for user answers")
-        answers = self._answers
-        self._answers = None
-        self._answer_event.clear()
-        return answers
 
-    def provide_answers(self, answers):
-        self._answers = answers
-        self._answer_event.set()
+class Continuation:
+    """Returned by a flow that needs user input before it can go on. The
+    runner persists `state` (JSON-serialisable) and parks the run without a
+    thread until the input arrives or the wait times out."""
+
+    def __init__(self, state):
+        self.state = state
 
 
 class RunRegistry:
@@ -76,9 +126,12 @@ class RunRegistry:
         self._runs = {}
         self._lock = threading.Lock()
 
-    def create(self, mode, engagement_id=None):
-        run_id = f"r_{uuid.uuid4().hex[:12]}"
+    def create(self, mode, engagement_id=None, run_id=None, events=None):
+        """New run; `events` rehydrates the log of a run restored from the
+        database (seq numbers continue after them)."""
+        run_id = run_id or f"r_{uuid.uuid4().hex[:12]}"
         run = Run(run_id, mode, engagement_id)
+        run.events = list(events or [])
         with self._lock:
             self._runs[run_id] = run
             self._prune_locked()
@@ -99,5 +152,48 @@ class RunRegistry:
 REGISTRY = RunRegistry()
 
 
+TERMINAL_EVENTS = ("run.completed", "run.error", "run.cancelled")
+
+
 def sse_format(event):
+    if "seq" not in event:  # ephemeral: no id, so Last-Event-ID is untouched
+        return f"event: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
     return f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def sse_format_batch(events):
+    """One `batch` frame carrying several events. The frame id is the last
+    logged event's seq, so Last-Event-ID replay resumes exactly after the
+    batch; ephemeral events superseded later in the batch are dropped."""
+    latest = {}
+    for i, e in enumerate(events):
+        if "seq" not in e and e.get("key") is not None:
+            latest[e["key"]] = i
+    out = []
+    for i, e in enumerate(events):
+        if "seq" in e:
+            out.append(e)
+        elif e.get("key") is None or latest[e["key"]] == i:
+            out.append({"type": e["type"], "data": e["data"]})
+    data = {"events": out}
+    seqs = [e["seq"] for e in events if "seq" in e]
+    id_line = f"id: {seqs[-1]}\n" if seqs else ""
+    return f"{id_line}event: batch\ndata: {json.dumps(data)}\n\n"
+
+
+def parse_batch_window(value):
+    """Parse a subscriber's `?batch=` window ("250ms", "0.5s", "250") into
+    seconds. Returns 0 (no coalescing) for missing or invalid values."""
+    if not value:
+        return 0.0
+    value = value.strip().lower()
+    try:
+        if value.endswith("ms"):
+            seconds = float(value[:-2]) / 1000
+        elif value.endswith("s"):
+            seconds = float(value[:-1])
+        else:
+            seconds = float(value) / 1000
+    except ValueError:
+        return 0.0
+    return max(0.0, min(seconds, 5.0))
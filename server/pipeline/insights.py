@@ -1,6 +1,6 @@
-"""Stage 3: every persona analyzes the problem, in parallel with bounded concurrency."""
+"""Stage 3: one persona's analysis of the problem. The run graph (runner) asks
+every expert as soon as they are cast, on the shared scheduler."""
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ..prompts.loader import render
 
@@ -43,70 +43,32 @@ INSIGHT_SCHEMA = {
 }
 
 
-def collect_insights(
-    client,
-    model,
-    problem,
-    personas,
-    concurrency,
-    ledger,
-    market_digest=None,
-    prompt_name="panel/expert_insight",
-    schema=None,
-    on_started=None,
-    on_completed=None,
-    cancel_event=None,
+def ask_expert(
+    client, model, problem, persona, ledger, market_context="", prompt_name="panel/expert_insight", schema=None,
+    client_context="",
 ):
-    schema = schema or INSIGHT_SCHEMA
-    market_context = ""
-    if market_digest:
-        market_context = f"## Market intelligence summary (from live research)\n{market_digest[:4000]}"
+    """One expert's analysis of the problem. `client_context` is the client
+    material retrieved for this persona (documents.Retriever.section)."""
+    prompt = render(
+        prompt_name,
+        name=persona["name"],
+        title=persona.get("title", ""),
+        background=persona.get("background", ""),
+        focus_areas=", ".join(persona.get("focus_areas") or []),
+        perspective=persona.get("perspective", ""),
+        problem=problem,
+        client_context=client_context,
+        market_context=market_context,
+    )
+    return client.structured(
+        model,
+        [{"role": "user", "content": prompt}],
+        "ExpertInsight",
+        schema or INSIGHT_SCHEMA,
+        ledger=ledger,
+        stage="insights",
+    )
 
-    def ask(index, persona):
-        if cancel_event is not None and cancel_event.is_set():
-            return index, persona, None
-        if on_started:
-            on_started(index, persona)
-        prompt = render(
-            prompt_name,
-            name=persona["name"],
-            title=persona.get("title", ""),
-            background=persona.get("background", ""),
-            focus_areas=", ".join(persona.get("focus_areas") or []),
-            perspective=persona.get("perspective", ""),
-            problem=problem,
-            market_context=market_context,
-        )
-        result = client.structured(
-            model,
-            [{"role": "user", "content": prompt}],
-            "ExpertInsight",
-            schema,
-            ledger=ledger,
-            stage="insights",
-        )
-        return index, persona, result
 
-    insights = [None] * len(personas)
-    with ThreadPoolExecutor(max_workers=concurrency) as pool:
-        futures = [pool.submit(ask, i, p) for i, p in enumerate(personas)]
-        for fut in as_completed(futures):
-            try:
-                index, persona, result = fut.result()
-            except Exception as exc:
-                logger.exception("Insight generation failed")
-                continue
-            entry = {"persona": persona}
-            if result is None:
-                entry["error"] = "cancelled"
-            else:
-                entry.update(result)
-            insights[index] = entry
-            if on_completed:
-                on_completed(index, entry)
-
-    # Replace any slots that failed entirely
-    return [
-        e if e is not None else {"persona": personas[i], "error": "failed", "insights_and_analysis": []}
-        for i, e in enumerate(insights)
-    ]
+def failed_entry(persona):
+    return {"persona": persona, "error": "failed", "insights_and_analysis": []}
@@ -1,12 +1,46 @@
 """Stage 4: real market intelligence via Venice web/X search and URL scraping."""
+import hashlib
+import ipaddress
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import re
+import socket
+import time
+from concurrent.futures import TimeoutError as FuturesTimeout
+from concurrent.futures import as_completed
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 
+import requests
+
+from ..config import Config
+from ..db import research_cache, scrape_cache
 from ..prompts.loader import render
+from ..prompts.packing import estimate_tokens, truncate_tokens
 from ..venice.models import get_catalog
+from .scheduler import get_scheduler
+from .textsim import BM25Index, features
 
 logger = logging.getLogger(__name__)
 
+SCRAPE_DOC_TOKENS = 2000  # per document handed to the architect
+SCRAPE_STORE_CHARS = 60000  # cleaned text kept in the cache
+REVALIDATE_TIMEOUT = 5
+# Routed research is repeated in every expert's prompt, so it is capped by
+# cost rather than by the expert model's context window
+MARKET_CONTEXT_TOKENS = 1000
+PASSAGE_TOKENS = 120
+PROBLEM_WEIGHT = 0.5
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+_TRACKING_PREFIXES = ("utm_", "fbclid", "gclid", "mc_", "ref_src")
+_CITE_MARK = re.compile(r"\^(\d+(?:,\s*\d+)*)\^")
+_BULLET = re.compile(r"^\s*(?:[-*•]|\d+[.)]|#+)\s")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_CHROME = re.compile(
+    r"\b(cookies?|subscribe|sign (in|up)|log ?in|newsletter|all rights reserved|privacy policy|skip to)\b", re.I
+)
+
 RESEARCH_PLAN_SCHEMA = {
     "type": "object",
     "properties": {
@@ -30,33 +64,166 @@ RESEARCH_PLAN_SCHEMA = {
 }
 
 
-def scrape_context(client, urls):
-    """Fetch client-provided URLs into context documents. Failures are logged
-    and skipped so one bad URL never blocks a run."""
-    docs = []
+def normalize_url(url):
+    """Cache key for a URL: lower-cased scheme and host, default port,
+    fragment and tracking parameters dropped, query sorted."""
+    parts = urlsplit(url.strip())
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PREFIXES)
+    ))
+    return urlunsplit((scheme, host, parts.path.rstrip("/") or "/", query, ""))
+
+
+def clean_scraped(text, limit=SCRAPE_STORE_CHARS):
+    """Strip the boilerplate scraped markdown carries: images, link targets,
+    lines repeated across the page (menus, footers), short cookie/subscribe
+    chrome, runs of blank lines."""
+    text = _IMAGE.sub("", text.replace("\r\n", "\n"))
+    text = _LINK.sub(r"\1", text)
+    lines = [" ".join(line.split()) for line in text.split("\n")]
+    counts = {}
+    for line in lines:
+        if line:
+            counts[line] = counts.get(line, 0) + 1
+    out, blank = [], False
+    for line in lines:
+        if not line:
+            blank = bool(out)
+            continue
+        if counts[line] > 2 and len(line) < 120:
+            continue
+        if len(line) < 80 and _CHROME.search(line):
+            continue
+        if blank:
+            out.append("")
+            blank = False
+        out.append(line)
+    return "\n".join(out)[:limit]
+
+
+def _public_http(url):
+    """Only revalidate against http(s) origins that resolve to public
+    addresses: the URLs are user-supplied."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return False
+    try:
+        infos = socket.getaddrinfo(parts.hostname, parts.port, proto=socket.IPPROTO_TCP)
+    except OSError:
+        return False
+    return bool(infos) and all(ipaddress.ip_address(info[4][0]).is_global for info in infos)
+
+
+def _unchanged(url, entry):
+    """Conditional HEAD against the origin with the cached entry's validators.
+    Entries without validators are simply re-scraped; network trouble reads
+    as modified."""
+    if not (entry.get("etag") or entry.get("last_modified")) or not _public_http(url):
+        return False
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        resp = requests.head(url, headers=headers, timeout=REVALIDATE_TIMEOUT, allow_redirects=False)
+    except requests.RequestException:
+        return False
+    if resp.status_code == 304:
+        return True
+    if resp.status_code >= 300:
+        return False
+    etag, last_modified = resp.headers.get("ETag"), resp.headers.get("Last-Modified")
+    return bool(etag or last_modified) and (etag, last_modified) == (entry.get("etag"), entry.get("last_modified"))
+
+
+def _response_validators(result):
+    """(etag, last_modified) of the page as fetched, from the origin headers
+    the scrape response passes through (top level, `headers` or `metadata`)."""
+    found = {}
+    for container in (result, result.get("headers"), result.get("metadata")):
+        if isinstance(container, dict):
+            for key, value in container.items():
+                found.setdefault(re.sub(r"[^a-z]", "", str(key).lower()), value)
+    etag, last_modified = found.get("etag"), found.get("lastmodified")
+    return (str(etag) if etag else None), (str(last_modified) if last_modified else None)
+
+
+def format_pages(pages):
+    return [f"### Scraped: {url}\n{truncate_tokens(text, SCRAPE_DOC_TOKENS)}" for url, text in pages]
+
+
+def scrape_pages(client, urls, deadline=None):
+    """Fetch client-provided URLs as [(url, cleaned text)], concurrently and
+    within `deadline` seconds overall. Cleaned text is cached across runs:
+    fresh entries are served without a call, stale ones are revalidated
+    with the origin before re-scraping. Failures and URLs still pending at
+    the deadline are logged and skipped (a late scrape still lands in the
+    cache) so one bad URL never blocks a run; a stale copy stands in for a
+    failed re-scrape."""
+    keyed = {}
     for url in (urls or [])[:5]:
+        keyed.setdefault(normalize_url(url), url)
+    if not keyed:
+        return []
+    try:
+        cached = scrape_cache.get_entries(keyed)
+    except Exception:
+        logger.exception("Scrape cache unavailable")
+        cached = {}
+    ttl = Config.SCRAPE_CACHE_TTL_HOURS * 3600
+    now = time.time()
+
+    def fetch(key, url):
+        entry = cached.get(key)
+        if entry and _unchanged(url, entry):
+            scrape_cache.mark_fresh(key)
+            return entry["content"], "revalidated"
         try:
             result = client.scrape(url)
-            content = result.get("content") or result.get("markdown") or str(result)
-            docs.append(f"### Scraped: {url}\n{content[:8000]}")
         except Exception:
-            logger.exception("Scrape failed for %s", url)
-    return docs
-
-
-def gather_market_intelligence(
-    client,
-    planner_model,
-    search_model,
-    problem,
-    *,
-    topic_count=5,
-    enable_x=False,
-    concurrency=4,
-    ledger=None,
-    on_completed=None,
-    on_planned=None,
-):
+            if entry:
+                logger.warning("Re-scrape failed for %s; using the cached copy", url, exc_info=True)
+                return entry["content"], "stale"
+            raise
+        content = clean_scraped(result.get("content") or result.get("markdown") or str(result))
+        etag, last_modified = _response_validators(result)
+        scrape_cache.put_entry(key, content, etag, last_modified, Config.SCRAPE_CACHE_MAX_ENTRIES)
+        return content, "scraped"
+
+    texts, sources = {}, {}
+    pending = {}
+    pool = get_scheduler().pool(label="scrape", max_workers=len(keyed))
+    for key, url in keyed.items():
+        entry = cached.get(key)
+        if entry and now - entry["fetched_at"] < ttl:
+            texts[key], sources[key] = entry["content"], "cache"
+        else:
+            pending[pool.submit(fetch, key, url)] = key
+    try:
+        for fut in as_completed(pending, timeout=deadline or Config.SCRAPE_DEADLINE_SECONDS):
+            key = pending[fut]
+            try:
+                texts[key], sources[key] = fut.result()
+            except Exception:
+                logger.exception("Scrape failed for %s", keyed[key])
+    except FuturesTimeout:
+        late = [keyed[k] for f, k in pending.items() if not f.done()]
+        logger.warning("Scrape deadline passed; continuing without %s", ", ".join(late))
+    finally:
+        pool.shutdown(wait=False)
+    logger.info("Scraped context: %s", {keyed[k]: v for k, v in sources.items()})
+    return [(url, texts[key]) for key, url in keyed.items() if texts.get(key)]
+
+
+def plan_research(client, planner_model, problem, *, topic_count=5, ledger=None, on_planned=None):
+    """Plan the research topics. Needs only the problem, so the panel flow
+    runs it alongside the architect."""
     plan_prompt = render("panel/market_query_planner", topic_count=topic_count, problem=problem)
     plan = client.structured(
         planner_model,
@@ -69,11 +236,41 @@ def gather_market_intelligence(
     topics = plan.get("topics", [])[:topic_count]
     if on_planned:
         on_planned([{"title": t.get("title"), "channel": t.get("channel", "web"), "why": t.get("why")} for t in topics])
+    return topics
+
+
+def question_signature(question):
+    """Near-identical questions share a signature: the sorted set of their
+    stemmed content words."""
+    return hashlib.sha1(" ".join(sorted(set(features(question)))).encode()).hexdigest()
+
 
+def _cached_research(signature, channel, model, max_age_hours):
+    if not max_age_hours or max_age_hours <= 0:
+        return None
+    try:
+        return research_cache.get_research(signature, channel, model, max_age_hours * 3600)
+    except Exception:
+        logger.exception("Research cache unavailable")
+        return None
+
+
+def research_topics(
+    client, search_model, problem, topics, *,
+    enable_x=False, concurrency=4, max_age_hours=None, ledger=None, on_completed=None,
+):
+    """Research every topic. Questions answered by the same model on the same
+    channel within `max_age_hours` (default RESEARCH_CACHE_MAX_AGE_HOURS; 0
+    always researches afresh) are served from the cache; only the misses are
+    searched. Each brief carries its provenance."""
     x_capable = bool(get_catalog().capabilities(search_model).get("supportsXSearch"))
+    max_age_hours = Config.RESEARCH_CACHE_MAX_AGE_HOURS if max_age_hours is None else float(max_age_hours)
+
+    def channel_for(topic):
+        return "x" if enable_x and x_capable and topic.get("channel") == "x" else "web"
 
     def research(topic):
-        use_x = enable_x and x_capable and topic.get("channel") == "x"
+        use_x = channel_for(topic) == "x"
         prompt = render("panel/market_agent", problem=problem, question=topic["question"])
         result = client.chat_search(
             search_model,
@@ -90,17 +287,52 @@ def gather_market_intelligence(
                 citations.append(
                     {"index": i, "url": r.get("url", ""), "title": r.get("title", r.get("url", ""))}
                 )
+        channel = "x" if use_x else "web"
+        try:
+            research_cache.put_research(
+                question_signature(topic["question"]), channel, search_model, topic["question"],
+                result["content"], citations, Config.RESEARCH_CACHE_MAX_ENTRIES,
+            )
+        except Exception:
+            logger.exception("Could not cache research for topic %s", topic.get("title"))
         return {
             "topic": topic["title"],
             "question": topic["question"],
-            "channel": "x" if use_x else "web",
+            "channel": channel,
             "findings": result["content"],
             "citations": citations,
+            "provenance": {"source": "live"},
         }
 
-    briefs = []
-    with ThreadPoolExecutor(max_workers=concurrency) as pool:
-        futures = {pool.submit(research, t): t for t in topics}
+    briefs, misses = [], []
+    next_index = 1  # citations are numbered run-wide, in completion order
+    for topic in topics:
+        hit = _cached_research(question_signature(topic["question"]), channel_for(topic), search_model, max_age_hours)
+        if hit is None:
+            misses.append(topic)
+            continue
+        brief = {
+            "topic": topic["title"],
+            "question": topic["question"],
+            "channel": hit["channel"],
+            "findings": hit["findings"],
+            "citations": hit["citations"],
+            "provenance": {
+                "source": "cache",
+                "cachedQuestion": hit["question"],
+                "cachedAt": datetime.fromtimestamp(hit["created_at"], timezone.utc).isoformat(timespec="seconds"),
+                "ageHours": round((time.time() - hit["created_at"]) / 3600, 1),
+            },
+        }
+        next_index = _renumber(brief, next_index)
+        briefs.append(brief)
+        if on_completed:
+            on_completed(brief)
+    if misses:
+        logger.info("Market research: %d cached, %d to research", len(briefs), len(misses))
+
+    with get_scheduler().pool(model=search_model, label="market", max_workers=concurrency) as pool:
+        futures = {pool.submit(research, t): t for t in misses}
         for fut in as_completed(futures):
             topic = futures[fut]
             try:
@@ -113,16 +345,109 @@ def gather_market_intelligence(
                     "channel": topic.get("channel", "web"),
                     "findings": f"Research unavailable: {exc}",
                     "citations": [],
+                    "provenance": {"source": "failed"},
                 }
+            next_index = _renumber(brief, next_index)
             briefs.append(brief)
             if on_completed:
                 on_completed(brief)
     return briefs
 
 
-def digest(briefs, limit=600):
-    """Short digest of market briefs to prime the experts without blowing context."""
-    parts = []
-    for b in briefs:
-        parts.append(f"- {b['topic']}: {b['findings'][:limit]}")
-    return "\n".join(parts)
+def _renumber(brief, start):
+    """Give the brief's citations run-wide indices starting at `start` and
+    rewrite its ^n^ markers to match, so every marker in a run (findings,
+    routed passages, the synthesis) resolves to exactly one citation.
+    Markers naming no returned source are dropped. Returns the next index."""
+    mapping = {c["index"]: start + i for i, c in enumerate(brief["citations"])}
+
+    def remap(match):
+        numbers = [str(mapping[int(n)]) for n in re.split(r",\s*", match.group(1)) if int(n) in mapping]
+        return f"^{','.join(numbers)}^" if numbers else ""
+
+    brief["findings"] = _CITE_MARK.sub(remap, brief["findings"])
+    brief["citations"] = [{**c, "index": mapping[c["index"]]} for c in brief["citations"]]
+    return start + len(mapping)
+
+
+def persona_query(persona, problem, problem_weight=PROBLEM_WEIGHT):
+    """{term: weight} for what `persona` should read: their title, focus
+    areas and perspective, plus the problem at a lower weight (it is shared
+    by every expert, so persona terms decide)."""
+    weights = {term: problem_weight for term in features(problem)}
+    lens = " ".join([persona.get("title", ""), " ".join(persona.get("focus_areas") or []), persona.get("perspective", "")])
+    for term in features(lens):
+        weights[term] = 1.0
+    return weights
+
+
+def _passages(findings):
+    """Split findings into passages: bullets and paragraphs, short ones
+    merged up to PASSAGE_TOKENS, long ones split between sentences."""
+    blocks, current = [], []
+    for line in findings.splitlines():
+        if not line.strip() or _BULLET.match(line):
+            if current:
+                blocks.append(" ".join(current))
+            current = [line.strip()] if line.strip() else []
+        else:
+            current.append(line.strip())
+    if current:
+        blocks.append(" ".join(current))
+    passages, buffer = [], ""
+    for block in blocks:
+        pieces = [block] if estimate_tokens(block) <= PASSAGE_TOKENS else _SENTENCE_END.split(block)
+        for piece in pieces:
+            if buffer and estimate_tokens(buffer) + estimate_tokens(piece) > PASSAGE_TOKENS:
+                passages.append(buffer)
+                buffer = ""
+            buffer = f"{buffer}\n{piece}" if buffer else piece
+    if buffer:
+        passages.append(buffer)
+    return passages
+
+
+class BriefRouter:
+    """Routes market research to experts: the full briefs are split into
+    passages and indexed locally, and each expert gets the passages that
+    best match their focus, within MARKET_CONTEXT_TOKENS. Passages keep the
+    briefs' (run-wide) ^n^ citation markers."""
+
+    def __init__(self, briefs, budget=MARKET_CONTEXT_TOKENS):
+        self.budget = budget
+        self._passages = []  # (brief position, passage position, topic, text)
+        for b, brief in enumerate(briefs or []):
+            if not brief.get("citations") and brief.get("findings", "").startswith("Research unavailable"):
+                continue
+            for p, text in enumerate(_passages(brief.get("findings") or "")):
+                self._passages.append((b, p, brief.get("topic", ""), text))
+        self._index = BM25Index([f"{topic} {text}" for _, _, topic, text in self._passages])
+
+    def select(self, persona, problem):
+        """Passages for `persona`, best match first; when the lens matches
+        little, the leads of each brief fill the remaining budget."""
+        scores = self._index.scores(persona_query(persona, problem))
+        ranked = sorted((i for i, s in enumerate(scores) if s > 0), key=lambda i: -scores[i])
+        leads = [i for i, (_, p, _, _) in enumerate(self._passages) if p == 0]
+        chosen, remaining = [], self.budget
+        for i in dict.fromkeys(ranked + leads):
+            cost = estimate_tokens(self._passages[i][3])
+            if cost <= remaining:
+                chosen.append(i)
+                remaining -= cost
+        return [self._passages[i] for i in chosen]
+
+    def section(self, persona, problem):
+        chosen = sorted(self.select(persona, problem))
+        if not chosen:
+            return ""
+        parts, topic = [], None
+        for _, _, passage_topic, text in chosen:
+            if passage_topic != topic:
+                parts.append(f"### {passage_topic}")
+                topic = passage_topic
+            parts.append(text)
+        return (
+            "## Market intelligence (live research; the passages most relevant to your focus, "
+            "^n^ marks a cited source)\n" + "\n".join(parts)
+        )
@@ -1,9 +1,34 @@
-"""Stage 2: generate personas per discipline in parallel batches, then dedupe."""
+"""Stage 2: generate personas in parallel batches, then dedupe.
+
+Batches are planned, not one per discipline: plan_persona_calls splits
+large disciplines across parallel calls (the slowest batch bounds the
+stage) and bin-packs small ones into shared calls bounded by seat count and
+expected output tokens, so a blueprint of many 1-2 seat disciplines does
+not repeat the brief and casting rules a dozen times. Shared calls tag each
+persona with its discipline; a shared call that under-delivers is split
+into per-discipline calls for the short disciplines and retried once.
+
+Dedupe is by exact name/title key and by hashed TF-IDF cosine over each
+profile (title, background, focus areas, perspective), so a near-duplicate
+under a different name is dropped too. Seats left empty by dedupe or a
+short batch are refilled in one backfill call that lists the panel so far.
+
+Every generated persona is also filed in the persona library. With
+`panel.personaSource` set to "library" or "hybrid", seats are first filled
+from the library by discipline, industry and seniority match ("hybrid"
+takes at most half of each discipline's seats from it), and only the
+shortfall is generated.
+"""
 import logging
+import math
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, wait
 
+from ..db import persona_library
 from ..prompts.loader import render
+from .scheduler import get_scheduler
+from .textsim import VectorIndex, jaccard, shingles, tokens
 
 logger = logging.getLogger(__name__)
 
@@ -30,37 +55,189 @@ PERSONA_BATCH_SCHEMA = {
     "additionalProperties": False,
 }
 
+# Shared calls (several disciplines) and the backfill tag each persona
+PERSONA_GROUP_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "personas": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    **PERSONA_BATCH_SCHEMA["properties"]["personas"]["items"]["properties"],
+                    "discipline": {"type": "string"},
+                },
+                "required": ["name", "title", "background", "focus_areas", "perspective", "discipline"],
+                "additionalProperties": False,
+            },
+        }
+    },
+    "required": ["personas"],
+    "additionalProperties": False,
+}
+
+PERSONA_BACKFILL_SCHEMA = PERSONA_GROUP_SCHEMA
+
+PERSONA_DUPLICATE_SIMILARITY = 0.6  # profile cosine at which two personas count as one
+
 
 def _norm_key(persona):
     return re.sub(r"[^a-z0-9]+", "", (persona.get("title", "") + persona.get("name", "")).lower())
 
 
+_SENIORITY = (
+    ("executive", re.compile(r"\b(chief|c[a-z]o|president|founder|partner|vp|vice president|head|director|board)\b")),
+    ("senior", re.compile(r"\b(senior|sr|principal|lead|staff|veteran)\b")),
+    ("junior", re.compile(r"\b(junior|jr|associate|assistant|graduate|intern|early.career)\b")),
+)
+LIBRARY_SIMILARITY = 0.5  # max title/perspective shingle overlap between two library seats
+
+# Persona call planning
+MAX_SEATS_PER_CALL = 8
+SPLIT_SEATS = 5  # disciplines larger than this are split across parallel calls
+MAX_DISCIPLINES_PER_CALL = 4
+PERSONA_OUTPUT_TOKENS = 250  # expected JSON per persona
+MAX_CALL_OUTPUT_TOKENS = 3000  # half the default completion budget, leaving room for reasoning
+
+
+def _profile(persona):
+    return " ".join(
+        [persona.get("title", ""), persona.get("background", ""), persona.get("perspective", "")]
+        + list(persona.get("focus_areas") or [])
+    )
+
+
+def _label(text):
+    return " ".join(tokens(text))
+
+
+def _seniority(text, default=None):
+    text = (text or "").lower()
+    return next((level for level, pattern in _SENIORITY if pattern.search(text)), default)
+
+
+def _library_row(persona, disc):
+    return {
+        "signature": _norm_key(persona),
+        "discipline": _label(disc["name"]),
+        "seniority": _seniority(persona.get("title"), "mid"),
+        "industries": sorted({_label(i) for i in disc.get("industries") or [] if _label(i)}),
+        "persona": persona,
+    }
+
+
+def _from_library(disc, seats, seen):
+    """Up to `seats` library personas for a discipline, skipping ones already
+    on the panel or too close to one already picked; without a seniority
+    preference no level takes more than half the seats."""
+    if seats <= 0:
+        return []
+    wanted = _seniority(disc.get("seniorityMix"))
+    per_level = seats if wanted else max(1, math.ceil(seats / 2))
+    candidates = persona_library.find_personas(
+        _label(disc["name"]),
+        sorted({_label(i) for i in disc.get("industries") or [] if _label(i)}),
+        wanted,
+        limit=seats * 4 + 8,
+    )
+    picked, ids, levels, texts = [], [], {}, []
+    for cand in candidates:
+        persona = dict(cand["persona"], discipline=disc["name"])
+        if cand["signature"] in seen or levels.get(cand["seniority"], 0) >= per_level:
+            continue
+        text = shingles(f"{persona.get('title', '')} {persona.get('perspective', '')}")
+        if any(jaccard(text, other) >= LIBRARY_SIMILARITY for other in texts):
+            continue
+        picked.append(persona)
+        ids.append(cand["id"])
+        texts.append(text)
+        levels[cand["seniority"]] = levels.get(cand["seniority"], 0) + 1
+        if len(picked) == seats:
+            break
+    persona_library.mark_used(ids)
+    return picked
+
+
+def plan_persona_calls(requests, max_seats=MAX_SEATS_PER_CALL, max_tokens=MAX_CALL_OUTPUT_TOKENS):
+    """Group seat requests ({disc, count, seated, note}) into calls.
+
+    A request above SPLIT_SEATS is split into near-equal pieces (its note
+    stays with the first). Pieces are then packed first-fit decreasing into
+    calls holding at most `max_seats` seats, `max_tokens` of expected output
+    and MAX_DISCIPLINES_PER_CALL disciplines, never two pieces of one
+    discipline. Returns a list of calls, each a list of requests."""
+    limit = max(1, min(max_seats, max_tokens // PERSONA_OUTPUT_TOKENS))
+    pieces = []
+    for req in requests:
+        parts = math.ceil(req["count"] / min(SPLIT_SEATS, limit))
+        for n in range(parts):
+            count = req["count"] // parts + (1 if n < req["count"] % parts else 0)
+            pieces.append({**req, "count": count, "note": req["note"] if n == 0 else ""})
+    calls = []
+    for piece in sorted(pieces, key=lambda r: -r["count"]):
+        for call in calls:
+            if (
+                sum(r["count"] for r in call) + piece["count"] <= limit
+                and len(call) < MAX_DISCIPLINES_PER_CALL
+                and all(r["disc"]["name"] != piece["disc"]["name"] for r in call)
+            ):
+                call.append(piece)
+                break
+        else:
+            calls.append([piece])
+    return calls
+
+
+def _place(personas, requests):
+    """Assign tagged personas to requests by discipline: [(disc, personas)].
+    A persona whose discipline matches no open request goes to the first
+    request still short; extras beyond every request are dropped."""
+    open_seats = {_label(r["disc"]["name"]): [r["disc"], r["count"]] for r in requests}
+    placed = {}
+    for p in personas:
+        slot = open_seats.get(_label(p.pop("discipline", "")))
+        if not slot or not slot[1]:
+            slot = next((s for s in open_seats.values() if s[1]), None)
+        if slot is None:
+            break
+        p["discipline"] = slot[0]["name"]
+        slot[1] -= 1
+        placed.setdefault(slot[0]["name"], (slot[0], []))[1].append(p)
+    return list(placed.values())
+
+
 def generate_personas(client, model, problem, blueprint, guardrails, concurrency, ledger, on_persona=None):
     disciplines = blueprint["disciplines"]
     contrarians = blueprint.get("mandatedContrarians", [])
     all_names = [d["name"] for d in disciplines]
-    pinned = list((guardrails or {}).get("pinnedExperts") or [])
+    source = (guardrails or {}).get("personaSource") or "generate"
 
-    def build_batch(idx, disc):
-        contrarian_note = ""
+    def casting_note(idx, disc):
+        """Contrarian seats ride on the first discipline (the architect's
+        post-processor sizes it for them); pinned expert types have their
+        own disciplines."""
+        note = ""
         if idx == 0 and contrarians:
             stances = "; ".join(c["stance"] for c in contrarians)
-            contrarian_note = (
-                f"- This discipline must also include the panel's contrarian seats with these "
-                f"stances: {stances}"
-            )
-        pinned_note = ""
-        if idx == 0 and pinned:
-            pinned_note = f" The client requires these exact expert types as seats: {', '.join(pinned)}."
+            note += f"- This discipline must also include the panel's contrarian seats with these stances: {stances}\n"
+        if disc.get("pinned"):
+            note += f"- The client requires this exact expert type: cast {disc['name']} as named\n"
+        return note
+
+    def build_batch(req):
+        disc = req["disc"]
+        extra = ""
+        if req["seated"]:
+            extra = f" Already seated in this discipline (cast different people): {'; '.join(req['seated'])}."
         prompt = render(
             "panel/persona_batch",
-            count=disc["count"],
+            count=req["count"],
             discipline=disc["name"],
             problem=problem,
-            rationale=disc["rationale"] + pinned_note,
+            rationale=disc["rationale"] + extra,
             industries=", ".join(disc.get("industries") or []) or "any relevant",
             seniority_mix=disc.get("seniorityMix", "mixed"),
-            contrarian_note=contrarian_note,
+            contrarian_note=req["note"].rstrip(),
             other_disciplines=", ".join(n for n in all_names if n != disc["name"]),
         )
         batch = client.structured(
@@ -71,32 +248,154 @@ def generate_personas(client, model, problem, blueprint, guardrails, concurrency
             ledger=ledger,
             stage="personas",
         )
-        personas = batch.get("personas", [])[: disc["count"]]
+        personas = batch.get("personas", [])[: req["count"]]
         for p in personas:
             p["discipline"] = disc["name"]
-        return personas
+        return [(disc, personas)] if personas else []
 
-    results = []
-    with ThreadPoolExecutor(max_workers=concurrency) as pool:
-        futures = {pool.submit(build_batch, i, d): d for i, d in enumerate(disciplines)}
-        for fut in as_completed(futures):
-            disc = futures[fut]
-            try:
-                batch = fut.result()
-            except Exception:
-                logger.exception("Persona batch failed for discipline %s", disc["name"])
-                batch = []
-            results.extend(batch)
-            if on_persona:
-                for p in batch:
-                    on_persona(p)
+    def build_group(call):
+        blocks = []
+        for req in call:
+            disc = req["disc"]
+            seated = f"- Already seated (cast different people): {'; '.join(req['seated'])}\n" if req["seated"] else ""
+            blocks.append(
+                f"### {disc['name']} — {req['count']} persona{'s' if req['count'] > 1 else ''}\n"
+                f"- Rationale: {disc['rationale']}\n"
+                f"- Relevant industries: {', '.join(disc.get('industries') or []) or 'any relevant'}\n"
+                f"- Seniority mix requested: {disc.get('seniorityMix', 'mixed')}\n"
+                f"{req['note']}{seated}"
+            )
+        names = {req["disc"]["name"] for req in call}
+        prompt = render(
+            "panel/persona_group",
+            count=sum(req["count"] for req in call),
+            problem=problem,
+            seats_block="\n".join(blocks),
+            other_disciplines=", ".join(n for n in all_names if n not in names) or "none",
+        )
+        batch = client.structured(
+            model,
+            [{"role": "user", "content": prompt}],
+            "PersonaGroup",
+            PERSONA_GROUP_SCHEMA,
+            max_completion_tokens=max(6000, 2 * PERSONA_OUTPUT_TOKENS * sum(req["count"] for req in call)),
+            ledger=ledger,
+            stage="personas",
+        )
+        return _place(batch.get("personas", []), call)
+
+    def run_call(call):
+        return build_batch(call[0]) if len(call) == 1 else build_group(call)
 
+    # Dedupe as batches land so on_persona only ever sees panel members —
+    # downstream stages start work per persona as soon as it is reported.
     seen, deduped = set(), []
-    for p in results:
+    profiles, filled = VectorIndex(), Counter()
+
+    def seat(p):
         key = _norm_key(p)
         if key in seen:
             logger.info("Dropping duplicate persona %s", p.get("name"))
-            continue
+            return False
+        row, similarity = profiles.nearest(_profile(p))
+        if similarity >= PERSONA_DUPLICATE_SIMILARITY:
+            logger.info(
+                "Dropping persona %s: near-duplicate of %s (%.2f)", p.get("name"), deduped[row].get("name"), similarity
+            )
+            return False
         seen.add(key)
+        profiles.add(_profile(p))
+        filled[p["discipline"]] += 1
         deduped.append(p)
+        if on_persona:
+            on_persona(p)
+        return True
+
+    # Library seats go out first (a few indexed queries); seats carrying
+    # contrarian or pinned requirements are always written fresh.
+    shortfall = []
+    for idx, disc in enumerate(disciplines):
+        seated = []
+        if source in ("library", "hybrid") and not (idx == 0 and contrarians) and not disc.get("pinned"):
+            seats = disc["count"] if source == "library" else disc["count"] // 2
+            try:
+                seated = [p for p in _from_library(disc, seats, seen) if seat(p)]
+            except Exception:
+                logger.exception("Persona library lookup failed for discipline %s", disc["name"])
+        if len(seated) < disc["count"]:
+            shortfall.append({
+                "disc": disc,
+                "count": disc["count"] - len(seated),
+                "seated": [p.get("title", "") for p in seated],
+                "note": casting_note(idx, disc),
+            })
+    if source != "generate":
+        logger.info("Seated %d of %d personas from the library", len(deduped), sum(d["count"] for d in disciplines))
+
+    calls = plan_persona_calls(shortfall)
+    logger.info("Casting %d seats across %d disciplines in %d calls",
+                sum(r["count"] for r in shortfall), len(shortfall), len(calls))
+    with get_scheduler().pool(model=model, label="personas", max_workers=concurrency) as pool:
+        pending = {pool.submit(run_call, call): (call, False) for call in calls}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                call, retried = pending.pop(fut)
+                try:
+                    placed = fut.result()
+                except Exception:
+                    logger.exception("Persona call failed for %s", ", ".join(r["disc"]["name"] for r in call))
+                    placed = []
+                delivered = Counter()
+                for disc, personas in placed:
+                    delivered[disc["name"]] += len(personas)
+                    _file(disc, [p for p in personas if seat(p)])
+                # A shared call that came back short is split: each short
+                # discipline gets its own call, once
+                if len(call) > 1 and not retried:
+                    for req in call:
+                        short = req["count"] - delivered[req["disc"]["name"]]
+                        if short > 0:
+                            retry = [{**req, "count": short}]
+                            pending[pool.submit(run_call, retry)] = (retry, True)
+
+        missing = [(d, d["count"] - filled[d["name"]]) for d in disciplines if filled[d["name"]] < d["count"]]
+        if missing:
+            try:
+                batch = pool.submit(_backfill, client, model, problem, missing, deduped, ledger).result()
+            except Exception:
+                logger.exception("Persona backfill failed; panel is %d short", sum(n for _, n in missing))
+                batch = []
+            for disc, personas in batch:
+                _file(disc, [p for p in personas if seat(p)])
     return deduped
+
+
+def _file(disc, personas):
+    try:
+        persona_library.save_personas([_library_row(p, disc) for p in personas])
+    except Exception:
+        logger.exception("Could not file personas for %s in the library", disc["name"])
+
+
+def _backfill(client, model, problem, missing, panel, ledger):
+    """One call for every empty seat: returns [(discipline, personas)]. A
+    persona whose discipline does not match a short one goes to the first
+    discipline still short."""
+    seats = "\n".join(
+        f"- {n} × {d['name']} (industries: {', '.join(d.get('industries') or []) or 'any relevant'}; "
+        f"seniority: {d.get('seniorityMix', 'mixed')})"
+        for d, n in missing
+    )
+    existing = "\n".join(f"- {p.get('title', '')} — {p.get('perspective', '')} ({p['discipline']})" for p in panel)
+    batch = client.structured(
+        model,
+        [{"role": "user", "content": render(
+            "panel/persona_backfill", problem=problem, seats=seats, existing=existing or "(no one yet)"
+        )}],
+        "PersonaBackfill",
+        PERSONA_BACKFILL_SCHEMA,
+        ledger=ledger,
+        stage="personas",
+    )
+    return _place(batch.get("personas", []), [{"disc": d, "count": n} for d, n in missing])
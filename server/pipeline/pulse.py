@@ -0,0 +1,215 @@
+"""Online Quick Pulse aggregation.
+
+PulseAggregator is fed each expert answer as it lands. Stance, confidence and
+discipline code live in preallocated NumPy arrays (amortised O(1) appends), with
+running counts kept alongside, so adding an answer costs microseconds even
+on 1,000+ seat panels. snapshot() derives the published aggregates:
+
+- mean stance, confidence-weighted mean, distribution, support/oppose %;
+- percentile bootstrap CIs for the mean and the support/oppose shares
+  (stances take five values, so a resample is one multinomial draw over the
+  stance counts — O(samples) rather than O(samples × answers));
+- per-discipline means with their own bootstrap CIs;
+- top concerns, near-duplicates merged by word shingling (textsim).
+
+Bootstrap draws use a seed derived from the answer count, so a snapshot of
+the same answers is reproducible.
+
+AdaptiveSampler drives opt-in sequential early stopping: seats are issued
+round-robin across disciplines, a few at a time, and no new seats are issued
+once the mean-stance CI is narrower than the requested tolerance.
+"""
+import threading
+from collections import deque
+
+import numpy as np
+
+from .textsim import NearDuplicateIndex
+
+BOOTSTRAP_SAMPLES = 400
+CI_LEVEL = 0.95
+_STANCES = np.arange(1, 6, dtype=np.float64)
+
+
+def _bootstrap(counts, rng, samples=BOOTSTRAP_SAMPLES):
+    """Percentile CIs for (mean, support %, oppose %) given stance counts
+    (length-5 vector for stances 1..5)."""
+    n = int(counts.sum())
+    draws = rng.multinomial(n, counts / n, size=samples)  # (samples, 5)
+    tail = 100 * (1 - CI_LEVEL) / 2
+    qs = (tail, 100 - tail)
+    means = np.percentile(draws @ _STANCES / n, qs)
+    support = np.percentile(draws[:, 3:].sum(axis=1) * 100.0 / n, qs)
+    oppose = np.percentile(draws[:, :2].sum(axis=1) * 100.0 / n, qs)
+    return means, support, oppose
+
+
+def _clamp(value, default):
+    try:
+        return min(5, max(1, int(value)))
+    except (TypeError, ValueError):
+        return default
+
+
+class PulseAggregator:
+    def __init__(self, capacity=128, seed=17):
+        self._lock = threading.Lock()
+        self._stance = np.zeros(capacity, dtype=np.int8)
+        self._confidence = np.zeros(capacity, dtype=np.int8)
+        self._discipline = np.zeros(capacity, dtype=np.int16)
+        self._n = 0
+        self._codes = {}  # discipline name -> code
+        self._counts = np.zeros((8, 5), dtype=np.int64)  # [discipline code, stance - 1]
+        self._weighted_sum = 0
+        self._weight_total = 0
+        self._concerns = NearDuplicateIndex(threshold=0.5)
+        self._seed = seed
+
+    @property
+    def count(self):
+        return self._n
+
+    def add(self, entry):
+        """Fold one insight entry in and return the count including it, taken
+        under the lock; entries without a stance are ignored (returns 0)."""
+        if "stance" not in entry:
+            return 0
+        stance = _clamp(entry["stance"], 3)
+        confidence = _clamp(entry.get("confidence"), 3)
+        discipline = (entry.get("persona") or {}).get("discipline") or "Other"
+        with self._lock:
+            if self._n == len(self._stance):
+                size = 2 * len(self._stance)
+                self._stance = np.resize(self._stance, size)
+                self._confidence = np.resize(self._confidence, size)
+                self._discipline = np.resize(self._discipline, size)
+            code = self._codes.setdefault(discipline, len(self._codes))
+            if code == len(self._counts):
+                self._counts = np.vstack([self._counts, np.zeros_like(self._counts)])
+            i = self._n
+            self._stance[i] = stance
+            self._confidence[i] = confidence
+            self._discipline[i] = code
+            self._n = i + 1
+            self._counts[code, stance - 1] += 1
+            self._weighted_sum += stance * confidence
+            self._weight_total += confidence
+            self._concerns.add(entry.get("top_concern") or "")
+            return self._n
+
+    def ci_halfwidth(self):
+        """Half-width of the mean-stance CI (stance points); None before two
+        answers are in."""
+        with self._lock:
+            n = self._n
+            counts = self._counts[: len(self._codes)].sum(axis=0)
+        if n < 2:
+            return None
+        means, _, _ = _bootstrap(counts, np.random.default_rng(self._seed + n))
+        return float(means[1] - means[0]) / 2
+
+    def snapshot(self, top_concerns=20):
+        with self._lock:
+            n = self._n
+            if not n:
+                return {"count": 0}
+            stance = self._stance[:n].astype(np.float64)
+            by_code = self._counts[: len(self._codes)].copy()
+            codes = dict(self._codes)
+            weighted_mean = self._weighted_sum / self._weight_total
+            concerns = self._concerns.top(top_concerns)
+
+        rng = np.random.default_rng(self._seed + n)
+        counts = by_code.sum(axis=0)
+        mean_ci, support_ci, oppose_ci = _bootstrap(counts, rng)
+        by_discipline, by_discipline_ci = {}, {}
+        for name, code in sorted(codes.items()):
+            d_counts = by_code[code]
+            d_n = int(d_counts.sum())
+            d_mean_ci, _, _ = _bootstrap(d_counts, rng)
+            by_discipline[name] = round(float(d_counts @ _STANCES / d_n), 2)
+            by_discipline_ci[name] = {
+                "n": d_n,
+                "mean": by_discipline[name],
+                "ci": [round(float(d_mean_ci[0]), 2), round(float(d_mean_ci[1]), 2)],
+            }
+        return {
+            "count": n,
+            "mean_stance": round(float(stance.mean()), 2),
+            "mean_stance_ci": [round(float(mean_ci[0]), 2), round(float(mean_ci[1]), 2)],
+            "weighted_mean_stance": round(float(weighted_mean), 2),
+            "distribution": {str(v): int(counts[v - 1]) for v in range(1, 6)},
+            "support_pct": round(100.0 * float(counts[3:].sum()) / n, 1),
+            "support_pct_ci": [round(float(support_ci[0]), 1), round(float(support_ci[1]), 1)],
+            "oppose_pct": round(100.0 * float(counts[:2].sum()) / n, 1),
+            "oppose_pct_ci": [round(float(oppose_ci[0]), 1), round(float(oppose_ci[1]), 1)],
+            "by_discipline": by_discipline,
+            "by_discipline_ci": by_discipline_ci,
+            "top_concerns": [c["text"] for c in concerns],
+            "concern_counts": concerns,
+            "ci_level": CI_LEVEL,
+        }
+
+
+class AdaptiveSampler:
+    """Seat order and stopping rule for adaptive pulses.
+
+    offer() queues a persona under its discipline; finished() records that an
+    issued seat is done. Both return (seats, stopped_now): the (index,
+    persona) seats to start now — at most `window` in flight, taken
+    round-robin across disciplines so an early stop still covers the whole
+    cast — and whether this call stopped issuing. Issuing stops for good
+    once at least `min_seats` answers are in and the CI half-width is within
+    `tolerance`, or `max_seats` seats have been issued while more are
+    queued. Seats still queued at that point are never asked."""
+
+    def __init__(self, aggregator, tolerance, min_seats, max_seats, window):
+        self.aggregator = aggregator
+        self.tolerance = float(tolerance)
+        self.min_seats = max(2, int(min_seats))
+        self.max_seats = max(1, int(max_seats))
+        self.window = max(1, int(window))
+        self.issued = 0
+        self.asked = set()  # indices of the issued seats
+        self.stopped = None  # "converged" | "max_seats" once issuing has stopped
+        self.ci_halfwidth = None
+        self._lock = threading.Lock()
+        self._queues = {}  # discipline -> deque of (index, persona)
+        self._turn = 0
+        self._in_flight = 0
+
+    def offer(self, index, persona):
+        discipline = persona.get("discipline") or "Other"
+        with self._lock:
+            before = self.stopped
+            self._queues.setdefault(discipline, deque()).append((index, persona))
+            return self._take_locked(), before is None and self.stopped is not None
+
+    def finished(self):
+        with self._lock:
+            before = self.stopped
+            self._in_flight -= 1
+            if before is None and self.aggregator.count >= self.min_seats:
+                self.ci_halfwidth = self.aggregator.ci_halfwidth()
+                if self.ci_halfwidth is not None and self.ci_halfwidth <= self.tolerance:
+                    self.stopped = "converged"
+            return self._take_locked(), before is None and self.stopped is not None
+
+    def _take_locked(self):
+        out = []
+        while self.stopped is None and self._in_flight < self.window:
+            ready = [d for d, q in self._queues.items() if q]
+            if not ready:
+                break
+            if self.issued >= self.max_seats:
+                # Only a cap that leaves seats unasked is a stop
+                self.stopped = "max_seats"
+                break
+            discipline = ready[self._turn % len(ready)]
+            self._turn += 1
+            seat = self._queues[discipline].popleft()
+            out.append(seat)
+            self.asked.add(seat[0])
+            self._in_flight += 1
+            self.issued += 1
+        return out
@@ -1,30 +1,130 @@
 """EngagementRunner: executes a mode's flow on a background thread, emitting
 SSE events and persisting the result as an engagement revision."""
 import logging
+import math
 import threading
+import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from ..config import Config
 from ..db import engagements as store
+from ..db import runs as run_store
 from ..modes import get_mode
 from ..prompts.loader import render
+from ..prompts.packing import Section, render_packed
 from ..venice.client import get_client
+from ..venice.errors import CallCancelled
 from ..venice.models import get_catalog
 from ..venice.usage import UsageLedger
-from . import architect, insights, market_intel, synthesis
+from . import architect, debate, documents, insights, market_intel, synthesis
+from .admission import ADMISSION
+from .dag import TaskGraph
 from .estimate import estimate_run
-from .events import REGISTRY
+from .events import REGISTRY, Continuation
+from .pulse import AdaptiveSampler, PulseAggregator
+from .themes import ThemeBuilder
+from .scheduler import current_lane, get_scheduler
+from .timers import TIMERS
 
 logger = logging.getLogger(__name__)
 
+# Parked runs resume here when their answers (or timeout) arrive
+_RESUME_POOL = ThreadPoolExecutor(max_workers=Config.RESUME_WORKERS, thread_name_prefix="resume")
+
 
 class CostCircuitBreaker(Exception):
     pass
 
 
 def start_run(payload):
-    """Validate, create engagement + run, and launch the worker thread.
-    Returns (run, engagement_id, estimate)."""
+    """Validate, create engagement + run, and launch the worker thread (or
+    queue it behind admission control). Returns (run, engagement_id,
+    estimate); raises QueueFullError when the run queue is full."""
+    mode, problem, panel_size, est = _prepare(payload)
+    docs = _document_inputs(payload)
+
+    ADMISSION.reserve()
+    engagement_id = payload.get("engagementId")
+    previous_status = created = None
+    try:
+        title = problem[:80] + ("…" if len(problem) > 80 else "")
+        if engagement_id:
+            existing = store.get_engagement(engagement_id)
+            if not existing:
+                raise ValueError(f"Engagement {engagement_id} not found")
+            previous_status = existing.get("status")
+            store.set_status(engagement_id, "running")
+        else:
+            engagement_id = created = store.create_engagement(mode.id, title)
+        _ingest_documents(engagement_id, payload, docs)
+        run = REGISTRY.create(mode.id, engagement_id)
+    except Exception:
+        ADMISSION.release_reservation()
+        # Leave no half-started engagement behind
+        try:
+            if created:
+                store.delete_engagement(created)
+            elif previous_status:
+                store.set_status(engagement_id, previous_status)
+        except Exception:
+            logger.exception("Failed to roll back engagement %s", engagement_id)
+        raise
+
+    ADMISSION.submit(run, _launcher(run, mode, payload, problem, panel_size, est), mode.priority, payload)
+    return run, engagement_id, est
+
+
+def _document_inputs(payload):
+    """`input.documents` ([{name, content, format}]) checked up front, before
+    anything is created: [(name, content, format)]."""
+    docs = (payload.get("input") or {}).get("documents") or []
+    checked = []
+    for doc in docs:
+        if not isinstance(doc, dict) or not doc.get("content"):
+            raise ValueError("Each document needs a name and content")
+        name = str(doc.get("name") or f"Document {len(checked) + 1}")
+        fmt = doc.get("format") or "text"
+        if fmt not in documents.FORMATS:
+            raise ValueError(f"Unsupported document format {fmt!r} (expected one of {', '.join(documents.FORMATS)})")
+        if len(str(doc["content"])) > documents.MAX_DOCUMENT_CHARS:
+            raise ValueError(f"Document {name!r} exceeds {documents.MAX_DOCUMENT_CHARS} characters")
+        checked.append((name, str(doc["content"]), fmt))
+    return checked
+
+
+def _ingest_documents(engagement_id, payload, docs):
+    """Index the checked documents into the engagement's document store and
+    keep only their names in the payload, which is persisted with queued
+    runs and revisions."""
+    if not docs:
+        return
+    for name, content, fmt in docs:
+        documents.ingest(engagement_id, name, content, fmt=fmt)
+    inputs = payload.get("input") or {}
+    payload["input"] = {**inputs, "documents": [{"name": name} for name, _, _ in docs]}
+
+
+def restore_queued_runs():
+    """Re-admit runs that were waiting in the durable queue at shutdown,
+    keeping their run ids so polling clients pick them back up."""
+    for row in run_store.list_queued_runs():
+        try:
+            mode, problem, panel_size, est = _prepare(row["payload"])
+        except Exception as exc:
+            logger.warning("Dropping queued run %s: %s", row["run_id"], exc)
+            run_store.dequeue_run(row["run_id"])
+            store.set_status(row["engagement_id"], "failed")
+            continue
+        run = REGISTRY.create(mode.id, row["engagement_id"], run_id=row["run_id"])
+        ADMISSION.reserve_restored()
+        ADMISSION.submit(
+            run, _launcher(run, mode, row["payload"], problem, panel_size, est), mode.priority, row["payload"],
+            persist=False,
+        )
+        logger.info("Restored queued run %s", run.id)
+
+
+def _prepare(payload):
     mode = get_mode(payload.get("mode", "deep_dive"))
     if not mode.available:
         raise ValueError(f"Mode {mode.id} is not available yet")
@@ -33,46 +133,89 @@ def start_run(payload):
     if not problem:
         raise ValueError("input.problem is required")
 
+    search = payload.get("search") or {}
+    if search.get("maxAgeHours") is not None:
+        try:
+            max_age = float(search["maxAgeHours"])
+        except (TypeError, ValueError):
+            max_age = None
+        if max_age is None or not math.isfinite(max_age) or max_age < 0:
+            raise ValueError("search.maxAgeHours must be a non-negative number of hours")
+        payload["search"] = {**search, "maxAgeHours": max_age}
+
     panel_size = int((payload.get("panel") or {}).get("size") or mode.default_panel_size)
     panel_size = max(3, min(panel_size, mode.max_panel_size, Config.MAX_PANEL_SIZE))
 
     est = estimate_run(mode.id, panel_size, payload.get("models") or {})
+    return mode, problem, panel_size, est
 
-    engagement_id = payload.get("engagementId")
-    title = problem[:80] + ("…" if len(problem) > 80 else "")
-    if engagement_id:
-        existing = store.get_engagement(engagement_id)
-        if not existing:
-            raise ValueError(f"Engagement {engagement_id} not found")
-        store.set_status(engagement_id, "running")
-    else:
-        engagement_id = store.create_engagement(mode.id, title)
-
-    run = REGISTRY.create(mode.id, engagement_id)
-    thread = threading.Thread(
-        target=_execute,
-        args=(run, mode, payload, problem, panel_size, est),
-        daemon=True,
-        name=f"run-{run.id}",
-    )
-    thread.start()
-    return run, engagement_id, est
+
+def _launcher(run, mode, payload, problem, panel_size, est):
+    def launch():
+        thread = threading.Thread(
+            target=_execute,
+            args=(run, mode, payload, problem, panel_size, est),
+            daemon=True,
+            name=f"run-{run.id}",
+        )
+        thread.start()
+
+    return launch
+
+
+def cancel_run(run):
+    """Request cancellation. Setting the token aborts the run's in-flight
+    Venice calls and drops its queued scheduler tasks; a run still waiting
+    for admission ends at once."""
+    run.cancel_requested.set()
+    if run.status == "waiting_input" and _cancel_parked(run):
+        return
+    if ADMISSION.cancel(run):
+        # A resumed run waiting for its slot still holds its draft's spend
+        if _cancel_parked(run):
+            return
+        run.status = "cancelled"
+        store.set_status(run.engagement_id, "cancelled")
+        run.emit("run.cancelled", {"engagementId": run.engagement_id, "stages": ["queue"], "usage": None})
+        store.save_run_events(run.id, run.events)
 
 
 def _execute(run, mode, payload, problem, panel_size, est):
-    client = get_client()
+    started = time.monotonic()
+    run.cancel_requested.add_callback(lambda: get_scheduler().cancel_lane(run.id))
+    try:
+        # Every fan-out of this run is scheduled on the run's lane
+        with get_scheduler().lane(run.id, priority=mode.priority):
+            _run_engagement(run, mode, payload, problem, panel_size, est)
+    finally:
+        ADMISSION.finished(run)
+        if run.status == "completed":
+            try:
+                run_store.record_stage_timings(
+                    mode.id, dict(run.stage_durations, run=time.monotonic() - started)
+                )
+            except Exception:
+                logger.exception("Failed to record stage timings for %s", run.id)
+
+
+def _run_engagement(run, mode, payload, problem, panel_size, est):
+    client = get_client().with_cancel(run.cancel_requested)
     catalog = get_catalog()
     ledger = UsageLedger(pricing_lookup=catalog.pricing)
+
     budget_limit = max(est["totalCostUsd"], 0.05) * Config.COST_CIRCUIT_BREAKER_MULTIPLIER
 
     def check_budget():
+        # Stage boundaries are also where a cancel request is honoured
+        if run.cancel_requested.is_set():
+            raise CallCancelled("Run cancelled")
         if ledger.total_cost_usd > budget_limit:
             raise CostCircuitBreaker(
                 f"Run spend ${ledger.total_cost_usd:.2f} exceeded {Config.COST_CIRCUIT_BREAKER_MULTIPLIER}x "
                 f"the ${est['totalCostUsd']:.2f} estimate; aborting."
             )
 
-    try:
+    def produce():
         models = {
             "architect": catalog.resolve_role("architect", (payload.get("models") or {}).get("architect")),
             "persona_writer": catalog.resolve_role("persona_writer", (payload.get("models") or {}).get("persona_writer")),
@@ -87,11 +230,22 @@ def _execute(run, mode, payload, problem, panel_size, est):
         if mode.flow == "workchart":
             from ..workchart.service import run_workchart
 
-            result = run_workchart(run, client, payload, ledger)
-        elif mode.flow == "board":
-            result = _board_flow(run, client, mode, models, payload, problem, panel_size, ledger, check_budget)
-        else:
-            result = _panel_flow(run, client, mode, models, payload, problem, panel_size, ledger, check_budget)
+            return run_workchart(run, client, payload, ledger)
+        if mode.flow == "board":
+            return _board_flow(run, client, mode, models, payload, problem, panel_size, ledger, check_budget)
+        return _panel_flow(run, client, mode, models, payload, problem, panel_size, ledger, check_budget)
+
+    _conclude(run, payload, ledger, produce)
+
+
+def _conclude(run, payload, ledger, produce):
+    """Run a flow body and settle the run: save a revision on success, park
+    it on a Continuation, or mark it failed / cancelled."""
+    try:
+        result = produce()
+        if isinstance(result, Continuation):
+            _park(run, payload, ledger, result)
+            return
 
         usage = ledger.totals()
         rev = store.add_revision(
@@ -105,8 +259,19 @@ def _execute(run, mode, payload, problem, panel_size, est):
         store.set_status(run.engagement_id, "completed")
         run.result = result
         run.status = "completed"
-        run.emit("run.completed", {"engagementId": run.engagement_id, "revision": rev, "usage": usage})
+        run.emit(
+            "run.completed",
+            {
+                "engagementId": run.engagement_id,
+                "revision": rev,
+                "usage": usage,
+                "scheduler": get_scheduler().lane_stats(run.id),
+            },
+        )
     except Exception as exc:
+        if run.cancel_requested.is_set():
+            _finish_cancelled(run, ledger)
+            return
         logger.exception("Run %s failed", run.id)
         run.status = "failed"
         run.error = str(exc)
@@ -119,8 +284,118 @@ def _execute(run, mode, payload, problem, panel_size, est):
             logger.exception("Failed to flush run events for %s", run.id)
 
 
+# ------------------------------------------------------------- parked runs
+def _park(run, payload, ledger, continuation):
+    """Persist a run that is waiting for user input and release its thread
+    and admission slot. resume_run() re-admits it and picks it up on a pool
+    worker; the timer wheel enforces the answer timeout (resuming with no
+    answers)."""
+    deadline = time.time() + Config.RUN_ANSWER_TIMEOUT_SECONDS
+    state = {"payload": payload, "ledger": ledger.snapshot(), "flow": continuation.state}
+    run_store.save_continuation(run.id, run.engagement_id, run.mode, state, deadline)
+    run.status = "waiting_input"
+    TIMERS.schedule(run.id, Config.RUN_ANSWER_TIMEOUT_SECONDS, lambda: resume_run(run, None))
+    logger.info("Run %s parked awaiting answers", run.id)
+    if run.cancel_requested.is_set():
+        _cancel_parked(run)  # cancelled while parking
+
+
+def resume_run(run, answers):
+    """Resume a parked run with the user's answers (None on timeout).
+    Returns False if the run is not parked (already resumed or finished)."""
+    if not run_store.claim_continuation(run.id, answers):
+        return False
+    TIMERS.cancel(run.id)
+    _admit_resume(run)
+    return True
+
+
+def _admit_resume(run):
+    # Parking gave up the run's slot; the resumed run goes back through
+    # admission so MAX_CONCURRENT_RUNS holds for it too. Its continuation
+    # row (answers included) is only taken once it starts.
+    run.status = "running"
+    ADMISSION.reserve_restored()
+    ADMISSION.submit(
+        run, lambda: _RESUME_POOL.submit(_resume, run), get_mode(run.mode).priority, persist=False,
+    )
+
+
+def _resume(run):
+    from ..workchart.service import resume_workchart
+
+    try:
+        row = run_store.take_continuation(run.id)
+        if row is None:
+            return  # cancelled while waiting for a slot
+        state, answers = row["state"], row["answers"]
+        mode = get_mode(run.mode)
+        client = get_client().with_cancel(run.cancel_requested)
+        ledger = UsageLedger.restore(state["ledger"], pricing_lookup=get_catalog().pricing)
+        run.cancel_requested.add_callback(lambda: get_scheduler().cancel_lane(run.id))
+        with get_scheduler().lane(run.id, priority=mode.priority):
+            _conclude(
+                run, state["payload"], ledger,
+                lambda: resume_workchart(run, client, state["flow"], answers, ledger),
+            )
+    finally:
+        ADMISSION.finished(run)
+
+
+def _cancel_parked(run):
+    row = run_store.take_continuation(run.id)
+    if row is None:
+        return False
+    TIMERS.cancel(run.id)
+    _finish_cancelled(run, UsageLedger.restore(row["state"]["ledger"], pricing_lookup=get_catalog().pricing))
+    store.save_run_events(run.id, run.events)
+    return True
+
+
+def restore_parked_runs():
+    """Re-register runs parked before a restart (their event logs come back
+    from run_events): re-arm the answer timeouts of those still waiting, and
+    re-admit those whose answers had arrived."""
+    now = time.time()
+    for row in run_store.list_continuations():
+        run = REGISTRY.create(
+            row["mode"], row["engagement_id"], run_id=row["run_id"],
+            events=run_store.load_run_events(row["run_id"]),
+        )
+        if row["claimed"]:
+            _admit_resume(run)
+            logger.info("Re-admitted resumed run %s", run.id)
+            continue
+        run.status = "waiting_input"
+        TIMERS.schedule(run.id, row["deadline"] - now, lambda run=run: resume_run(run, None))
+        logger.info("Restored parked run %s", run.id)
+
+
+def _finish_cancelled(run, ledger):
+    """End a cancelled run, charging whatever it spent before the abort."""
+    logger.info("Run %s cancelled", run.id)
+    usage = ledger.totals()
+    run.status = "cancelled"
+    try:
+        store.add_spend(run.engagement_id, usage)
+    finally:
+        store.set_status(run.engagement_id, "cancelled")
+        run.emit(
+            "run.cancelled",
+            {
+                "engagementId": run.engagement_id,
+                "stages": run.stages_in_progress(),
+                "usage": usage,
+            },
+        )
+
+
 # --------------------------------------------------------------- panel flow
 def _panel_flow(run, client, mode, models, payload, problem, panel_size, ledger, check_budget):
+    """Panel stages as a dependency graph: the market planner runs alongside
+    the architect, research alongside casting, and each expert's analysis
+    starts as soon as that persona exists. Market intelligence is a soft
+    dependency of the insights — experts wait for it only until a deadline."""
     search_opts = payload.get("search") or {}
     guardrails = payload.get("panel") or {}
     concurrency = Config.PANEL_CONCURRENCY
@@ -130,78 +405,229 @@ def _panel_flow(run, client, mode, models, payload, problem, panel_size, ledger,
         stages.remove("market")
     run.emit("run.started", {"runId": run.id, "mode": mode.id, "panelSize": panel_size, "stages": stages})
 
-    # Scrape client URLs first so the architect sees the context
-    context_docs = []
-    urls = (payload.get("input") or {}).get("urls") or []
-    if urls and search_opts.get("scrapeUrls", True):
-        context_docs = market_intel.scrape_context(client, urls)
-
-    # Stage 1 — blueprint
-    run.emit("stage.started", {"stage": "architect"})
     mode_guardrails = dict(guardrails)
     if mode.mode_brief:
         seed = mode_guardrails.get("seedPerspectives") or ""
         mode_guardrails["seedPerspectives"] = f"{mode.mode_brief}\n{seed}".strip()
-    blueprint = architect.design_blueprint(
-        client, models["architect"], problem, panel_size, mode_guardrails, context_docs, ledger
-    )
-    run.emit("blueprint.ready", {"blueprint": blueprint})
-    run.emit("stage.completed", {"stage": "architect", "usage": _stage_usage(ledger, "architect")})
-    check_budget()
 
-    # Stage 2 — personas
-    run.emit("stage.started", {"stage": "personas", "expectedItems": panel_size})
-    persona_list = personas_stage(run, client, models["persona_writer"], problem, blueprint, mode_guardrails, concurrency, ledger)
-    run.emit("stage.completed", {"stage": "personas", "usage": _stage_usage(ledger, "personas")})
-    check_budget()
+    # Only coordinators (scrape, market, personas) run on graph threads; the
+    # architect, planner and every expert call are leaf nodes on the shared
+    # scheduler.
+    scheduler = get_scheduler()
+    graph = TaskGraph(max_workers=4, name=f"run-{run.id}")
+    insight_pool = scheduler.pool(model=models["expert"], label="insights", max_workers=concurrency)
+    lock = threading.Lock()
+    persona_list, entries = [], {}
+    pulse = PulseAggregator() if mode.quantitative else None
+    sampler = _adaptive_sampler(pulse, guardrails, panel_size, concurrency)
+    # Incremental synthesis drafts theme summaries while experts are answering
+    themes = None
+    if not mode.quantitative and (payload.get("synthesis") or {}).get("incremental"):
+        themes = ThemeBuilder(
+            client, models["synthesizer"], problem, ledger,
+            scheduler.pool(model=models["synthesizer"], label="synthesis", max_workers=3),
+            emit=lambda data: run.emit("synthesis.theme", data),
+        )
+    market_soft = ("market",) if "market" in stages else ()
+    market_deadline = {"at": None}
+    # Experts see the engagement's documents (uploads and scraped pages)
+    retriever = documents.Retriever(run.engagement_id) if run.engagement_id else None
+
+    def scrape_node(_):
+        # Scrape client URLs first so the architect sees the context; the
+        # pages are also indexed for the experts' retrieval
+        urls = (payload.get("input") or {}).get("urls") or []
+        if not urls or not search_opts.get("scrapeUrls", True):
+            return []
+        pages = market_intel.scrape_pages(client, urls)
+        if retriever is not None:
+            for url, text in pages:
+                try:
+                    documents.ingest(run.engagement_id, url, text, fmt="markdown", source="scrape")
+                except Exception:
+                    logger.exception("Could not index scraped page %s", url)
+        return market_intel.format_pages(pages)
+
+    def architect_node(inputs):
+        run.emit("stage.started", {"stage": "architect"})
+        blueprint = architect.design_blueprint(
+            client, models["architect"], problem, panel_size, mode_guardrails, inputs["scrape"], ledger
+        )
+        run.emit("blueprint.ready", {"blueprint": blueprint})
+        run.emit("stage.completed", {"stage": "architect", "usage": _stage_usage(ledger, "architect")})
+        check_budget()
+        return blueprint
 
-    # Stage 3 — market intelligence (before insights so experts get the digest)
-    market_briefs = []
-    if "market" in stages:
+    def market_plan_node(_):
         run.emit("stage.started", {"stage": "market", "expectedItems": 5})
-        market_briefs = market_intel.gather_market_intelligence(
+        return market_intel.plan_research(
             client,
             models["architect"],
+            problem,
+            ledger=ledger,
+            on_planned=lambda topics: run.emit("market.planned", {"topics": topics}),
+        )
+
+    def market_node(inputs):
+        briefs = market_intel.research_topics(
+            client,
             models["market_agent"],
             problem,
+            inputs["market_plan"],
             enable_x=bool(search_opts.get("x")),
             concurrency=min(concurrency, 4),
+            max_age_hours=search_opts.get("maxAgeHours"),
             ledger=ledger,
-            on_planned=lambda topics: run.emit("market.planned", {"topics": topics}),
             on_completed=lambda b: run.emit(
                 "market.completed",
-                {"topic": b["topic"], "channel": b["channel"], "findings": b["findings"], "citations": b["citations"]},
+                {
+                    "topic": b["topic"],
+                    "channel": b["channel"],
+                    "findings": b["findings"],
+                    "citations": b["citations"],
+                    "provenance": b["provenance"],
+                },
             ),
         )
         run.emit("stage.completed", {"stage": "market", "usage": _stage_usage(ledger, "market")})
         check_budget()
+        return briefs
+
+    # Pulse modes stream running aggregates (~20 snapshots per run) rather
+    # than a single aggregate at the end.
+    pulse_step = max(1, panel_size // 20)
 
-    # Stage 4 — expert insights
-    run.emit("stage.started", {"stage": "insights", "expectedItems": len(persona_list)})
-    digest = market_intel.digest(market_briefs) if market_briefs else None
-    insight_entries = insights.collect_insights(
-        client,
-        models["expert"],
-        problem,
-        persona_list,
-        concurrency,
-        ledger,
-        market_digest=digest,
-        prompt_name=mode.insight_prompt,
-        schema=mode.insight_schema,
-        on_started=lambda i, p: run.emit("expert.started", {"index": i, "personaName": p["name"]}),
-        on_completed=lambda i, e: run.emit(
+    def on_expert_completed(i, e):
+        run.emit(
             "expert.completed",
             {"index": i, "personaName": e["persona"]["name"], "insight": _public_insight(e)},
-        ),
-        cancel_event=run.cancel_requested,
+        )
+        if themes is not None and "error" not in e:
+            themes.add_entry(e)
+        # add() returns this entry's position, so concurrent completions can
+        # neither skip nor repeat a step
+        completed = pulse.add(e) if pulse is not None else 0
+        if completed and completed % pulse_step == 0:
+            run.emit(
+                "pulse.batch",
+                {"completed": completed, "total": len(persona_list), "aggregates": pulse.snapshot()},
+            )
+
+    routers = {}
+
+    def market_context(briefs, persona):
+        # One passage index per run; each expert gets the passages that
+        # match their focus
+        if not briefs:
+            return ""
+        with lock:
+            if "router" not in routers:
+                routers["router"] = market_intel.BriefRouter(briefs)
+        return routers["router"].section(persona, problem)
+
+    def insight_node(index, persona):
+        def node(inputs):
+            try:
+                return ask(inputs)
+            finally:
+                if sampler is not None:
+                    issue(*sampler.finished())
+
+        def ask(inputs):
+            if run.cancel_requested.is_set():
+                entry = {"persona": persona, "error": "cancelled"}
+            else:
+                run.emit("expert.started", {"index": index, "personaName": persona["name"]})
+                try:
+                    result = insights.ask_expert(
+                        client, models["expert"], problem, persona, ledger,
+                        market_context=market_context(inputs.get("market"), persona),
+                        prompt_name=mode.insight_prompt,
+                        schema=mode.insight_schema,
+                        client_context=retriever.section(persona, problem) if retriever else "",
+                    )
+                except Exception:
+                    logger.exception("Insight generation failed for %s", persona.get("name"))
+                    return None
+                entry = {"persona": persona, **result}
+            with lock:
+                entries[index] = entry
+            on_expert_completed(index, entry)
+            return entry
+
+        return node
+
+    def on_persona(index, persona):
+        with lock:
+            persona_list.append(persona)
+            first = len(persona_list) == 1
+        if first:
+            run.emit("stage.started", {"stage": "insights", "expectedItems": panel_size})
+        if sampler is None:
+            add_insight(index, persona)
+        else:
+            issue(*sampler.offer(index, persona))
+
+    def issue(seats, stopped_now):
+        for seat in seats:
+            add_insight(*seat)
+        if stopped_now:
+            run.emit("pulse.stopped", _sampling_summary(sampler, panel_size))
+
+    def add_insight(index, persona):
+        graph.add(
+            f"insight:{index}",
+            insight_node(index, persona),
+            soft=market_soft,
+            soft_deadline=market_deadline["at"],
+            required=False,
+            pool=insight_pool,
+        )
+
+    def personas_node(inputs):
+        market_deadline["at"] = time.monotonic() + Config.MARKET_DIGEST_WAIT_SECONDS
+        run.emit("stage.started", {"stage": "personas", "expectedItems": panel_size})
+        cast = personas_stage(
+            run, client, models["persona_writer"], problem, inputs["architect"], mode_guardrails,
+            concurrency, ledger, on_added=on_persona,
+        )
+        run.emit("stage.completed", {"stage": "personas", "usage": _stage_usage(ledger, "personas")})
+        check_budget()
+        return cast
+
+    graph.add("scrape", scrape_node)
+    graph.add(
+        "architect", architect_node, deps=["scrape"],
+        pool=scheduler.pool(model=models["architect"], label="architect"),
     )
+    graph.add("personas", personas_node, deps=["architect"])
+    if market_soft:
+        # Market intelligence is optional: if planning or research fails the
+        # experts go ahead without it
+        graph.add(
+            "market_plan", market_plan_node, required=False,
+            pool=scheduler.pool(model=models["architect"], label="market"),
+        )
+        graph.add("market", market_node, deps=["market_plan"], required=False)
+    results = graph.run(cancel_event=run.cancel_requested)
+    if market_soft and "market" not in results and not run.cancel_requested.is_set():
+        run.emit("stage.completed", {"stage": "market", "usage": _stage_usage(ledger, "market")})
+    check_budget()
+
+    if not persona_list:
+        run.emit("stage.started", {"stage": "insights", "expectedItems": 0})
+    # Slots with no entry failed outright, or never started because of a cancel
+    insight_entries = [
+        entries.get(i) or _missing_entry(run, i, p, sampler)
+        for i, p in enumerate(persona_list)
+    ]
     run.emit("stage.completed", {"stage": "insights", "usage": _stage_usage(ledger, "insights")})
     check_budget()
 
+    market_briefs = results.get("market") or []
     result = {
         "problem": problem,
-        "blueprint": blueprint,
+        "blueprint": results.get("architect"),
         "personas": persona_list,
         "insights": insight_entries,
         "market_intelligence": market_briefs,
@@ -209,24 +635,74 @@ def _panel_flow(run, client, mode, models, payload, problem, panel_size, ledger,
 
     # Stage 5 — synthesis (or quantitative aggregation for pulse modes)
     if mode.quantitative:
-        result["aggregates"] = _pulse_aggregates(insight_entries)
+        result["aggregates"] = pulse.snapshot()
+        if sampler is not None:
+            result["aggregates"]["sampling"] = _sampling_summary(sampler, len(persona_list))
         run.emit("pulse.batch", {"completed": len(insight_entries), "total": len(insight_entries), "aggregates": result["aggregates"]})
     else:
         run.emit("stage.started", {"stage": "synthesis"})
+        digest = None
+        if themes is not None:
+            digest = themes.finish()
+            themes.pool.shutdown(wait=False)
         result["synthesis"] = synthesis.synthesize(
-            client, models["synthesizer"], problem, insight_entries, market_briefs, panel_size, ledger
+            client, models["synthesizer"], problem, insight_entries, market_briefs, panel_size, ledger,
+            theme_digest=digest,
         )
         run.emit("stage.completed", {"stage": "synthesis", "usage": _stage_usage(ledger, "synthesis")})
 
     return result
 
 
-def personas_stage(run, client, model, problem, blueprint, guardrails, concurrency, ledger):
+def _adaptive_sampler(pulse, guardrails, panel_size, concurrency):
+    """Sampler for an opt-in adaptive pulse (`panel.adaptive`: true or
+    {tolerance, minSeats, maxSeats}); None for a full pulse."""
+    opts = guardrails.get("adaptive")
+    if pulse is None or not opts:
+        return None
+    opts = opts if isinstance(opts, dict) else {}
+    max_seats = min(panel_size, int(opts.get("maxSeats") or panel_size))
+    return AdaptiveSampler(
+        pulse,
+        tolerance=float(opts.get("tolerance") or Config.PULSE_ADAPTIVE_TOLERANCE),
+        min_seats=min(max_seats, int(opts.get("minSeats") or Config.PULSE_ADAPTIVE_MIN_SEATS)),
+        max_seats=max_seats,
+        window=concurrency,
+    )
+
+
+def _sampling_summary(sampler, total):
+    half = sampler.aggregator.ci_halfwidth()
+    answered = sampler.aggregator.count
+    summary = {
+        "adaptive": True,
+        "answered": answered,
+        "total": total,
+        "ciHalfWidth": None if half is None else round(half, 2),
+        "tolerance": sampler.tolerance,
+        "stopReason": sampler.stopped or "exhausted",
+    }
+    summary["label"] = f"answered {answered} of {total}" + ("" if half is None else f", CI ±{half:.2f}")
+    return summary
+
+
+def _missing_entry(run, index, persona, sampler):
+    """Entry for a seat with no answer: never asked, cancelled or failed."""
+    if sampler is not None and sampler.stopped and index not in sampler.asked:
+        return {"persona": persona, "error": "not_sampled"}
+    if run.cancel_requested.is_set():
+        return {"persona": persona, "error": "cancelled"}
+    return insights.failed_entry(persona)
+
+
+def personas_stage(run, client, model, problem, blueprint, guardrails, concurrency, ledger, on_added=None):
     counter = {"n": 0}
 
     def on_persona(p):
         counter["n"] += 1
         run.emit("persona.created", {"index": counter["n"], "persona": p})
+        if on_added:
+            on_added(counter["n"] - 1, p)
 
     from .personas import generate_personas
 
@@ -239,37 +715,17 @@ def _public_insight(entry):
 
 def _stage_usage(ledger, stage):
     totals = ledger.totals()["by_stage"].get(stage) or {}
-    return {
+    usage = {
         "promptTokens": totals.get("prompt_tokens", 0),
         "completionTokens": totals.get("completion_tokens", 0),
         "costUsd": totals.get("cost_usd", 0.0),
         "totalCostUsd": round(ledger.total_cost_usd, 6),
     }
-
-
-def _pulse_aggregates(insight_entries):
-    stances, concerns, by_discipline = [], [], {}
-    for e in insight_entries:
-        if "stance" not in e:
-            continue
-        stances.append(e["stance"])
-        concerns.append(e.get("top_concern", ""))
-        disc = e.get("persona", {}).get("discipline", "Other")
-        by_discipline.setdefault(disc, []).append(e["stance"])
-    if not stances:
-        return {"count": 0}
-    distribution = {str(v): stances.count(v) for v in range(1, 6)}
-    return {
-        "count": len(stances),
-        "mean_stance": round(sum(stances) / len(stances), 2),
-        "distribution": distribution,
-        "support_pct": round(100 * len([s for s in stances if s >= 4]) / len(stances), 1),
-        "oppose_pct": round(100 * len([s for s in stances if s <= 2]) / len(stances), 1),
-        "by_discipline": {
-            d: round(sum(v) / len(v), 2) for d, v in sorted(by_discipline.items())
-        },
-        "top_concerns": concerns[:20],
-    }
+    lane = current_lane()
+    queue = lane.public_stats(stage).get(stage) if lane is not None else None
+    if queue:
+        usage["queue"] = queue
+    return usage
 
 
 # --------------------------------------------------------------- board flow
@@ -299,6 +755,10 @@ BOARD_MINUTES_SCHEMA = {
 }
 
 
+BOARD_DELTA_INTERVAL_SECONDS = 0.1
+BOARD_TURN_COMPLETION_TOKENS = 500
+
+
 def _board_flow(run, client, mode, models, payload, problem, panel_size, ledger, check_budget):
     concurrency = min(Config.PANEL_CONCURRENCY, panel_size)
     rounds = int((payload.get("board") or {}).get("rounds", 3))
@@ -321,9 +781,10 @@ def _board_flow(run, client, mode, models, payload, problem, panel_size, ledger,
     check_budget()
 
     transcript = []  # [{round, speaker, statement}]
+    digests = []  # round digests, oldest first
     run.emit("stage.started", {"stage": "debate", "expectedItems": rounds * len(members)})
 
-    def speak(member, round_no):
+    def speak(member, round_no, context):
         if round_no == 1:
             prompt = render(
                 "modes/board_opening",
@@ -334,30 +795,73 @@ def _board_flow(run, client, mode, models, payload, problem, panel_size, ledger,
                 problem=problem,
             )
         else:
-            recent = "\n\n".join(
-                f"{t['speaker']}: {t['statement']}" for t in transcript if t["round"] == round_no - 1
-            )
-            prompt = render(
+            history, directed, brief = context
+            # Statements aimed at this member are kept ahead of the gists,
+            # and both ahead of older rounds' digests
+            prompt = render_packed(
                 "modes/board_response",
+                models["expert"],
+                BOARD_TURN_COMPLETION_TOKENS,
+                [
+                    Section("directed", directed, priority=0),
+                    Section("brief", brief, priority=1),
+                    Section("history", history, priority=2, max_tokens=debate.HISTORY_TOKENS),
+                ],
+                ledger=ledger,
+                stage="debate",
                 name=member["name"],
                 title=member.get("title", ""),
                 background=member.get("background", ""),
                 perspective=member.get("perspective", ""),
                 problem=problem,
-                transcript=recent[:20000],
             )
         deltas = client.chat_stream(
             models["expert"],
             [{"role": "user", "content": prompt}],
-            max_completion_tokens=500,
+            max_completion_tokens=BOARD_TURN_COMPLETION_TOKENS,
             on_usage=lambda u: ledger.record("debate", models["expert"], u),
         )
-        return "".join(deltas)
+        # Live text goes out as throttled ephemeral board.delta events; the
+        # board.turn emitted afterwards is the canonical (persisted) record.
+        parts, last_sent = [], 0.0
+        key = f"{round_no}:{member['name']}"
+        for delta in deltas:
+            parts.append(delta)
+            now = time.monotonic()
+            if now - last_sent >= BOARD_DELTA_INTERVAL_SECONDS:
+                last_sent = now
+                run.emit_ephemeral(
+                    "board.delta", {"round": round_no, "speaker": member["name"], "text": "".join(parts)}, key=key
+                )
+        return "".join(parts)
+
+    def collect_digest(fut):
+        try:
+            digests.append(fut.result())
+        except CallCancelled:
+            raise
+        except Exception:
+            logger.exception("Round digest failed; later prompts fall back to gists")
 
+    digest_pool = get_scheduler().pool(model=models["synthesizer"], label="digest")
+    pending, joined = [], 0  # digest futures in round order; how many were collected
     for round_no in range(1, rounds + 1):
-        with ThreadPoolExecutor(max_workers=concurrency) as pool:
-            futures = {pool.submit(speak, m, round_no): m for m in members}
+        previous = [t for t in transcript if t["round"] == round_no - 1]
+        # Round N-1 is digested while round N speaks, so round N-2's digest
+        # is the newest one members can see.
+        while pending and joined < round_no - 2:
+            collect_digest(pending.pop(0))
+            joined += 1
+        if previous:
+            pending.append(
+                digest_pool.submit(debate.digest_round, client, models["synthesizer"], problem, round_no - 1, previous, ledger)
+            )
+        contexts = {m["name"]: debate.route_context(m, previous, digests) for m in members} if previous else {}
+        with get_scheduler().pool(model=models["expert"], label="debate", max_workers=concurrency) as pool:
+            futures = {pool.submit(speak, m, round_no, contexts.get(m["name"])): m for m in members}
             for fut in as_completed(futures):
+                if run.cancel_requested.is_set():
+                    break
                 member = futures[fut]
                 try:
                     statement = fut.result()
@@ -371,10 +875,26 @@ def _board_flow(run, client, mode, models, payload, problem, panel_size, ledger,
     run.emit("stage.completed", {"stage": "debate", "usage": _stage_usage(ledger, "debate")})
 
     run.emit("stage.started", {"stage": "minutes"})
-    full = "\n\n".join(f"[Round {t['round']}] {t['speaker']}: {t['statement']}" for t in transcript)
+    # Minutes are built from the round digests plus the closing round in full
+    while pending:
+        collect_digest(pending.pop(0))
+    closing = [t for t in transcript if t["round"] == rounds]
+    # The closing round is kept whole ahead of the digests of earlier rounds
+    prompt = render_packed(
+        "modes/board_minutes",
+        models["synthesizer"],
+        4000,
+        [
+            Section("closing", debate.closing_statements(closing), priority=0, max_tokens=debate.CLOSING_TOKENS),
+            Section("digests", debate.format_digests(digests) or "(no digests available)", priority=1),
+        ],
+        ledger=ledger,
+        stage="minutes",
+        problem=problem,
+    )
     minutes = client.structured(
         models["synthesizer"],
-        [{"role": "user", "content": render("modes/board_minutes", problem=problem, transcript=full[:80000])}],
+        [{"role": "user", "content": prompt}],
         "BoardMinutes",
         BOARD_MINUTES_SCHEMA,
         max_completion_tokens=4000,
@@ -383,4 +903,11 @@ def _board_flow(run, client, mode, models, payload, problem, panel_size, ledger,
     )
     run.emit("stage.completed", {"stage": "minutes", "usage": _stage_usage(ledger, "minutes")})
 
-    return {"problem": problem, "blueprint": blueprint, "members": members, "transcript": transcript, "minutes": minutes}
+    return {
+        "problem": problem,
+        "blueprint": blueprint,
+        "members": members,
+        "transcript": transcript,
+        "digests": digests,
+        "minutes": minutes,
+    }
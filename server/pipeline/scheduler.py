@@ -0,0 +1,400 @@
+"""Process-wide execution scheduler shared by every run.
+
+Fan-out work from all runs (persona batches, expert analyses, market research,
+theme summaries, board turns) executes on one fixed pool of worker threads
+sized by SCHEDULER_CONCURRENCY, instead of a fresh ThreadPoolExecutor per stage
+per run. Each run is a lane:
+
+- interactive lanes (Quick Pulse, boards, work charts) are served before batch
+  lanes (deep dives);
+- within a priority class, lanes share workers by weighted fair queueing —
+  a lane's virtual time advances by 1/weight per dispatched task and the lane
+  with the lowest virtual time goes next, so a 100-seat run cannot starve a
+  small one;
+- optional per-model caps (MODEL_CONCURRENCY_CAPS) bound in-flight calls to
+  any single Venice model.
+
+Every task records how long it waited in the queue; per-lane, per-label stats
+surface in stage usage and on GET /api/scheduler.
+
+Only leaf work (a task that makes Venice calls but never waits on other
+scheduled tasks) may be submitted here; coordinators that fan out run on the
+caller's own thread, which is what keeps the fixed pool deadlock-free.
+"""
+import collections
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+from ..config import Config
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+_PRIORITY_ORDER = {PRIORITY_INTERACTIVE: 0, PRIORITY_BATCH: 1}
+
+DEFAULT_LANE = "default"
+SLOW_QUEUE_WAIT_SECONDS = 10
+
+_current = threading.local()
+
+
+class _Task:
+    __slots__ = ("fn", "args", "kwargs", "future", "model", "label", "pool", "enqueued_at")
+
+    def __init__(self, fn, args, kwargs, model, label, pool):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+        self.model = model
+        self.label = label
+        self.pool = pool
+        self.enqueued_at = time.monotonic()
+
+
+class Lane:
+    def __init__(self, key, priority, weight):
+        self.key = key
+        self.priority = priority
+        self.weight = max(float(weight), 0.01)
+        self.vtime = 0.0
+        self.queue = collections.deque()
+        self.running = 0
+        self.refs = 0
+        self.cancelled = False
+        self.stats = {}  # label -> {"tasks", "wait_total", "wait_max"}
+
+    def record_wait(self, label, wait):
+        s = self.stats.setdefault(label or "other", {"tasks": 0, "wait_total": 0.0, "wait_max": 0.0})
+        s["tasks"] += 1
+        s["wait_total"] += wait
+        s["wait_max"] = max(s["wait_max"], wait)
+
+    def public_stats(self, label=None):
+        items = [(label, self.stats.get(label))] if label else sorted(self.stats.items())
+        out = {}
+        for name, s in items:
+            if not s:
+                continue
+            out[name] = {
+                "tasks": s["tasks"],
+                "avgQueueWaitMs": round(1000 * s["wait_total"] / s["tasks"], 1),
+                "maxQueueWaitMs": round(1000 * s["wait_max"], 1),
+            }
+        return out
+
+
+class Scheduler:
+    def __init__(self, workers, model_caps=None):
+        self._workers = max(1, int(workers))
+        self._model_caps = dict(model_caps or {})
+        self._cond = threading.Condition()
+        self._lanes = {}
+        self._model_inflight = collections.Counter()
+        self._vtime = 0.0
+        self._threads = []
+
+    # --------------------------------------------------------------- lanes
+    def lane(self, key, priority=PRIORITY_BATCH, weight=1.0):
+        """Context manager binding the calling thread (and everything it
+        schedules) to the run's lane."""
+        return _LaneBinding(self, key, priority, weight)
+
+    def _acquire_lane(self, key, priority, weight):
+        with self._cond:
+            lane = self._lanes.get(key)
+            if lane is None:
+                lane = self._lanes[key] = Lane(key, priority, weight)
+            lane.refs += 1
+            return lane
+
+    def _release_lane(self, lane):
+        with self._cond:
+            lane.refs -= 1
+            if lane.refs <= 0 and not lane.queue and not lane.running:
+                self._lanes.pop(lane.key, None)
+
+    def lane_stats(self, key, label=None):
+        with self._cond:
+            lane = self._lanes.get(key)
+            return lane.public_stats(label) if lane else {}
+
+    def cancel_lane(self, key):
+        """Drop every queued (not yet started) task of a lane; anything the
+        lane submits afterwards is cancelled on arrival."""
+        with self._cond:
+            lane = self._lanes.get(key)
+            if lane is None:
+                return 0
+            lane.cancelled = True
+            dropped = list(lane.queue)
+            lane.queue.clear()
+        for task in dropped:
+            task.future.cancel()
+            if task.pool is not None:
+                task.pool._on_done(task)
+        return len(dropped)
+
+    def _withdraw(self, lane, pool):
+        """Drop the queued (not yet started) tasks `pool` submitted to `lane`."""
+        with self._cond:
+            dropped = [t for t in lane.queue if t.pool is pool]
+            if dropped:
+                lane.queue = collections.deque(t for t in lane.queue if t.pool is not pool)
+        for task in dropped:
+            task.future.cancel()
+        return len(dropped)
+
+    def stats(self):
+        with self._cond:
+            return {
+                "workers": self._workers,
+                "modelCaps": dict(self._model_caps),
+                "modelInflight": dict(self._model_inflight),
+                "lanes": [
+                    {
+                        "lane": lane.key,
+                        "priority": lane.priority,
+                        "weight": lane.weight,
+                        "queued": len(lane.queue),
+                        "running": lane.running,
+                        "labels": lane.public_stats(),
+                    }
+                    for lane in self._lanes.values()
+                ],
+            }
+
+    # -------------------------------------------------------------- submit
+    def pool(self, model=None, label=None, max_workers=None):
+        """An executor-like view for one stage's fan-out on the current lane."""
+        return LanePool(self, current_lane() or self._default_lane(), model, label, max_workers)
+
+    def _default_lane(self):
+        with self._cond:
+            lane = self._lanes.get(DEFAULT_LANE)
+            if lane is None:
+                lane = self._lanes[DEFAULT_LANE] = Lane(DEFAULT_LANE, PRIORITY_BATCH, 1.0)
+                lane.refs = 1  # never released
+            return lane
+
+    def _enqueue(self, lane, task):
+        with self._cond:
+            if lane.cancelled:
+                task.future.cancel()
+                return task.future
+            self._ensure_workers_locked()
+            self._lanes.setdefault(lane.key, lane)  # a released lane may still finish its work
+            if not lane.queue and not lane.running:
+                # A lane waking from idle joins at the current virtual time
+                # instead of cashing in credit for the time it was idle.
+                lane.vtime = max(lane.vtime, self._vtime)
+            lane.queue.append(task)
+            self._cond.notify()
+        return task.future
+
+    def _ensure_workers_locked(self):
+        while len(self._threads) < self._workers:
+            t = threading.Thread(target=self._worker, daemon=True, name=f"sched-{len(self._threads)}")
+            self._threads.append(t)
+            t.start()
+
+    def _next_task_locked(self):
+        best = None
+        for lane in self._lanes.values():
+            if not lane.queue:
+                continue
+            key = (_PRIORITY_ORDER.get(lane.priority, 1), lane.vtime)
+            if best is not None and key >= best[0]:
+                continue
+            for i, task in enumerate(lane.queue):
+                cap = self._model_caps.get(task.model)
+                if cap is None or self._model_inflight[task.model] < cap:
+                    best = (key, lane, i)
+                    break
+        if best is None:
+            return None, None
+        _, lane, i = best
+        task = lane.queue[i]
+        del lane.queue[i]
+        self._vtime = lane.vtime
+        lane.vtime += 1.0 / lane.weight
+        lane.running += 1
+        if task.model:
+            self._model_inflight[task.model] += 1
+        return lane, task
+
+    def _worker(self):
+        while True:
+            with self._cond:
+                lane, task = self._next_task_locked()
+                while task is None:
+                    self._cond.wait()
+                    lane, task = self._next_task_locked()
+            wait = time.monotonic() - task.enqueued_at
+            task.future.queue_wait = wait
+            with self._cond:
+                lane.record_wait(task.label, wait)
+            if wait > SLOW_QUEUE_WAIT_SECONDS:
+                logger.info("Task %s on lane %s waited %.1fs in queue", task.label, lane.key, wait)
+            if task.future.set_running_or_notify_cancel():
+                previous = getattr(_current, "lane", None)
+                _current.lane = lane
+                try:
+                    task.future.set_result(task.fn(*task.args, **task.kwargs))
+                except BaseException as exc:
+                    task.future.set_exception(exc)
+                finally:
+                    _current.lane = previous
+            with self._cond:
+                lane.running -= 1
+                if task.model:
+                    self._model_inflight[task.model] -= 1
+                if lane.refs <= 0 and not lane.queue and not lane.running:
+                    self._lanes.pop(lane.key, None)
+                self._cond.notify_all()
+            if task.pool is not None:
+                task.pool._on_done(task)
+
+
+class _LaneBinding:
+    def __init__(self, scheduler, key, priority, weight):
+        self._scheduler = scheduler
+        self._args = (key, priority, weight)
+        self._lane = None
+        self._previous = None
+
+    def __enter__(self):
+        self._lane = self._scheduler._acquire_lane(*self._args)
+        self._previous = getattr(_current, "lane", None)
+        _current.lane = self._lane
+        return self._lane
+
+    def __exit__(self, *exc):
+        _current.lane = self._previous
+        self._scheduler._release_lane(self._lane)
+        return False
+
+
+class bind_lane:
+    """Re-bind a captured lane on another thread (e.g. a graph coordinator)."""
+
+    def __init__(self, lane):
+        self._lane = lane
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(_current, "lane", None)
+        _current.lane = self._lane
+        return self._lane
+
+    def __exit__(self, *exc):
+        _current.lane = self._previous
+        return False
+
+
+def current_lane():
+    return getattr(_current, "lane", None)
+
+
+class LanePool:
+    """Drop-in for the ThreadPoolExecutor pattern used by stage fan-outs:
+    submit() returns a concurrent.futures.Future (so as_completed works) and
+    leaving the `with` block waits for everything submitted. max_workers caps
+    how many of this pool's tasks are queued on the scheduler at once."""
+
+    def __init__(self, scheduler, lane, model, label, max_workers):
+        self._scheduler = scheduler
+        self._lane = lane
+        self._model = model
+        self._label = label
+        self._max = max_workers
+        self._lock = threading.Lock()
+        self._held = collections.deque()
+        self._released = 0
+        self._futures = []
+
+    def submit(self, fn, *args, **kwargs):
+        task = _Task(fn, args, kwargs, self._model, self._label, self)
+        with self._lock:
+            self._futures.append(task.future)
+            if self._max is not None and self._released >= self._max:
+                self._held.append(task)
+                return task.future
+            self._released += 1
+        return self._scheduler._enqueue(self._lane, task)
+
+    def _on_done(self, task):
+        with self._lock:
+            self._released -= 1
+            if self._lane.cancelled:
+                held, self._held = list(self._held), collections.deque()
+                nxt = None
+            else:
+                held, nxt = [], None
+                while self._held:
+                    candidate = self._held.popleft()
+                    if not candidate.future.cancelled():
+                        nxt = candidate
+                        self._released += 1
+                        break
+        for t in held:
+            t.future.cancel()
+        if nxt is not None:
+            self._scheduler._enqueue(self._lane, nxt)
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """With cancel_futures, tasks not yet started are dropped: those held
+        back by max_workers and those already queued on the scheduler."""
+        if cancel_futures:
+            with self._lock:
+                held, self._held = list(self._held), collections.deque()
+            for task in held:
+                task.future.cancel()
+            withdrawn = self._scheduler._withdraw(self._lane, self)
+            if withdrawn:
+                with self._lock:
+                    self._released -= withdrawn
+        if wait:
+            for fut in list(self._futures):
+                if not fut.cancelled():
+                    try:
+                        fut.exception()
+                    except Exception:
+                        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown(wait=True)
+        return False
+
+
+def _parse_model_caps(raw):
+    caps = {}
+    for part in (raw or "").split(","):
+        if "=" not in part:
+            continue
+        model, _, value = part.partition("=")
+        try:
+            caps[model.strip()] = max(1, int(value))
+        except ValueError:
+            logger.warning("Ignoring invalid MODEL_CONCURRENCY_CAPS entry %r", part)
+    return caps
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = Scheduler(
+                Config.SCHEDULER_CONCURRENCY, _parse_model_caps(Config.MODEL_CONCURRENCY_CAPS)
+            )
+        return _scheduler
@@ -1,14 +1,25 @@
-"""Stage 5: synthesis. Single streamed call for panels ≤30; map-reduce
-(theme clustering → parallel theme summaries → final reduce) above that."""
+"""Stage 5: synthesis. Insights are first collapsed locally — near-duplicate
+statements become one line naming every supporting expert — then go to a
+single call when that fits (≤60 lines), or map-reduce above that: local
+theme clustering (clustering.py), parallel theme summaries alongside one
+small call that names the themes, then the final reduce."""
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import as_completed
 
 from ..prompts.loader import render
+from ..prompts.packing import Section, context_budget, render_packed
+from .scheduler import get_scheduler
+from .clustering import cluster_texts
+from .textsim import near_duplicate_groups
 
 logger = logging.getLogger(__name__)
 
 HIERARCHICAL_THRESHOLD = 30
+DUPLICATE_SIMILARITY = 0.6  # headline cosine at which two insights are one point
+_CONFIDENCE_RANK = {"high": 0, "medium": 1, "low": 2}
+SYNTHESIS_COMPLETION_TOKENS = 8000
+THEME_COMPLETION_TOKENS = 1500
 
 SYNTHESIS_SCHEMA = {
     "type": "object",
@@ -77,11 +88,11 @@ CLUSTER_SCHEMA = {
             "items": {
                 "type": "object",
                 "properties": {
+                    "cluster": {"type": "integer"},
                     "name": {"type": "string"},
                     "description": {"type": "string"},
-                    "insight_indices": {"type": "array", "items": {"type": "integer"}},
                 },
-                "required": ["name", "description", "insight_indices"],
+                "required": ["cluster", "name", "description"],
                 "additionalProperties": False,
             },
         }
@@ -91,7 +102,7 @@ CLUSTER_SCHEMA = {
 }
 
 
-def _insight_lines(insight_entries):
+def insight_lines(insight_entries):
     lines = []
     for entry in insight_entries:
         persona = entry.get("persona", {})
@@ -100,13 +111,42 @@ def _insight_lines(insight_entries):
             lines.append(
                 {
                     "who": who,
+                    "name": persona.get("name", "?"),
+                    "headline": item.get("insight", ""),
+                    "reasoning": item.get("supporting_reasoning", "")[:400],
+                    "confidence": str(item.get("confidence_level", "")).lower(),
                     "text": f"{item.get('insight', '')} — {item.get('supporting_reasoning', '')[:400]} "
                     f"[confidence: {item.get('confidence_level', '?')}]",
+                    "support": 1,
                 }
             )
     return lines
 
 
+def collapse_insights(lines):
+    """Merge near-duplicate insights into one line per point, keeping the
+    most confident phrasing and listing every supporting expert. Lines come
+    back most-supported first, so any later truncation drops the thinnest
+    points rather than a random tail."""
+    if len(lines) < 2:
+        return lines
+    merged = []
+    for group in near_duplicate_groups([l["headline"] for l in lines], DUPLICATE_SIMILARITY):
+        members = [lines[i] for i in group]
+        if len(members) == 1:
+            merged.append(members[0])
+            continue
+        best = min(members, key=lambda l: _CONFIDENCE_RANK.get(l["confidence"], 3))
+        names = list(dict.fromkeys(l["name"] for l in members))
+        merged.append({
+            **best,
+            "who": best["who"] if len(names) == 1 else f"{len(names)} experts: {', '.join(names)}",
+            "support": len(names),
+        })
+    merged.sort(key=lambda l: -l["support"])
+    return merged
+
+
 def _market_block(market_briefs):
     parts = []
     for b in market_briefs or []:
@@ -115,75 +155,129 @@ def _market_block(market_briefs):
     return "\n\n".join(parts) or "No market intelligence available."
 
 
-def synthesize(client, model, problem, insight_entries, market_briefs, panel_size, ledger):
-    lines = _insight_lines(insight_entries)
+def synthesize(client, model, problem, insight_entries, market_briefs, panel_size, ledger, theme_digest=None):
+    """Final report. `theme_digest` (theme summaries built while the experts
+    were still answering, see themes.py) replaces the insight pass."""
     market_block = _market_block(market_briefs)
-
-    if len(lines) <= HIERARCHICAL_THRESHOLD * 2 and panel_size <= HIERARCHICAL_THRESHOLD:
-        insights_block = "\n".join(f"- [{l['who']}] {l['text']}" for l in lines)
+    if theme_digest:
+        insights_block = theme_digest
     else:
-        insights_block = _hierarchical_digest(client, model, problem, lines, ledger)
+        raw = insight_lines(insight_entries)
+        lines = collapse_insights(raw)
+        if len(lines) < len(raw):
+            logger.info("Collapsed %d insights into %d distinct points", len(raw), len(lines))
+        if len(lines) <= HIERARCHICAL_THRESHOLD * 2:
+            insights_block = "\n".join(f"- [{l['who']}] {l['text']}" for l in lines)
+        else:
+            insights_block = _hierarchical_digest(client, model, problem, lines, ledger)
 
-    prompt = render(
+    # Insights fill first; market evidence gets what is left, at most a
+    # quarter of the window
+    budget = context_budget(model, SYNTHESIS_COMPLETION_TOKENS)
+    prompt = render_packed(
         "panel/synthesis",
+        model,
+        SYNTHESIS_COMPLETION_TOKENS,
+        [
+            Section("insights_block", insights_block, priority=0),
+            Section("market_block", market_block, priority=1, max_tokens=budget // 4),
+        ],
+        ledger=ledger,
+        stage="synthesis",
         panel_size=panel_size,
         problem=problem,
-        insights_block=insights_block[:80000],
-        market_block=market_block[:30000],
     )
     return client.structured(
         model,
         [{"role": "user", "content": prompt}],
         "SynthesisReport",
         SYNTHESIS_SCHEMA,
-        max_completion_tokens=8000,
+        max_completion_tokens=SYNTHESIS_COMPLETION_TOKENS,
         ledger=ledger,
         stage="synthesis",
     )
 
 
-def _hierarchical_digest(client, model, problem, lines, ledger):
-    """Cluster indexed insights into themes, summarize each theme in parallel,
-    and hand the theme summaries to the final synthesis call."""
-    indexed = "\n".join(f"{i}. [{l['who']}] {l['text'][:300]}" for i, l in enumerate(lines))
-    clusters = client.structured(
+def name_themes(client, model, problem, clusters, lines, ledger):
+    """One small call naming every cluster from its size, distinctive terms
+    and most central insights. Returns {cluster number: {name, description}}."""
+    block = "\n\n".join(
+        f"Cluster {n} ({len(c['indices'])} insights; terms: {', '.join(c['terms']) or 'n/a'})\n"
+        + "\n".join(f"- {lines[i]['headline'][:240]}" for i in c["representatives"])
+        for n, c in enumerate(clusters)
+    )
+    named = client.structured(
         model,
-        [{"role": "user", "content": render("panel/synthesis_cluster", problem=problem, insights_block=indexed[:60000])}],
-        "InsightClusters",
+        [{"role": "user", "content": render("panel/synthesis_cluster", problem=problem, clusters_block=block)}],
+        "ThemeNames",
         CLUSTER_SCHEMA,
+        max_completion_tokens=1500,
         ledger=ledger,
         stage="synthesis",
     )
+    return {t["cluster"]: t for t in named.get("themes", [])}
 
-    def summarize(theme):
-        members = [lines[i] for i in theme.get("insight_indices", []) if 0 <= i < len(lines)]
-        block = "\n".join(f"- [{m['who']}] {m['text']}" for m in members)
-        deltas = client.chat_stream(
-            model,
-            [
-                {
-                    "role": "user",
-                    "content": render(
-                        "panel/synthesis_theme",
-                        problem=problem,
-                        theme_name=theme["name"],
-                        theme_description=theme["description"],
-                        insights_block=block[:40000],
-                    ),
-                }
-            ],
-            max_completion_tokens=1500,
-            on_usage=lambda u: ledger and ledger.record("synthesis", model, u),
-        )
-        return theme["name"], "".join(deltas)
 
-    summaries = []
-    with ThreadPoolExecutor(max_workers=4) as pool:
-        futures = [pool.submit(summarize, t) for t in clusters.get("themes", [])]
+def theme_block(name, description, summary):
+    head = f"### Theme: {name}" + (f"\n{description}" if description else "")
+    return f"{head}\n{summary}"
+
+
+def summarize_theme(client, model, problem, label, lines, ledger):
+    """Streamed prose summary of one theme's insight lines."""
+    block = "\n".join(f"- [{l['who']}] {l['text']}" for l in lines)
+    deltas = client.chat_stream(
+        model,
+        [
+            {
+                "role": "user",
+                "content": render_packed(
+                    "panel/synthesis_theme",
+                    model,
+                    THEME_COMPLETION_TOKENS,
+                    [Section("insights_block", block)],
+                    ledger=ledger,
+                    stage="synthesis",
+                    problem=problem,
+                    theme_name=label,
+                    theme_description=f"{len(lines)} insights grouped by shared subject matter.",
+                ),
+            }
+        ],
+        max_completion_tokens=THEME_COMPLETION_TOKENS,
+        on_usage=lambda u: ledger and ledger.record("synthesis", model, u),
+    )
+    return "".join(deltas)
+
+
+def _hierarchical_digest(client, model, problem, lines, ledger):
+    """Cluster insights into themes locally, then name the clusters (one
+    small call) while every theme is summarized in parallel; the theme
+    summaries feed the final synthesis call."""
+    clusters = cluster_texts([f"{l['headline']} {l['reasoning']}" for l in lines])
+    logger.info("Clustered %d insight lines into %d themes", len(lines), len(clusters))
+
+    def summarize(n, cluster):
+        members = [lines[i] for i in cluster["indices"]]
+        return n, summarize_theme(client, model, problem, f"Theme {n + 1} ({', '.join(cluster['terms']) or 'mixed'})", members, ledger)
+
+    texts, names = {}, {}
+    with get_scheduler().pool(model=model, label="synthesis", max_workers=5) as pool:
+        naming = pool.submit(name_themes, client, model, problem, clusters, lines, ledger)
+        futures = [pool.submit(summarize, n, c) for n, c in enumerate(clusters)]
         for fut in as_completed(futures):
             try:
-                name, text = fut.result()
-                summaries.append(f"### Theme: {name}\n{text}")
+                n, text = fut.result()
+                texts[n] = text
             except Exception:
                 logger.exception("Theme summary failed")
+        try:
+            names = naming.result()
+        except Exception:
+            logger.exception("Theme naming failed; using cluster terms")
+
+    summaries = []
+    for n in sorted(texts):
+        theme = names.get(n) or {"name": ", ".join(clusters[n]["terms"]) or f"Theme {n + 1}", "description": ""}
+        summaries.append(theme_block(theme["name"], theme.get("description"), texts[n]))
     return "\n\n".join(summaries)
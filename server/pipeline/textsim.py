@@ -0,0 +1,230 @@
+"""Cheap local text similarity for de-duplicating short model outputs.
+
+Three representations, all local and network-free:
+
+- word shingles (k-grams over normalised tokens) compared by Jaccard.
+  NearDuplicateIndex keeps an inverted index from shingle to cluster, so
+  adding a text only compares it with clusters sharing a shingle;
+- hashed TF-IDF vectors (lightly stemmed words hashed into a fixed number
+  of NumPy columns, L2-normalised) compared by cosine — a matrix product
+  gives all pairwise similarities at once. Paraphrases share vocabulary far
+  more than word order, so bigrams are left out;
+- BM25 over the same stemmed words, for ranking passages against a
+  weighted query (bm25_weight is shared with the SQLite document index).
+"""
+import math
+import re
+import zlib
+from collections import Counter
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or that the their this to was were will with "
+    "we our they them there these those not no but if then than so too very can could would should may might".split()
+)
+
+
+def tokens(text):
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+def shingles(text, k=2):
+    """Word k-gram set; texts shorter than k words fall back to their words."""
+    toks = tokens(text)
+    if len(toks) < k:
+        return frozenset(toks)
+    return frozenset(" ".join(toks[i : i + k]) for i in range(len(toks) - k + 1))
+
+
+def jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    inter = len(a & b)
+    return inter / (len(a) + len(b) - inter)
+
+
+class NearDuplicateIndex:
+    """Incremental clustering of short texts: a text joins the cluster whose
+    representative it matches best, if that match is `threshold` Jaccard or
+    better, otherwise it starts a new cluster."""
+
+    def __init__(self, threshold=0.5, k=2):
+        self.threshold = threshold
+        self.k = k
+        self.clusters = []  # [{"text", "count", "shingles"}]
+        self._postings = {}  # shingle -> [cluster ids]
+
+    def add(self, text):
+        """Returns (cluster_id, is_new); cluster_id is None for empty text."""
+        sh = shingles(text, self.k)
+        if not sh:
+            return None, False
+        candidates = set()
+        for s in sh:
+            candidates.update(self._postings.get(s, ()))
+        best, best_sim = None, self.threshold
+        for cid in candidates:
+            sim = jaccard(sh, self.clusters[cid]["shingles"])
+            if sim >= best_sim:
+                best, best_sim = cid, sim
+        if best is not None:
+            self.clusters[best]["count"] += 1
+            return best, False
+        cid = len(self.clusters)
+        self.clusters.append({"text": text.strip(), "count": 1, "shingles": sh})
+        for s in sh:
+            self._postings.setdefault(s, []).append(cid)
+        return cid, True
+
+    def top(self, n=20):
+        """Most frequent clusters first (ties keep arrival order)."""
+        ranked = sorted(range(len(self.clusters)), key=lambda i: -self.clusters[i]["count"])
+        return [{"text": self.clusters[i]["text"], "count": self.clusters[i]["count"]} for i in ranked[:n]]
+
+
+HASH_DIM = 1 << 12
+
+
+_SUFFIXES = ("ing", "ed", "es", "s")
+
+
+def _stem(token):
+    for suffix in _SUFFIXES:
+        if len(token) > len(suffix) + 3 and token.endswith(suffix):
+            return token[: -len(suffix)]
+    return token
+
+
+def features(text):
+    return [_stem(t) for t in tokens(text)]
+
+
+def _counts(text, dim):
+    row = np.zeros(dim, dtype=np.float32)
+    for feature in features(text):
+        row[zlib.crc32(feature.encode()) % dim] += 1.0
+    return row
+
+
+def _weigh(counts, df, n):
+    """Sublinear TF × smoothed IDF, rows L2-normalised."""
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=-1, keepdims=True)
+    return weights / np.maximum(norms, 1e-12)
+
+
+def tfidf_matrix(texts, dim=HASH_DIM):
+    """(len(texts), dim) float32 matrix of unit-length hashed TF-IDF rows;
+    `m @ m.T` is the cosine similarity matrix."""
+    counts = np.stack([_counts(t, dim) for t in texts]) if texts else np.zeros((0, dim), dtype=np.float32)
+    df = (counts > 0).sum(axis=0)
+    return _weigh(counts, df, len(texts)).astype(np.float32)
+
+
+class VectorIndex:
+    """Incremental hashed TF-IDF index for small corpora (a panel's personas
+    or insights): document frequencies update as texts are added, and
+    nearest() scores a candidate against everything so far without adding
+    it. Rows live in a buffer that doubles when full."""
+
+    def __init__(self, dim=HASH_DIM):
+        self.dim = dim
+        self._buffer = np.zeros((16, dim), dtype=np.float32)
+        self._n = 0
+        self._df = np.zeros(dim, dtype=np.float32)
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def _counts(self):
+        return self._buffer[: self._n]
+
+    def nearest(self, text):
+        """(row, cosine) of the closest stored text, or (None, 0.0)."""
+        if not self._n:
+            return None, 0.0
+        row = _counts(text, self.dim)
+        df = self._df + (row > 0)
+        n = self._n + 1
+        sims = _weigh(self._counts, df, n) @ _weigh(row, df, n)
+        best = int(np.argmax(sims))
+        return best, float(sims[best])
+
+    def add(self, text):
+        if self._n == len(self._buffer):
+            self._buffer = np.vstack([self._buffer, np.zeros_like(self._buffer)])
+        row = _counts(text, self.dim)
+        self._buffer[self._n] = row
+        self._df += row > 0
+        self._n += 1
+        return self._n - 1
+
+    def row(self, i):
+        """Unit TF-IDF row for stored text `i` under the current document
+        frequencies."""
+        return _weigh(self._buffer[i], self._df, self._n)
+
+    def matrix(self):
+        """Unit TF-IDF rows for every stored text under the current
+        document frequencies."""
+        return _weigh(self._counts, self._df, self._n)
+
+
+def near_duplicate_groups(texts, threshold, block=512):
+    """Greedy leader clustering by cosine: each text not yet grouped leads a
+    group of the later ungrouped texts at `threshold` or above. Returns
+    index lists in leader order. Similarities are computed block by block,
+    so memory stays O(block × n)."""
+    m = tfidf_matrix(texts)
+    group = np.full(len(texts), -1, dtype=np.int64)
+    groups = []
+    for start in range(0, len(texts), block):
+        sims = m[start : start + block] @ m.T
+        for offset, row in enumerate(sims):
+            i = start + offset
+            if group[i] >= 0:
+                continue
+            members = np.nonzero((row >= threshold) & (group < 0))[0]
+            members = members[members > i]
+            group[i] = len(groups)
+            group[members] = len(groups)
+            groups.append([i, *members.tolist()])
+    return groups
+
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def bm25_weight(tf, df, n, length, avgdl):
+    """One term's BM25 contribution to a document of `length` terms."""
+    idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (avgdl or 1))
+    return idf * tf * (BM25_K1 + 1) / (tf + norm)
+
+
+class BM25Index:
+    """In-memory BM25 over a fixed list of short texts."""
+
+    def __init__(self, texts):
+        self._terms = [Counter(features(t)) for t in texts]
+        self._lengths = [sum(c.values()) for c in self._terms]
+        self._df = Counter(term for c in self._terms for term in c)
+        self._avgdl = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+
+    def scores(self, weights):
+        """Score of every text for {term: query weight}."""
+        n = len(self._terms)
+        out = []
+        for counts, length in zip(self._terms, self._lengths):
+            score = 0.0
+            for term, weight in weights.items():
+                tf = counts.get(term)
+                if tf:
+                    score += weight * bm25_weight(tf, self._df[term], n, length, self._avgdl)
+            out.append(score)
+        return out
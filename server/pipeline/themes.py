@@ -0,0 +1,221 @@
+"""Incremental synthesis: themes built while experts are still answering.
+
+ThemeBuilder is fed each expert entry as it completes. Insight lines join
+the closest existing theme (cosine to the theme centroid over hashed
+TF-IDF rows, each weighed when it arrives so adding a line costs
+O(themes × dims)); lines that fit nowhere wait in a loose pool until there are
+enough of them to carve out new themes with clustering.cluster_texts. A
+theme is summarized once it has SUMMARY_MIN members and re-summarized
+whenever it has grown by REFRESH_GROWTH since its last summary, each
+summary streaming out as a `synthesis.theme` event.
+
+finish() runs after the last expert: loose lines go to their nearest
+theme, only themes with a meaningful unsummarized tail are refreshed, the
+themes are named in one small call, and the digest of theme summaries is
+handed to the final synthesis call in place of the raw insights.
+"""
+import logging
+import threading
+from concurrent.futures import wait
+
+import numpy as np
+
+from . import synthesis
+from .clustering import cluster_texts, top_terms
+from .textsim import VectorIndex
+
+logger = logging.getLogger(__name__)
+
+MAX_THEMES = 8
+SEED_LINES = 12  # loose lines before new themes are carved out of them
+JOIN_SIMILARITY = 0.2  # min centroid cosine for a line to join a theme
+SUMMARY_MIN = 4
+REFRESH_GROWTH = 0.5
+STALE_FRACTION = 0.25  # unsummarized share of a theme that warrants a final refresh
+
+
+def _subject(line):
+    return f"{line['headline']} {line['reasoning']}"
+
+
+class _Theme:
+    __slots__ = ("id", "members", "total", "summary", "summarized", "running")
+
+    def __init__(self, theme_id, members, rows):
+        self.id = theme_id
+        self.members = list(members)
+        self.total = np.sum(rows, axis=0)  # sum of member unit rows; its direction is the centroid
+        self.summary = None
+        self.summarized = 0  # members covered by `summary`
+        self.running = False
+
+
+class ThemeBuilder:
+    def __init__(self, client, model, problem, ledger, pool, emit=None):
+        self.client = client
+        self.model = model
+        self.problem = problem
+        self.ledger = ledger
+        self.pool = pool
+        self.emit = emit
+        self._lock = threading.Lock()
+        self._lines = []
+        self._index = VectorIndex()
+        self._themes = []
+        self._loose = []
+        self._seed_at = SEED_LINES
+        self._futures = []
+
+    def add_entry(self, entry):
+        """Fold one expert's insights in and launch any summaries now due."""
+        new = synthesis.insight_lines([entry])
+        if not new:
+            return
+        with self._lock:
+            for line in new:
+                self._lines.append(line)
+                self._index.add(_subject(line))
+                self._assign_locked(len(self._lines) - 1)
+            due = self._due_locked()
+        self._launch(due)
+
+    def finish(self):
+        """Digest of named theme summaries for the final synthesis call, or
+        None when no insight arrived."""
+        self._drain()
+        with self._lock:
+            if not self._lines:
+                return None
+            if not self._themes:
+                self._seed_locked(force=True)
+            self._place_loose_locked()
+            due = [t for t in self._themes if not t.running and self._stale(t)]
+            for theme in due:
+                theme.running = True
+        labels = [self._group(t) for t in self._themes]
+        naming = self.pool.submit(
+            synthesis.name_themes, self.client, self.model, self.problem, labels, self._lines, self.ledger
+        )
+        self._launch([(t, list(t.members)) for t in due])
+        self._drain()
+        try:
+            names = naming.result()
+        except Exception:
+            logger.exception("Theme naming failed; using theme terms")
+            names = {}
+        blocks = []
+        for n, theme in enumerate(self._themes):
+            named = names.get(n) or {"name": ", ".join(labels[n]["terms"]) or f"Theme {n + 1}", "description": ""}
+            summary = theme.summary or ""
+            tail = theme.members[theme.summarized:]
+            if tail:
+                summary += "\nAlso raised:\n" + "\n".join(
+                    f"- [{self._lines[i]['who']}] {self._lines[i]['text']}" for i in tail
+                )
+            blocks.append(synthesis.theme_block(named["name"], named.get("description"), summary.strip()))
+        return "\n\n".join(blocks)
+
+    # ------------------------------------------------------------ internals
+    def _assign_locked(self, i):
+        if self._themes:
+            row = self._index.row(i)
+            best, similarity = self._nearest(row)
+            if similarity >= JOIN_SIMILARITY or len(self._themes) >= MAX_THEMES:
+                self._join(best, i, row)
+                return
+        self._loose.append(i)
+        if len(self._loose) >= self._seed_at and len(self._themes) < MAX_THEMES:
+            self._seed_locked()
+
+    def _seed_locked(self, force=False):
+        """Carve themes out of the loose pool; clusters too small to stand
+        alone stay loose (unless forced)."""
+        texts = [_subject(self._lines[i]) for i in self._loose]
+        room = MAX_THEMES - len(self._themes)
+        clusters = cluster_texts(texts, min_k=2, max_k=min(room, 4)) if len(texts) >= 4 else []
+        if force and not clusters:
+            clusters = [{"indices": list(range(len(texts)))}]
+        keep = []
+        for cluster in clusters:
+            members = [self._loose[j] for j in cluster["indices"]]
+            if force or len(members) >= SUMMARY_MIN:
+                rows = [self._index.row(i) for i in members]
+                self._themes.append(_Theme(len(self._themes), members, rows))
+            else:
+                keep.extend(members)
+        self._loose = sorted(keep)
+        self._seed_at = len(self._loose) + SEED_LINES
+
+    def _place_loose_locked(self):
+        for i in self._loose:
+            row = self._index.row(i)
+            self._join(self._nearest(row)[0], i, row)
+        self._loose = []
+
+    def _nearest(self, row):
+        sims = [float(t.total @ row) / max(float(np.linalg.norm(t.total)), 1e-12) for t in self._themes]
+        best = int(np.argmax(sims))
+        return best, sims[best]
+
+    def _join(self, n, i, row):
+        theme = self._themes[n]
+        theme.members.append(i)
+        theme.total = theme.total + row
+
+    def _stale(self, theme):
+        unsummarized = len(theme.members) - theme.summarized
+        return theme.summary is None or unsummarized >= max(2, STALE_FRACTION * len(theme.members))
+
+    def _due_locked(self):
+        due = []
+        for theme in self._themes:
+            if theme.running or len(theme.members) < SUMMARY_MIN:
+                continue
+            if theme.summary is None or len(theme.members) >= theme.summarized * (1 + REFRESH_GROWTH):
+                theme.running = True
+                due.append((theme, list(theme.members)))
+        return due
+
+    def _group(self, theme):
+        texts = [_subject(l) for l in self._lines]
+        matrix = self._index.matrix()
+        centroid = theme.total / max(float(np.linalg.norm(theme.total)), 1e-12)
+        members = np.array(theme.members)
+        closest = members[np.argsort(-(matrix[members] @ centroid))[:5]]
+        return {"indices": theme.members, "terms": top_terms(texts, theme.members), "representatives": closest.tolist()}
+
+    def _launch(self, due):
+        for theme, members in due:
+            fut = self.pool.submit(self._summarize, theme, members)
+            with self._lock:
+                self._futures.append(fut)
+
+    def _summarize(self, theme, members):
+        try:
+            with self._lock:
+                terms = ", ".join(self._group(theme)["terms"]) or "mixed"
+            lines = synthesis.collapse_insights([self._lines[i] for i in members])
+            text = synthesis.summarize_theme(
+                self.client, self.model, self.problem, f"Theme {theme.id + 1} ({terms})", lines, self.ledger
+            )
+        except Exception:
+            logger.exception("Theme %d summary failed", theme.id)
+            with self._lock:
+                theme.running = False
+            return
+        with self._lock:
+            theme.summary = text
+            theme.summarized = len(members)
+            theme.running = False
+            due = self._due_locked()
+        if self.emit:
+            self.emit({"theme": theme.id, "label": terms, "insights": len(members), "summary": text})
+        self._launch(due)
+
+    def _drain(self):
+        while True:
+            with self._lock:
+                pending = [f for f in self._futures if not f.done()]
+            if not pending:
+                return
+            wait(pending)
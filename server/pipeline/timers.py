@@ -0,0 +1,78 @@
+"""Process-wide timer wheel.
+
+Run timeouts (e.g. how long a parked work chart waits for clarifying answers)
+are slots on one hashed timing wheel driven by a single daemon thread, rather
+than a sleeping thread per run. Resolution is one tick (a second); a timer
+fires on the first tick at or after its deadline. Callbacks run on the wheel
+thread and must be quick — hand real work off to a pool.
+"""
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWheel:
+    def __init__(self, tick_seconds=1.0, slots=512):
+        self.tick = float(tick_seconds)
+        self._slots = [{} for _ in range(slots)]  # key -> [rounds, fn]
+        self._where = {}  # key -> slot index
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def schedule(self, key, delay_seconds, fn):
+        """Call fn() after ~delay_seconds; re-scheduling a key replaces it."""
+        # +1: the current tick is already partly elapsed
+        ticks = int(math.ceil(max(0.0, delay_seconds) / self.tick)) + 1
+        with self._lock:
+            self._remove_locked(key)
+            slot = (self._cursor + ticks) % len(self._slots)
+            rounds = (ticks - 1) // len(self._slots)
+            self._slots[slot][key] = [rounds, fn]
+            self._where[key] = slot
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True, name="timer-wheel")
+                self._thread.start()
+
+    def cancel(self, key):
+        with self._lock:
+            return self._remove_locked(key)
+
+    def pending(self):
+        with self._lock:
+            return len(self._where)
+
+    def _remove_locked(self, key):
+        slot = self._where.pop(key, None)
+        if slot is None:
+            return False
+        self._slots[slot].pop(key, None)
+        return True
+
+    def _loop(self):
+        next_tick = time.monotonic() + self.tick
+        while True:
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+            next_tick += self.tick
+            due = []
+            with self._lock:
+                self._cursor = (self._cursor + 1) % len(self._slots)
+                bucket = self._slots[self._cursor]
+                for key, entry in list(bucket.items()):
+                    if entry[0] > 0:
+                        entry[0] -= 1
+                        continue
+                    del bucket[key]
+                    self._where.pop(key, None)
+                    due.append((key, entry[1]))
+            for key, fn in due:
+                try:
+                    fn()
+                except Exception:
+                    logger.exception("Timer %s failed", key)
+
+
+TIMERS = TimerWheel()
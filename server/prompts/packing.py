@@ -0,0 +1,124 @@
+"""Token-aware prompt packing.
+
+Instead of fixed character cuts, a prompt builder declares the variable
+parts of a template as prioritized Sections and render_packed() fills them
+to a budget derived from the target model's context window
+(availableContextTokens from the live catalog) minus its completion budget
+and the template's own size. Sections fill in priority order; whatever
+does not fit is cut at a line boundary, and what was cut is noted on the
+run's ledger.
+
+Token counts come from estimate_tokens(), a local heuristic (roughly one
+token per short word, per 3 digits, per punctuation mark, per CJK
+character) that tracks BPE tokenizers within ~15% on English prose and
+JSON — close enough for budgeting with the safety margin below.
+"""
+import logging
+import re
+from dataclasses import dataclass
+from typing import Optional
+
+from ..config import Config
+from .loader import render
+
+logger = logging.getLogger(__name__)
+
+SAFETY_MARGIN = 0.08  # share of the window kept free for estimation error
+MIN_BUDGET_TOKENS = 1000
+TRUNCATION_MARK = "\n…[truncated to fit the model's context]"
+
+_PIECE = re.compile(r"[^\W\d_]+|\d+|\S")
+
+
+def estimate_tokens(text):
+    n = 0
+    for piece in _PIECE.findall(text or ""):
+        first = piece[0]
+        if first.isdigit():
+            n += (len(piece) + 2) // 3
+        elif first.isalpha():
+            n += (len(piece) + 5) // 6 if first.isascii() else len(piece)
+        else:
+            n += 1
+    return n
+
+
+@dataclass
+class Section:
+    name: str  # template placeholder
+    text: str
+    priority: int = 0  # lower fills first
+    max_tokens: Optional[int] = None  # cap regardless of budget (e.g. cost per call)
+
+
+def context_window(model):
+    try:
+        from ..venice.models import get_catalog
+
+        spec = get_catalog().spec(model) or {}
+        window = (spec.get("model_spec") or {}).get("availableContextTokens")
+    except Exception:
+        window = None
+    return int(window or Config.DEFAULT_CONTEXT_TOKENS)
+
+
+def context_budget(model, completion_tokens):
+    window = context_window(model)
+    return max(MIN_BUDGET_TOKENS, int(window * (1 - SAFETY_MARGIN)) - int(completion_tokens or 0))
+
+
+def truncate_tokens(text, limit):
+    """Longest prefix of `text` within `limit` tokens, cut at a line break
+    where one is close, with a marker appended."""
+    total = estimate_tokens(text)
+    if total <= limit:
+        return text
+    if limit <= 0:
+        return ""
+    cut = int(len(text) * limit / total)
+    for _ in range(4):
+        candidate = text[:cut]
+        newline = candidate.rfind("\n")
+        if newline > cut * 0.8:
+            candidate = candidate[:newline]
+        if estimate_tokens(candidate) + 12 <= limit:
+            return candidate.rstrip() + TRUNCATION_MARK
+        cut = int(cut * 0.9)
+    return text[:cut].rstrip() + TRUNCATION_MARK
+
+
+def pack(sections, budget):
+    """Fill sections in priority order. Returns ({name: text}, report) where
+    report lists every section that was cut."""
+    texts, report = {}, []
+    remaining = budget
+    for section in sorted(sections, key=lambda s: s.priority):
+        tokens = estimate_tokens(section.text)
+        allowed = max(0, remaining)
+        if section.max_tokens is not None:
+            allowed = min(allowed, section.max_tokens)
+        text = section.text if tokens <= allowed else truncate_tokens(section.text, allowed)
+        kept = estimate_tokens(text) if text is not section.text else tokens
+        if kept < tokens:
+            report.append({
+                "section": section.name,
+                "tokens": tokens,
+                "keptTokens": kept,
+                "reason": "cap" if section.max_tokens is not None and allowed == section.max_tokens else "context",
+            })
+        texts[section.name] = text
+        remaining -= kept
+    return texts, report
+
+
+def render_packed(template, model, completion_tokens, sections, ledger=None, stage=None, **fields):
+    """render() with `sections` packed into what `model` can take alongside
+    `completion_tokens` of output."""
+    overhead = estimate_tokens(render(template, **fields, **{s.name: "" for s in sections}))
+    budget = context_budget(model, completion_tokens) - overhead
+    texts, report = pack(sections, budget)
+    if report:
+        logger.info("Packed %s for %s: %s", template, model, report)
+        if ledger is not None:
+            ledger.note(stage or template, {"template": template, "model": model, "budget": budget, "cut": report})
+    return render(template, **fields, **texts)
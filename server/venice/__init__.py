@@ -1,5 +1,6 @@
+from .cancel import CancelToken
 from .client import VeniceClient, get_client
-from .errors import RetryableVeniceError, VeniceError
+from .errors import CallCancelled, RetryableVeniceError, VeniceError
 from .models import ModelCatalog, get_catalog
 from .usage import UsageLedger
 
@@ -8,6 +9,8 @@ __all__ = [
     "get_client",
     "VeniceError",
     "RetryableVeniceError",
+    "CallCancelled",
+    "CancelToken",
     "ModelCatalog",
     "get_catalog",
     "UsageLedger",
@@ -0,0 +1,155 @@
+"""Cooperative cancellation for Venice calls.
+
+A CancelToken behaves like a threading.Event (set / is_set / wait) and also
+aborts work that is already in flight: while a client bound to the token is
+inside a call, the connection's socket is registered with the token, and
+set() shuts those sockets down so a blocked read (waiting for a completion or
+the next streamed chunk) fails immediately instead of running to its timeout.
+Callbacks registered with add_callback() run once on set(), e.g. to drop a
+run's queued scheduler tasks.
+"""
+import logging
+import socket
+import threading
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class CancelToken:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._sockets = set()
+        self._callbacks = []
+
+    def is_set(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        return self._event.wait(timeout)
+
+    def set(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            sockets, self._sockets = list(self._sockets), set()
+            callbacks, self._callbacks = list(self._callbacks), []
+        for sock in sockets:
+            _shutdown(sock)
+        for fn in callbacks:
+            try:
+                fn()
+            except Exception:
+                logger.exception("Cancel callback failed")
+
+    def add_callback(self, fn):
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn()
+
+    def _attach(self, sock):
+        with self._lock:
+            if not self._event.is_set():
+                self._sockets.add(sock)
+                return
+        _shutdown(sock)
+
+    def _detach(self, sock):
+        with self._lock:
+            self._sockets.discard(sock)
+
+
+def _shutdown(sock):
+    try:
+        # Base-class shutdown acts on the fd directly, so TLS sockets being
+        # read by another thread are interrupted without touching SSL state.
+        socket.socket.shutdown(sock, socket.SHUT_RDWR)
+    except OSError:
+        pass
+
+
+class cancel_scope:
+    """Bind `token` to the current thread for the duration of one HTTP call;
+    sockets used inside the scope are released when it exits, unless the
+    caller keeps them with hold() (a streaming body read later)."""
+
+    def __init__(self, token):
+        self._token = token
+        self._sockets = []
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = getattr(_local, "scope", None)
+        _local.scope = self
+        return self
+
+    def __exit__(self, *exc):
+        _local.scope = self._previous
+        self.release()
+        return False
+
+    def _attach(self, sock):
+        if self._token is not None:
+            self._sockets.append(sock)
+            self._token._attach(sock)
+
+    def hold(self):
+        """Keep this scope's sockets registered past exit; returns a callable
+        that releases them."""
+        held, self._sockets = self._sockets, []
+        token = self._token
+
+        def release():
+            for sock in held:
+                token._detach(sock)
+
+        return release
+
+    def release(self):
+        for sock in self._sockets:
+            self._token._detach(sock)
+        self._sockets = []
+
+
+class _CancellableMixin:
+    def getresponse(self, *args, **kwargs):
+        scope = getattr(_local, "scope", None)
+        if scope is not None and self.sock is not None:
+            scope._attach(self.sock)
+        return super().getresponse(*args, **kwargs)
+
+
+class _CancellableHTTPConnection(_CancellableMixin, HTTPConnection):
+    pass
+
+
+class _CancellableHTTPSConnection(_CancellableMixin, HTTPSConnection):
+    pass
+
+
+class _CancellableHTTPPool(HTTPConnectionPool):
+    ConnectionCls = _CancellableHTTPConnection
+
+
+class _CancellableHTTPSPool(HTTPSConnectionPool):
+    ConnectionCls = _CancellableHTTPSConnection
+
+
+class CancellableAdapter(HTTPAdapter):
+    """requests adapter whose connections register with the active token."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CancellableHTTPPool,
+            "https": _CancellableHTTPSPool,
+        }
@@ -2,8 +2,10 @@
 
 Wraps chat completions (structured + streaming + search-augmented), web scrape,
 image generation, and model listing. All long operations honor retry/backoff on
-transient failures.
+transient failures. A client bound to a CancelToken (with_cancel) aborts its
+in-flight and pending calls with CallCancelled as soon as the token is set.
 """
+import copy
 import json
 import logging
 import random
@@ -12,13 +14,29 @@ import time
 import requests
 
 from ..config import Config
-from .errors import RetryableVeniceError, VeniceError
+from .cancel import CancellableAdapter, cancel_scope
+from .errors import CallCancelled, RetryableVeniceError, VeniceError
+from .schema import format_path, get_path, outermost, set_path, subschema, validate
 
 logger = logging.getLogger(__name__)
 
 RETRY_STATUSES = {429, 500, 502, 503, 504}
 MAX_ATTEMPTS = 3
 
+# Structured output cut off at max_completion_tokens is continued rather than
+# regenerated, up to this many extra segments
+MAX_CONTINUATIONS = 2
+CONTINUE_PROMPT = (
+    "Your reply was cut off by the length limit. Continue exactly where it stopped: "
+    "output only the remaining characters of the JSON, without repeating anything "
+    "already written and without commentary or code fences."
+)
+
+# Schema repair: fields sent back per request, and the size of that request
+MAX_REPAIR_FIELDS = 12
+REPAIR_COMPLETION_TOKENS = 2000
+REPAIR_VALUE_CHARS = 1500
+
 
 def _extract_json(text):
     """Parse model output as JSON, salvaging embedded objects when the model
@@ -40,28 +58,90 @@ def _extract_json(text):
     return json.loads(text[start : end + 1])
 
 
+def _stitch(partial, continuation):
+    """Ways to join a continuation segment onto truncated output: as is, and
+    with the stretch of the partial output the model repeated dropped (JSON
+    is often repetitive, so the overlap is only a guess the parser settles)."""
+    text = continuation.strip("\n")
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1] if "\n" in text else ""
+    if text.rstrip().endswith("```"):
+        text = text.rstrip()[:-3]
+    joins = [partial + text]
+    for size in range(min(len(partial), len(text), 400), 7, -1):
+        if partial.endswith(text[:size]):
+            joins.append(partial + text[size:])
+            break
+    return joins
+
+
+def _parse_first(candidates):
+    error = None
+    for text in candidates:
+        try:
+            return _extract_json(text)
+        except (VeniceError, json.JSONDecodeError) as exc:
+            error = error or exc
+    raise error
+
+
 class VeniceClient:
     def __init__(self, api_key=None, base_url=None):
         self.api_key = api_key or Config.VENICE_API_KEY
         self.base_url = (base_url or Config.VENICE_BASE_URL).rstrip("/")
         self._session = requests.Session()
         self._session.headers.update({"Authorization": f"Bearer {self.api_key}"})
+        self._session.mount("http://", CancellableAdapter())
+        self._session.mount("https://", CancellableAdapter())
+        self._cancel = None
+
+    def with_cancel(self, token):
+        """A view of this client (sharing its connection pool) whose calls
+        are aborted when `token` is set."""
+        bound = copy.copy(self)
+        bound._cancel = token
+        return bound
+
+    def _check_cancel(self):
+        if self._cancel is not None and self._cancel.is_set():
+            raise CallCancelled("Run cancelled")
+
+    def _backoff(self, seconds):
+        if self._cancel is None:
+            time.sleep(seconds)
+        elif self._cancel.wait(seconds):
+            raise CallCancelled("Run cancelled")
 
     # ------------------------------------------------------------------ http
     def _request(self, method, path, *, json_body=None, timeout=300, stream=False):
+        """Send with retries. For stream=True the connection stays registered
+        with the cancel token until the response is closed."""
         url = f"{self.base_url}{path}"
         last_error = None
         for attempt in range(1, MAX_ATTEMPTS + 1):
+            self._check_cancel()
             try:
-                resp = self._session.request(
-                    method, url, json=json_body, timeout=timeout, stream=stream
-                )
+                with cancel_scope(self._cancel) as scope:
+                    resp = self._session.request(
+                        method, url, json=json_body, timeout=timeout, stream=stream
+                    )
+                    if stream and self._cancel is not None:
+                        release = scope.hold()
+                        close = resp.close
+
+                        def _close(close=close, release=release):
+                            release()
+                            close()
+
+                        resp.close = _close
             except (requests.Timeout, requests.ConnectionError) as exc:
+                self._check_cancel()
                 last_error = RetryableVeniceError(f"{type(exc).__name__} calling {path}")
             else:
                 if resp.status_code < 400:
                     return resp
                 body = resp.text[:2000]
+                resp.close()
                 if resp.status_code in RETRY_STATUSES and attempt < MAX_ATTEMPTS:
                     retry_after = resp.headers.get("Retry-After")
                     last_error = RetryableVeniceError(
@@ -69,10 +149,12 @@ class VeniceClient:
                     )
                     if retry_after:
                         try:
-                            time.sleep(min(float(retry_after), 30))
-                            continue
+                            delay = min(float(retry_after), 30)
                         except ValueError:
                             pass
+                        else:
+                            self._backoff(delay)
+                            continue
                 else:
                     raise VeniceError(
                         f"HTTP {resp.status_code} from {path}: {body}",
@@ -80,7 +162,7 @@ class VeniceClient:
                         body,
                     )
             if attempt < MAX_ATTEMPTS:
-                time.sleep((2 ** attempt) + random.random())
+                self._backoff((2 ** attempt) + random.random())
         raise last_error or VeniceError(f"Request to {path} failed")
 
     # ---------------------------------------------------------------- models
@@ -104,15 +186,35 @@ class VeniceClient:
         venice_params=None,
         ledger=None,
         stage=None,
+        repair=True,
     ):
         """Chat completion constrained to a JSON schema. Returns parsed dict.
 
-        Thinking models can spend the whole completion budget on reasoning,
-        leaving empty content once thinking is stripped — when that happens,
-        retry once with thinking disabled and a larger budget."""
+        Output cut off at the completion budget (finish_reason "length") is
+        continued from where it stopped and stitched, not regenerated; every
+        segment is a separate ledger entry. Thinking models can spend the
+        whole budget on reasoning, leaving empty content once thinking is
+        stripped — when that happens (or stitched output still does not
+        parse), retry once with thinking disabled and a larger budget.
+
+        The parsed output is validated locally against `schema`: cheap
+        deviations are coerced in place, and fields that still fail are sent
+        back in one small repair request rather than discarding the answer."""
         vp = {"strip_thinking_response": True, "include_venice_system_prompt": False}
         vp.update(venice_params or {})
 
+        def segment(payload):
+            resp = self._request("POST", "/chat/completions", json_body=payload)
+            data = resp.json()
+            # Recorded before parsing: output that turns out unusable was
+            # still paid for, and the run's circuit breaker must see it
+            if ledger is not None:
+                ledger.record(stage or schema_name, model, data.get("usage", {}))
+            choices = data.get("choices") or []
+            if not choices:
+                raise VeniceError(f"No choices in response from {model}")
+            return choices[0]
+
         def attempt(params, tokens):
             payload = {
                 "model": model,
@@ -125,25 +227,42 @@ class VeniceClient:
                 },
                 "venice_parameters": params,
             }
-            resp = self._request("POST", "/chat/completions", json_body=payload)
-            data = resp.json()
-            choices = data.get("choices") or []
-            if not choices:
-                raise VeniceError(f"No choices in response from {model}")
-            message = choices[0].get("message", {})
+            choice = segment(payload)
+            message = choice.get("message", {})
             content = message.get("content")
             # Thinking models sometimes leave `content` empty and put the actual
             # answer (or JSON after a <think> block) in `reasoning_content`.
             if not (content or "").strip():
-                content = message.get("reasoning_content") or ""
-            parsed = _extract_json(content)
-            if ledger is not None:
-                ledger.record(stage or schema_name, model, data.get("usage", {}))
-            return parsed
+                return _extract_json(message.get("reasoning_content") or "")
+            candidates, continued = [content], 0
+            while choice.get("finish_reason") == "length" and continued < MAX_CONTINUATIONS:
+                continued += 1
+                choice = segment(
+                    {
+                        "model": model,
+                        "messages": messages + [
+                            {"role": "assistant", "content": candidates[0]},
+                            {"role": "user", "content": CONTINUE_PROMPT},
+                        ],
+                        "temperature": temperature,
+                        "max_completion_tokens": tokens,
+                        "venice_parameters": {**params, "disable_thinking": True},
+                    }
+                )
+                more = choice.get("message", {}).get("content") or ""
+                candidates = list(dict.fromkeys(j for c in candidates for j in _stitch(c, more)))[:4]
+            if continued and ledger is not None:
+                ledger.note(
+                    stage or schema_name,
+                    {"schema": schema_name, "model": model, "continuations": continued},
+                )
+            return _parse_first(candidates)
 
         try:
-            return attempt(vp, max_completion_tokens)
+            parsed = attempt(vp, max_completion_tokens)
         except (VeniceError, json.JSONDecodeError) as exc:
+            if isinstance(exc, CallCancelled):
+                raise
             if isinstance(exc, VeniceError) and exc.status is not None:
                 raise  # HTTP-level failure, not a truncated/empty response
             logger.warning(
@@ -153,7 +272,85 @@ class VeniceClient:
             )
             retry_vp = dict(vp)
             retry_vp["disable_thinking"] = True
-            return attempt(retry_vp, max(max_completion_tokens, 12000))
+            parsed = attempt(retry_vp, max(max_completion_tokens, 12000))
+
+        # Repair requests carry a one-off schema, so it is not kept compiled
+        parsed, errors = validate(schema, parsed, cache=repair)
+        if errors and repair:
+            parsed = self._repair(
+                model, messages, schema_name, schema, parsed, errors,
+                venice_params=vp, ledger=ledger, stage=stage or schema_name,
+            )
+        return parsed
+
+    def _repair(self, model, messages, schema_name, schema, value, errors, *, venice_params, ledger, stage):
+        """Ask `model` for just the fields of `value` that failed validation
+        and splice them in. Never raises for a failed repair: the caller gets
+        the best value available, with the remaining problems logged."""
+        failing = outermost(errors)
+        if any(not path for path, _ in failing):
+            logger.warning("%s from %s does not match its schema: %s", schema_name, model, failing[0][1])
+            return value
+        failing = failing[:MAX_REPAIR_FIELDS]
+        fields, lines = {}, []
+        for i, (path, problem) in enumerate(failing):
+            fields[f"f{i}"] = subschema(schema, path)
+            try:
+                current = json.dumps(get_path(value, path), ensure_ascii=False)
+            except (KeyError, IndexError, TypeError):
+                current = "(missing)"
+            try:
+                parent = json.dumps(get_path(value, path[:-1]), ensure_ascii=False)
+            except (KeyError, IndexError, TypeError):
+                parent = ""
+            lines.append(
+                f"f{i}: `{format_path(path)}` — {problem}\n"
+                f"  current value: {current[:REPAIR_VALUE_CHARS]}\n"
+                f"  enclosing object: {parent[:REPAIR_VALUE_CHARS * 2]}"
+            )
+        task = next((m.get("content") for m in reversed(messages) if m.get("role") == "user"), "")
+        prompt = (
+            "Your earlier JSON answer to the task below was valid except for these fields. "
+            "Return a corrected value for each, consistent with the rest of your answer.\n\n"
+            + "\n\n".join(lines)
+            + f"\n\n## Original task (for reference)\n{str(task)[:4000]}"
+        )
+        repair_schema = {
+            "type": "object",
+            "properties": fields,
+            "required": list(fields),
+            "additionalProperties": False,
+        }
+        try:
+            fixes = self.structured(
+                model,
+                [{"role": "user", "content": prompt}],
+                f"{schema_name}Repair",
+                repair_schema,
+                temperature=0.2,
+                max_completion_tokens=REPAIR_COMPLETION_TOKENS,
+                venice_params={**venice_params, "disable_thinking": True},
+                ledger=ledger,
+                stage=stage,
+                repair=False,
+            )
+        except CallCancelled:
+            raise
+        except Exception as exc:
+            logger.warning("Repair of %s from %s failed (%s); keeping the answer as is", schema_name, model, exc)
+            return value
+        for i, (path, _) in enumerate(failing):
+            if f"f{i}" in fixes:
+                value = set_path(value, path, fixes[f"f{i}"])
+        value, remaining = validate(schema, value)
+        if remaining:
+            logger.warning(
+                "%s from %s still has %d schema problem(s) after repair, first at %s: %s",
+                schema_name, model, len(remaining), format_path(remaining[0][0]), remaining[0][1],
+            )
+        else:
+            logger.info("Repaired %d field(s) of %s from %s", len(failing), schema_name, model)
+        return value
 
     def chat_search(
         self,
@@ -242,22 +439,29 @@ class VeniceClient:
             "venice_parameters": vp,
         }
         resp = self._request("POST", "/chat/completions", json_body=payload, stream=True)
-        for raw_line in resp.iter_lines(decode_unicode=True):
-            if not raw_line or not raw_line.startswith("data:"):
-                continue
-            chunk = raw_line[len("data:") :].strip()
-            if chunk == "[DONE]":
-                break
-            try:
-                event = json.loads(chunk)
-            except json.JSONDecodeError:
-                continue
-            if event.get("usage") and on_usage:
-                on_usage(event["usage"])
-            for choice in event.get("choices", []):
-                delta = choice.get("delta", {}).get("content")
-                if delta:
-                    yield delta
+        try:
+            for raw_line in resp.iter_lines(decode_unicode=True):
+                self._check_cancel()
+                if not raw_line or not raw_line.startswith("data:"):
+                    continue
+                chunk = raw_line[len("data:") :].strip()
+                if chunk == "[DONE]":
+                    break
+                try:
+                    event = json.loads(chunk)
+                except json.JSONDecodeError:
+                    continue
+                if event.get("usage") and on_usage:
+                    on_usage(event["usage"])
+                for choice in event.get("choices", []):
+                    delta = choice.get("delta", {}).get("content")
+                    if delta:
+                        yield delta
+        except requests.RequestException as exc:
+            self._check_cancel()
+            raise RetryableVeniceError(f"Stream from {model} interrupted: {type(exc).__name__}") from exc
+        finally:
+            resp.close()
 
     # ------------------------------------------------------------ web scrape
     def scrape(self, url):
@@ -9,3 +9,7 @@ class VeniceError(Exception):
 
 class RetryableVeniceError(VeniceError):
     """Transient failure (429/5xx/timeouts) worth retrying with backoff."""
+
+
+class CallCancelled(VeniceError):
+    """The call was aborted because its run was cancelled."""
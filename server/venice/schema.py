@@ -0,0 +1,252 @@
+"""Local validation of structured outputs against their JSON schemas.
+
+Strict response_format is a request, not a guarantee: some models return
+JSON that parses but strays from the schema (a list one item short, an enum
+value in the wrong case, a number as a string). compile_schema turns a
+schema into a tree of checker closures once per schema object; the checker
+coerces what can be fixed without the model (type conversions, clamping,
+enum mapping by normalized spelling, trimming arrays, dropping unknown
+keys, defaulting missing nullable fields) and reports the rest as
+(path, problem) pairs for a targeted repair request.
+
+Only the keywords our schemas use are supported: type (including
+["x", "null"]), properties, required, additionalProperties, items, enum,
+minimum, maximum, minItems, maxItems.
+"""
+import re
+import threading
+from collections import OrderedDict
+
+_NUMBER = re.compile(r"-?\d+(?:\.\d+)?")
+_BOOLEANS = {"true": True, "yes": True, "1": True, "false": False, "no": False, "0": False}
+
+MAX_COMPILED = 64  # the module-level response schemas, with room to spare
+
+_compiled = OrderedDict()  # id(schema) -> (schema, checker), least recently used first
+_lock = threading.Lock()
+
+
+def format_path(path):
+    out = ""
+    for part in path:
+        out += f"[{part}]" if isinstance(part, int) else (f".{part}" if out else part)
+    return out or "(root)"
+
+
+def _norm(value):
+    return re.sub(r"[^a-z0-9]", "", str(value).lower())
+
+
+def _types(schema):
+    t = schema.get("type")
+    if t is None:
+        return set()
+    return set(t) if isinstance(t, list) else {t}
+
+
+def _compile(schema):
+    types = _types(schema)
+    nullable = "null" in types
+    kind = next(iter(types - {"null"}), None)
+    checks = []
+
+    if kind == "object":
+        props = {k: _compile(v) for k, v in (schema.get("properties") or {}).items()}
+        required = list(schema.get("required") or [])
+        closed = schema.get("additionalProperties") is False
+        defaults = {}
+        for key in required:
+            sub = (schema.get("properties") or {}).get(key, {})
+            if "null" in _types(sub):
+                defaults[key] = lambda: None
+            elif "array" in _types(sub) and not sub.get("minItems"):
+                defaults[key] = list
+
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                errors.append((path, f"expected an object, got {type(value).__name__}"))
+                return value
+            if closed:
+                for key in [k for k in value if k not in props]:
+                    del value[key]
+            for key in required:
+                if key not in value:
+                    if key in defaults:
+                        value[key] = defaults[key]()
+                    else:
+                        errors.append((path + (key,), "missing required field"))
+            for key, sub in props.items():
+                if key in value:
+                    value[key] = sub(value[key], path + (key,), errors)
+            return value
+
+        checks.append(check_object)
+
+    elif kind == "array":
+        item = _compile(schema["items"]) if "items" in schema else None
+        min_items, max_items = schema.get("minItems"), schema.get("maxItems")
+
+        def check_array(value, path, errors):
+            if not isinstance(value, list):
+                if isinstance(value, (dict, str, int, float)) and not isinstance(value, bool):
+                    value = [value]
+                else:
+                    errors.append((path, f"expected an array, got {type(value).__name__}"))
+                    return value
+            if max_items is not None and len(value) > max_items:
+                del value[max_items:]
+            if item is not None:
+                for i, v in enumerate(value):
+                    value[i] = item(v, path + (i,), errors)
+            if min_items is not None and len(value) < min_items:
+                errors.append((path, f"needs at least {min_items} items, has {len(value)}"))
+            return value
+
+        checks.append(check_array)
+
+    elif kind in ("integer", "number"):
+        lo, hi = schema.get("minimum"), schema.get("maximum")
+
+        def check_number(value, path, errors):
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                match = _NUMBER.search(value) if isinstance(value, str) else None
+                if not match:
+                    errors.append((path, f"expected a {kind}, got {value!r}"[:200]))
+                    return value
+                value = float(match.group())
+            if kind == "integer" and value != int(value):
+                value = round(value)
+            if kind == "integer":
+                value = int(value)
+            if lo is not None and value < lo:
+                value = lo
+            if hi is not None and value > hi:
+                value = hi
+            return value
+
+        checks.append(check_number)
+
+    elif kind == "string":
+
+        def check_string(value, path, errors):
+            if isinstance(value, str):
+                return value
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return str(value)
+            if isinstance(value, list) and all(isinstance(v, str) for v in value):
+                return "; ".join(value)
+            errors.append((path, f"expected a string, got {type(value).__name__}"))
+            return value
+
+        checks.append(check_string)
+
+    elif kind == "boolean":
+
+        def check_boolean(value, path, errors):
+            if isinstance(value, bool):
+                return value
+            mapped = _BOOLEANS.get(str(value).strip().lower())
+            if mapped is None:
+                errors.append((path, f"expected a boolean, got {value!r}"[:200]))
+                return value
+            return mapped
+
+        checks.append(check_boolean)
+
+    if "enum" in schema:
+        allowed = [v for v in schema["enum"] if v is not None]
+        by_norm = {_norm(v): v for v in allowed}
+
+        def check_enum(value, path, errors):
+            if value in allowed or (value is None and nullable):
+                return value
+            key = _norm(value)
+            if key in by_norm:
+                return by_norm[key]
+            # A unique allowed value contained in the answer ("AI Agent
+            # (supervised)") or abbreviated by it ("Med")
+            hits = [v for n, v in by_norm.items() if n and n in key]
+            if not hits and key:
+                hits = [v for n, v in by_norm.items() if n.startswith(key)]
+            if len(hits) == 1:
+                return hits[0]
+            errors.append((path, f"must be one of {', '.join(map(str, allowed))}; got {value!r}"[:300]))
+            return value
+
+        checks.append(check_enum)
+
+    def check(value, path, errors):
+        if value is None:
+            if not nullable and kind is not None:
+                errors.append((path, "must not be null"))
+            return value
+        for fn in checks:
+            before = len(errors)
+            value = fn(value, path, errors)
+            if len(errors) > before:
+                break
+        return value
+
+    return check
+
+
+def compile_schema(schema, cache=True):
+    """Checker for `schema`, compiled once per schema object (an LRU of
+    MAX_COMPILED). Pass cache=False for one-off schemas."""
+    if not cache:
+        return _compile(schema)
+    with _lock:
+        entry = _compiled.get(id(schema))
+        if entry is not None and entry[0] is schema:
+            _compiled.move_to_end(id(schema))
+            return entry[1]
+    checker = _compile(schema)
+    with _lock:
+        _compiled[id(schema)] = (schema, checker)
+        _compiled.move_to_end(id(schema))
+        while len(_compiled) > MAX_COMPILED:
+            _compiled.popitem(last=False)
+    return checker
+
+
+def validate(schema, value, cache=True):
+    """Coerce `value` toward `schema` in place where that is safe. Returns
+    (value, errors), errors being [(path tuple, problem)] left for repair."""
+    errors = []
+    value = compile_schema(schema, cache)(value, (), errors)
+    return value, errors
+
+
+def subschema(schema, path):
+    for part in path:
+        schema = schema["items"] if isinstance(part, int) else schema["properties"][part]
+    return schema
+
+
+def get_path(value, path):
+    for part in path:
+        value = value[part]
+    return value
+
+
+def set_path(value, path, new):
+    if not path:
+        return new
+    parent = get_path(value, path[:-1])
+    parent[path[-1]] = new
+    return value
+
+
+def outermost(errors):
+    """Errors with those inside an already-failing path dropped (repairing
+    the outer value covers them)."""
+    paths = sorted({tuple(p) for p, _ in errors}, key=len)
+    kept = []
+    for path in paths:
+        if not any(path[: len(k)] == k for k in kept):
+            kept.append(path)
+    problems = {}
+    for path, problem in errors:
+        if tuple(path) in kept:
+            problems.setdefault(tuple(path), []).append(problem)
+    return [(path, "; ".join(problems[path])) for path in kept]
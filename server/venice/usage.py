@@ -2,6 +2,8 @@
 
 Pricing comes from the live /models response when available; the ledger keeps
 one entry per API call so per-stage and per-model breakdowns are exact.
+Notes carry per-stage metadata that is not usage, such as prompt sections
+cut to fit a model's context.
 """
 import threading
 
@@ -11,6 +13,7 @@ class UsageLedger:
         # pricing_lookup: callable(model_id) -> {"input": $/Mtok, "output": $/Mtok} or None
         self._pricing_lookup = pricing_lookup
         self._entries = []
+        self._notes = []
         self._lock = threading.Lock()
 
     def record(self, stage, model, usage):
@@ -29,6 +32,27 @@ class UsageLedger:
             )
         return cost
 
+    def note(self, stage, meta):
+        with self._lock:
+            self._notes.append({"stage": stage, **meta})
+
+    def snapshot(self):
+        """Entries and notes as plain dicts, for persisting a parked run."""
+        with self._lock:
+            return {
+                "entries": [dict(e) for e in self._entries],
+                "notes": [dict(n) for n in self._notes],
+            }
+
+    @classmethod
+    def restore(cls, snapshot, pricing_lookup=None):
+        """Inverse of snapshot()."""
+        snapshot = snapshot or {}
+        ledger = cls(pricing_lookup=pricing_lookup)
+        ledger._entries = [dict(e) for e in snapshot.get("entries") or []]
+        ledger._notes = [dict(n) for n in snapshot.get("notes") or []]
+        return ledger
+
     def _cost(self, model, prompt_tokens, completion_tokens):
         pricing = self._pricing_lookup(model) if self._pricing_lookup else None
         if not pricing:
@@ -40,6 +64,7 @@ class UsageLedger:
     def totals(self):
         with self._lock:
             entries = list(self._entries)
+            notes = [dict(n) for n in self._notes]
         by_stage = {}
         for e in entries:
             s = by_stage.setdefault(
@@ -54,13 +79,16 @@ class UsageLedger:
         for s in by_stage.values():
             s["models"] = sorted(s["models"])
             s["cost_usd"] = round(s["cost_usd"], 6)
-        return {
+        totals = {
             "by_stage": by_stage,
             "total_prompt_tokens": sum(e["prompt_tokens"] for e in entries),
             "total_completion_tokens": sum(e["completion_tokens"] for e in entries),
             "total_cost_usd": round(sum(e["cost_usd"] for e in entries), 6),
             "total_calls": len(entries),
         }
+        if notes:
+            totals["notes"] = notes
+        return totals
 
     @property
     def total_cost_usd(self):
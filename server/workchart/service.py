@@ -1,16 +1,25 @@
 """Work Chart v2: server-side generation, clarify→refine flow, revisions, and
-the breakthrough-opportunities (type-2 thinking) layer."""
+the breakthrough-opportunities (type-2 thinking) layer.
+
+When the draft comes back with clarifying questions the flow does not wait
+for the user: it returns a Continuation holding the draft, and the runner
+parks the run until answers arrive (resume_workchart picks it back up)."""
 import json
 import logging
 
-from ..config import Config
 from ..db import engagements as store
+from ..pipeline.events import Continuation
 from ..prompts.loader import render
+from ..prompts.packing import Section, render_packed
+from ..venice.errors import CallCancelled
 from ..venice.models import get_catalog
 from .schemas import BREAKTHROUGH_SCHEMA, GENERATE_SCHEMA, REFINED_SCHEMA, REVISE_SCHEMA
 
 logger = logging.getLogger(__name__)
 
+CHART_COMPLETION_TOKENS = 16000
+BREAKTHROUGH_COMPLETION_TOKENS = 8000
+
 
 def run_workchart(run, client, payload, ledger):
     """Full interactive flow, executed inside the runner thread."""
@@ -48,47 +57,68 @@ def _generate(run, client, model, breakthrough_model, payload, ledger):
         [{"role": "user", "content": prompt}],
         "WorkChartDraft",
         GENERATE_SCHEMA,
-        max_completion_tokens=16000,
+        max_completion_tokens=CHART_COMPLETION_TOKENS,
         ledger=ledger,
         stage="workchart",
     )
     run.emit("chart.draft", {"chart": _public_chart(draft)})
     run.emit("stage.completed", {"stage": "draft", "usage": _usage(ledger)})
+    _check_cancelled(run)
 
     questions = draft.get("questions") or []
-    chart = draft
     if questions:
         run.emit("clarify", {"questions": questions})
-        try:
-            answers = run.wait_for_answers(Config.RUN_ANSWER_TIMEOUT_SECONDS)
-        except TimeoutError:
-            logger.warning("Run %s: no clarifying answers; keeping draft", run.id)
-            answers = None
-        if answers:
-            run.emit("stage.started", {"stage": "refine"})
-            answers_block = "\n".join(
-                f"Q ({q['id']}): {q['question']}\nA: {answers.get(q['id'], 'no answer provided')}"
-                for q in questions
-            )
-            refine_prompt = render(
-                "workchart/refine",
-                process_description=process_description,
-                draft_json=json.dumps(_public_chart(draft))[:40000],
-                answers_block=answers_block,
-            )
-            chart = client.structured(
-                model,
-                [{"role": "user", "content": refine_prompt}],
-                "WorkChartRefined",
-                REFINED_SCHEMA,
-                max_completion_tokens=16000,
-                ledger=ledger,
-                stage="workchart",
-            )
-            chart["questions"] = questions
-            chart["answers"] = answers
-            run.emit("stage.completed", {"stage": "refine", "usage": _usage(ledger)})
+        return Continuation(
+            {
+                "processDescription": process_description,
+                "draft": draft,
+                "questions": questions,
+                "model": model,
+                "breakthroughModel": breakthrough_model,
+            }
+        )
+    return _finalize(run, client, breakthrough_model, draft, process_description, ledger)
+
+
+def resume_workchart(run, client, state, answers, ledger):
+    """Continue a parked draft. `answers` is None when the wait timed out."""
+    draft, questions = state["draft"], state["questions"]
+    process_description = state["processDescription"]
+    chart = draft
+    if answers is None:
+        logger.warning("Run %s: no clarifying answers; keeping draft", run.id)
+    elif answers:
+        run.emit("stage.started", {"stage": "refine"})
+        answers_block = "\n".join(
+            f"Q ({q['id']}): {q['question']}\nA: {answers.get(q['id'], 'no answer provided')}"
+            for q in questions
+        )
+        refine_prompt = render_packed(
+            "workchart/refine",
+            state["model"],
+            CHART_COMPLETION_TOKENS,
+            [Section("draft_json", json.dumps(_public_chart(draft)))],
+            ledger=ledger,
+            stage="workchart",
+            process_description=process_description,
+            answers_block=answers_block,
+        )
+        chart = client.structured(
+            state["model"],
+            [{"role": "user", "content": refine_prompt}],
+            "WorkChartRefined",
+            REFINED_SCHEMA,
+            max_completion_tokens=CHART_COMPLETION_TOKENS,
+            ledger=ledger,
+            stage="workchart",
+        )
+        chart["questions"] = questions
+        chart["answers"] = answers
+        run.emit("stage.completed", {"stage": "refine", "usage": _usage(ledger)})
+    return _finalize(run, client, state["breakthroughModel"], chart, process_description, ledger)
 
+
+def _finalize(run, client, breakthrough_model, chart, process_description, ledger):
     chart["breakthroughOpportunities"] = _breakthroughs(
         run, client, breakthrough_model, chart, process_description, ledger
     )
@@ -108,9 +138,13 @@ def _revise(run, client, model, breakthrough_model, payload, instruction, ledger
     process_description = current_chart.get("processDescription", "")
     run.emit("run.started", {"runId": run.id, "mode": "workchart", "stages": ["revise", "breakthrough"]})
     run.emit("stage.started", {"stage": "revise"})
-    prompt = render(
+    prompt = render_packed(
         "workchart/revise",
-        chart_json=json.dumps(_public_chart(current_chart))[:60000],
+        model,
+        CHART_COMPLETION_TOKENS,
+        [Section("chart_json", json.dumps(_public_chart(current_chart)))],
+        ledger=ledger,
+        stage="workchart",
         instruction=instruction,
     )
     revised = client.structured(
@@ -118,7 +152,7 @@ def _revise(run, client, model, breakthrough_model, payload, instruction, ledger
         [{"role": "user", "content": prompt}],
         "WorkChartRevised",
         REVISE_SCHEMA,
-        max_completion_tokens=16000,
+        max_completion_tokens=CHART_COMPLETION_TOKENS,
         ledger=ledger,
         stage="workchart",
     )
@@ -134,17 +168,23 @@ def _revise(run, client, model, breakthrough_model, payload, instruction, ledger
 
 
 def _breakthroughs(run, client, model, chart, process_description, ledger):
+    _check_cancelled(run)
     run.emit("stage.started", {"stage": "breakthrough"})
-    prompt = render(
+    chart_json = json.dumps(
+        {
+            "currentProcess": chart.get("currentProcess"),
+            "futureProcess": chart.get("futureProcess"),
+            "deltas": chart.get("deltas"),
+            "agentFactory": chart.get("agentFactory"),
+        }
+    )
+    prompt = render_packed(
         "workchart/breakthrough",
-        chart_json=json.dumps(
-            {
-                "currentProcess": chart.get("currentProcess"),
-                "futureProcess": chart.get("futureProcess"),
-                "deltas": chart.get("deltas"),
-                "agentFactory": chart.get("agentFactory"),
-            }
-        )[:50000],
+        model,
+        BREAKTHROUGH_COMPLETION_TOKENS,
+        [Section("chart_json", chart_json)],
+        ledger=ledger,
+        stage="breakthrough",
         process_description=process_description,
     )
     try:
@@ -153,12 +193,14 @@ def _breakthroughs(run, client, model, chart, process_description, ledger):
             [{"role": "user", "content": prompt}],
             "BreakthroughOpportunities",
             BREAKTHROUGH_SCHEMA,
-            max_completion_tokens=8000,
+            max_completion_tokens=BREAKTHROUGH_COMPLETION_TOKENS,
             temperature=0.9,
             ledger=ledger,
             stage="breakthrough",
         )
         opportunities = result.get("opportunities", [])
+    except CallCancelled:
+        raise
     except Exception:
         logger.exception("Breakthrough generation failed; chart proceeds without it")
         opportunities = []
@@ -167,6 +209,11 @@ def _breakthroughs(run, client, model, chart, process_description, ledger):
     return opportunities
 
 
+def _check_cancelled(run):
+    if run.cancel_requested.is_set():
+        raise CallCancelled("Run cancelled")
+
+
 def _public_chart(chart):
     return {k: v for k, v in chart.items() if k != "answers" or v}
 
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Anything that touches SQLite during the tests does so in a scratch directory
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="aipartner-tests-"))
+
+
+@pytest.fixture
+def venice(monkeypatch):
+    """A VeniceClient whose HTTP layer replays `client.replies` — message
+    contents, or (content, finish_reason) pairs — and records each request
+    body in `client.payloads`."""
+    from server.venice.client import VeniceClient
+
+    client = VeniceClient(api_key="test", base_url="http://venice.test")
+    client.replies, client.payloads = [], []
+
+    class Response:
+        def __init__(self, content, finish_reason="stop"):
+            self.data = {
+                "choices": [{"message": {"content": content}, "finish_reason": finish_reason}],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5},
+            }
+
+        def json(self):
+            return self.data
+
+    def request(method, path, *, json_body=None, **kwargs):
+        client.payloads.append(json_body)
+        reply = client.replies.pop(0)
+        return Response(*reply) if isinstance(reply, tuple) else Response(reply)
+
+    monkeypatch.setattr(client, "_request", request)
+    return client
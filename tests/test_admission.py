@@ -0,0 +1,131 @@
+import pytest
+
+from server.pipeline import admission
+from server.pipeline.admission import AdmissionController, QueueFullError
+
+
+class FakeRun:
+    def __init__(self, run_id, mode="deep_dive"):
+        self.id = run_id
+        self.mode = mode
+        self.engagement_id = 1
+        self.status = "running"
+        self.events = []
+
+    def emit(self, kind, data):
+        self.events.append((kind, data))
+
+
+class FakeRunStore:
+    def __init__(self, controller=None, timings=None):
+        self.controller = controller
+        self.timings = timings or {}
+        self.queued = []
+        self.lookups = 0
+
+    def enqueue_run(self, run_id, engagement_id, mode, rank, payload):
+        self.queued.append(run_id)
+
+    def dequeue_run(self, run_id):
+        if run_id in self.queued:
+            self.queued.remove(run_id)
+
+    def average_stage_timings(self, mode):
+        # ETA lookups hit SQLite, so they must never run under the lock
+        assert not self.controller._lock.locked()
+        self.lookups += 1
+        return self.timings.get(mode, {})
+
+
+@pytest.fixture
+def make(monkeypatch):
+    def make(max_running=1, max_queued=2, timings=None):
+        controller = AdmissionController(max_running, max_queued)
+        store = FakeRunStore(controller, timings)
+        monkeypatch.setattr(admission, "run_store", store)
+        return controller, store
+
+    return make
+
+
+def _submit(controller, run, started, priority="batch"):
+    controller.reserve()
+    controller.submit(run, lambda: started.append(run.id), priority)
+
+
+def test_queue_order_interactive_first_then_fifo(make):
+    controller, store = make(max_running=1, max_queued=3)
+    started = []
+    runs = [FakeRun("a"), FakeRun("b"), FakeRun("c"), FakeRun("d", mode="quick_pulse")]
+    for run, priority in zip(runs, ["batch", "batch", "batch", "interactive"]):
+        _submit(controller, run, started, priority)
+    assert started == ["a"]
+    assert [r.status for r in runs[1:]] == ["queued"] * 3
+    assert store.queued == ["b", "c", "d"]
+    for run_id in ("a", "d", "b"):
+        controller.finished(next(r for r in runs if r.id == run_id))
+    assert started == ["a", "d", "b", "c"]
+    assert store.queued == []
+
+
+def test_full_queue_raises_with_retry_after(make):
+    controller, _ = make(max_running=1, max_queued=1, timings={"deep_dive": {"run": 120}})
+    started = []
+    _submit(controller, FakeRun("a"), started)
+    _submit(controller, FakeRun("b"), started)
+    with pytest.raises(QueueFullError) as excinfo:
+        controller.reserve()
+    assert 1 <= excinfo.value.retry_after <= 600
+
+
+def test_reservations_count_against_capacity(make):
+    controller, _ = make(max_running=1, max_queued=0)
+    controller.reserve()
+    with pytest.raises(QueueFullError):
+        controller.reserve()
+    controller.release_reservation()
+    controller.reserve()
+
+
+def _last_queued(run):
+    return [data for kind, data in run.events if kind == "run.queued"][-1]
+
+
+def test_etas_follow_historical_run_durations(make):
+    controller, store = make(max_running=1, max_queued=3, timings={"deep_dive": {"run": 100}})
+    started = []
+    runs = [FakeRun(f"r{i}") for i in range(3)]
+    for run in runs:
+        _submit(controller, run, started)
+    first, second = _last_queued(runs[1]), _last_queued(runs[2])
+    assert (first["position"], second["position"]) == (1, 2)
+    assert 99 <= first["etaSeconds"] <= 100
+    assert 199 <= second["etaSeconds"] <= 200
+    assert store.lookups == 1  # cached for TIMINGS_TTL_SECONDS
+
+
+def test_etas_fall_back_to_stage_sums_and_default(make):
+    controller, _ = make(max_running=1, max_queued=3, timings={"deep_dive": {"architect": 20, "insights": 40}})
+    started = []
+    a, b, c = FakeRun("a"), FakeRun("b", mode="board_meeting"), FakeRun("c")
+    for run in (a, b, c):
+        _submit(controller, run, started)
+    # deep_dive: no whole-run timing, so its stages are summed; board_meeting
+    # has no history at all
+    assert 59 <= _last_queued(b)["etaSeconds"] <= 60
+    assert _last_queued(c)["etaSeconds"] == pytest.approx(
+        _last_queued(b)["etaSeconds"] + admission.Config.DEFAULT_RUN_SECONDS, abs=1
+    )
+
+
+def test_cancel_removes_a_queued_run(make):
+    controller, store = make(max_running=1, max_queued=2)
+    started = []
+    a, b = FakeRun("a"), FakeRun("b")
+    _submit(controller, a, started)
+    _submit(controller, b, started)
+    assert controller.cancel(b) is True
+    assert controller.cancel(a) is False  # running, not queued
+    controller.finished(a)
+    assert started == ["a"]
+    assert store.queued == []
@@ -0,0 +1,126 @@
+import pytest
+
+from server.pipeline.architect import UnusableBlueprint, apportion, postprocess_blueprint
+
+
+def _disc(name, count, industries=()):
+    return {
+        "name": name,
+        "count": count,
+        "rationale": f"{name} matters.",
+        "industries": list(industries),
+        "seniorityMix": "mixed",
+    }
+
+
+def _blueprint(disciplines, contrarians=0):
+    return {
+        "disciplines": disciplines,
+        "mandatedContrarians": [{"stance": f"skeptic {i}", "rationale": "r"} for i in range(contrarians)],
+        "coverageNotes": "",
+    }
+
+
+def _seats(result):
+    return {d["name"]: d["count"] for d in result["disciplines"]}
+
+
+@pytest.mark.parametrize(
+    "weights, total, minimums, expected",
+    [
+        ([1, 1, 1], 10, [1, 1, 1], [4, 3, 3]),
+        ([5, 3, 2], 10, [1, 1, 1], [5, 3, 2]),
+        ([50, 30, 20], 10, [1, 1, 1], [5, 3, 2]),
+        ([8, 1, 1], 6, [1, 1, 1], [4, 1, 1]),
+        ([1, 10], 5, [3, 1], [3, 2]),  # a minimum above the proportional share
+        ([0, 0], 3, [1, 1], [2, 1]),  # missing weights count as 1
+    ],
+)
+def test_apportion_sums_to_total_and_respects_minimums(weights, total, minimums, expected):
+    seats = apportion(weights, total, minimums)
+    assert seats == expected
+    assert sum(seats) == total
+    assert all(s >= m for s, m in zip(seats, minimums))
+
+
+def test_blueprint_is_rescaled_to_the_panel_size():
+    result = postprocess_blueprint(
+        _blueprint([_disc("Finance", 6), _disc("Operations", 4), _disc("Marketing", 2)]), 6, {}
+    )
+    assert _seats(result) == {"Finance": 3, "Operations": 2, "Marketing": 1}
+    assert result["adjustments"] == ["Rebalanced seats from 12 to 6"]
+
+
+def test_near_duplicate_disciplines_are_merged():
+    result = postprocess_blueprint(
+        _blueprint([
+            _disc("Supply Chain Logistics", 2, ["Retail"]),
+            _disc("Finance", 2),
+            _disc("Logistics and Supply Chain", 2, ["Retail", "Shipping"]),
+        ]),
+        6,
+        {},
+    )
+    assert _seats(result) == {"Supply Chain Logistics": 4, "Finance": 2}
+    merged = result["disciplines"][0]
+    assert merged["industries"] == ["Retail", "Shipping"]
+    assert "Merged Logistics and Supply Chain into Supply Chain Logistics" in result["adjustments"]
+
+
+def test_excluded_domains_drop_disciplines_and_industries():
+    result = postprocess_blueprint(
+        _blueprint([
+            _disc("Finance", 2, ["Banking", "Crypto"]),
+            _disc("Crypto Regulation", 2),
+            _disc("Operations", 2),
+        ]),
+        4,
+        {"excludedDomains": ["crypto"]},
+    )
+    assert set(_seats(result)) == {"Finance", "Operations"}
+    assert result["disciplines"][0]["industries"] == ["Banking"]
+    assert "Dropped Crypto Regulation (excluded domain: crypto)" in result["adjustments"]
+
+
+def test_pinned_experts_get_a_seat():
+    result = postprocess_blueprint(
+        _blueprint([_disc("Finance", 5), _disc("Marketing", 5)]),
+        5,
+        {"pinnedExperts": ["Nurse Practitioner", "finance"]},
+    )
+    seats = _seats(result)
+    assert seats["Nurse Practitioner"] >= 1 and sum(seats.values()) == 5
+    pinned = {d["name"] for d in result["disciplines"] if d.get("pinned")}
+    assert pinned == {"Finance", "Nurse Practitioner"}
+    assert "Added a seat for pinned expert type Nurse Practitioner" in result["adjustments"]
+
+
+def test_first_discipline_hosts_every_contrarian():
+    result = postprocess_blueprint(
+        _blueprint([_disc("Marketing", 1), _disc("Finance", 9)], contrarians=3), 10, {}
+    )
+    assert _seats(result)["Marketing"] >= 3
+    assert len(result["mandatedContrarians"]) == 3
+
+
+def test_contrarians_are_trimmed_to_what_fits():
+    result = postprocess_blueprint(
+        _blueprint([_disc("Marketing", 1), _disc("Finance", 1), _disc("Legal", 1)], contrarians=5), 4, {}
+    )
+    assert _seats(result) == {"Marketing": 2, "Finance": 1, "Legal": 1}
+    assert len(result["mandatedContrarians"]) == 2
+
+
+def test_lightest_unpinned_disciplines_go_when_they_outnumber_seats():
+    result = postprocess_blueprint(
+        _blueprint([_disc("Finance", 3), _disc("Marketing", 1), _disc("Legal", 1), _disc("Operations", 2)]),
+        3,
+        {"pinnedExperts": ["Legal"]},
+    )
+    assert _seats(result) == {"Finance": 1, "Legal": 1, "Operations": 1}
+    assert "Dropped Marketing to fit 3 seats" in result["adjustments"]
+
+
+def test_blueprint_without_usable_disciplines_is_rejected():
+    with pytest.raises(UnusableBlueprint):
+        postprocess_blueprint(_blueprint([_disc("Crypto Trading", 3), _disc("  ", 2)]), 5, {"excludedDomains": ["crypto"]})
@@ -0,0 +1,109 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from server.venice import cancel
+from server.venice.cancel import CancelToken
+from server.venice.client import VeniceClient
+from server.venice.errors import CallCancelled
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """/throttled answers 429 with a long Retry-After; /chat/completions
+    streams one chunk and then stalls until the test ends."""
+
+    protocol_version = "HTTP/1.1"  # chunked, so the chunk is readable at once
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path.endswith("/throttled"):
+            self.send_response(429)
+            self.send_header("Retry-After", "20")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        line = f"data: {json.dumps({'choices': [{'delta': {'content': 'first'}}]})}\n\n".encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+        self.wfile.flush()
+        self.server.stalled.wait(10)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    httpd.daemon_threads = True
+    httpd.stalled = threading.Event()
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_port}"
+    httpd.stalled.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def shutdowns(monkeypatch):
+    calls = []
+    real = cancel._shutdown
+
+    def record(sock):
+        calls.append(sock)
+        real(sock)
+
+    monkeypatch.setattr(cancel, "_shutdown", record)
+    return calls
+
+
+def _set_later(token, seconds=0.3):
+    timer = threading.Timer(seconds, token.set)
+    timer.start()
+    return timer
+
+
+def test_cancel_interrupts_a_retry_backoff(server, shutdowns):
+    token = CancelToken()
+    callbacks = []
+    token.add_callback(lambda: callbacks.append("lane cancelled"))
+    client = VeniceClient(api_key="test", base_url=server).with_cancel(token)
+    _set_later(token)
+    started = time.monotonic()
+    with pytest.raises(CallCancelled):
+        client._request("POST", "/throttled", json_body={})
+    # Retry-After asked for 20s; the wait ends when the token is set
+    assert time.monotonic() - started < 2
+    assert callbacks == ["lane cancelled"]
+    assert shutdowns == []  # the throttled response was already closed
+
+
+def test_cancel_interrupts_a_stalled_stream(server, shutdowns):
+    token = CancelToken()
+    client = VeniceClient(api_key="test", base_url=server).with_cancel(token)
+    stream = client.chat_stream("m", MESSAGES)
+    assert next(stream) == "first"
+    _set_later(token)
+    started = time.monotonic()
+    with pytest.raises(CallCancelled):
+        next(stream)
+    assert time.monotonic() - started < 2
+    # The streaming socket was still registered and was shut down
+    assert len(shutdowns) == 1
+    assert token._sockets == set()
+
+
+def test_a_set_token_stops_calls_before_they_are_sent(server):
+    token = CancelToken()
+    token.set()
+    client = VeniceClient(api_key="test", base_url=server).with_cancel(token)
+    with pytest.raises(CallCancelled):
+        client._request("POST", "/chat/completions", json_body={})
@@ -0,0 +1,68 @@
+import random
+
+import numpy as np
+
+from server.pipeline import clustering
+from server.pipeline.clustering import MAX_K, MIN_K, choose_k, cluster_texts, k_ceiling, spherical_kmeans
+from server.pipeline.textsim import tfidf_matrix
+
+
+def _topics(count, per_topic, seed=0):
+    """Texts drawn from `count` disjoint vocabularies; text i belongs to
+    topic i // per_topic."""
+    rng = random.Random(seed)
+    vocabularies = [[f"topic{t}word{w}" for w in range(8)] for t in range(count)]
+    return [" ".join(rng.sample(vocabularies[t], 7)) for t in range(count) for _ in range(per_topic)]
+
+
+def _pure(labels, per_topic):
+    """Every cluster holds one topic, and every topic one cluster."""
+    pairs = {(i // per_topic, int(label)) for i, label in enumerate(labels)}
+    return len(pairs) == len({t for t, _ in pairs}) == len({label for _, label in pairs})
+
+
+def test_k_ceiling_grows_with_the_corpus_within_bounds():
+    assert k_ceiling(4) == MIN_K
+    assert k_ceiling(50) == 5
+    assert k_ceiling(200) == 10
+    assert k_ceiling(100_000) == MAX_K
+    ceilings = [k_ceiling(n) for n in range(1, 2000, 37)]
+    assert ceilings == sorted(ceilings)
+
+
+def test_spherical_kmeans_recovers_planted_topics():
+    m = tfidf_matrix(_topics(4, 10))
+    labels, centroids = spherical_kmeans(m, 4)
+    assert _pure(labels, 10)
+    assert np.allclose(np.linalg.norm(centroids, axis=1), 1.0, atol=1e-5)
+
+
+def test_choose_k_finds_the_topic_count_below_the_ceiling():
+    m = tfidf_matrix(_topics(4, 15))
+    assert k_ceiling(len(m)) > 4
+    assert choose_k(m) == 4
+
+
+def test_choose_k_goes_past_eight_for_large_corpora(monkeypatch):
+    # More topics than the old fixed cap, scored on a sample
+    monkeypatch.setattr(clustering, "K_SAMPLE", 200)
+    m = tfidf_matrix(_topics(12, 25))
+    assert k_ceiling(len(m)) >= 12
+    assert choose_k(m) == 12
+
+
+def test_choose_k_on_tiny_corpora():
+    assert choose_k(tfidf_matrix(_topics(1, 2))) == 2
+    assert choose_k(tfidf_matrix(_topics(2, 3))) == MIN_K
+    assert cluster_texts([]) == []
+
+
+def test_cluster_texts_ranks_representatives_by_closeness():
+    texts = _topics(3, 8)
+    clusters = cluster_texts(texts, representatives=3)
+    assert len(clusters) == 3
+    for cluster in clusters:
+        assert len({i // 8 for i in cluster["indices"]}) == 1
+        assert len(cluster["representatives"]) == 3
+        assert set(cluster["representatives"]) <= set(cluster["indices"])
+        assert all(term.startswith(f"topic{cluster['indices'][0] // 8}") for term in cluster["terms"])
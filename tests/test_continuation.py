@@ -0,0 +1,80 @@
+import json
+
+from server.venice.client import CONTINUE_PROMPT, MAX_CONTINUATIONS, _parse_first, _stitch
+from server.venice.usage import UsageLedger
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "items": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "items"],
+    "additionalProperties": False,
+}
+MESSAGES = [{"role": "user", "content": "task"}]
+
+
+def _joined(partial, continuation):
+    return _parse_first(_stitch(partial, continuation))
+
+
+def test_stitch_without_overlap_appends_the_continuation():
+    partial = '{"summary": "alpha beta gam'
+    assert _stitch(partial, 'ma", "items": []}') == ['{"summary": "alpha beta gamma", "items": []}']
+    assert _joined(partial, 'ma", "items": []}') == {"summary": "alpha beta gamma", "items": []}
+
+
+def test_stitch_drops_an_exactly_repeated_tail():
+    partial = '{"summary": "done", "items": ["first item", "second'
+    # The model restarted from the last separator instead of continuing
+    continuation = ', "second item"]}'
+    joins = _stitch(partial, continuation)
+    assert joins == [partial + continuation, '{"summary": "done", "items": ["first item", "second item"]}']
+    assert _joined(partial, continuation) == {"summary": "done", "items": ["first item", "second item"]}
+
+
+def test_stitch_keeps_repetition_inside_a_string_literal():
+    # The plain join parses, so text that merely looks repeated is kept
+    partial = '{"summary": "la la la la la la la la'
+    continuation = ' la la la la", "items": []}'
+    assert len(_stitch(partial, continuation)) == 2
+    result = _joined(partial, continuation)
+    assert result["summary"] == " ".join(["la"] * 12)
+
+
+def test_stitch_strips_code_fences_from_the_continuation():
+    partial = '{"summary": "x", "items": ['
+    assert _joined(partial, '```json\n"a"]}\n```') == {"summary": "x", "items": ["a"]}
+
+
+def test_continuations_stop_at_the_cap_and_every_segment_is_recorded(venice):
+    text = json.dumps({"summary": "s", "items": [f"item {i}" for i in range(12)]})
+    size = len(text) // (MAX_CONTINUATIONS + 1) + 1
+    segments = [text[i : i + size] for i in range(0, len(text), size)]
+    assert len(segments) == MAX_CONTINUATIONS + 1
+    venice.replies = [(segment, "length") for segment in segments]
+    ledger = UsageLedger()
+    result = venice.structured("m", MESSAGES, "Answer", SCHEMA, ledger=ledger, stage="s")
+    assert result == json.loads(text)
+    assert len(venice.payloads) == MAX_CONTINUATIONS + 1
+    for payload in venice.payloads[1:]:
+        assert payload["messages"][-1]["content"] == CONTINUE_PROMPT
+        assert payload["venice_parameters"]["disable_thinking"] is True
+    # Each continuation carries the stitched output so far
+    assert venice.payloads[2]["messages"][-2]["content"] == "".join(segments[:2])
+    totals = ledger.totals()
+    assert totals["by_stage"]["s"]["calls"] == MAX_CONTINUATIONS + 1
+    assert totals["notes"] == [{"stage": "s", "schema": "Answer", "model": "m", "continuations": MAX_CONTINUATIONS}]
+
+
+def test_output_still_cut_after_the_cap_is_regenerated(venice):
+    text = json.dumps({"summary": "s", "items": ["a", "b"]})
+    cut = [(text[i * 4 : i * 4 + 4], "length") for i in range(MAX_CONTINUATIONS + 1)]
+    venice.replies = cut + [text]  # the last is the retry with thinking disabled
+    ledger = UsageLedger()
+    result = venice.structured("m", MESSAGES, "Answer", SCHEMA, ledger=ledger)
+    assert result == json.loads(text)
+    assert len(venice.payloads) == MAX_CONTINUATIONS + 2
+    assert venice.payloads[-1]["venice_parameters"]["disable_thinking"] is True
+    assert ledger.totals()["total_calls"] == MAX_CONTINUATIONS + 2
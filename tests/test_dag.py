@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from server.pipeline.dag import TaskGraph
+
+
+def _slow(seconds, value):
+    def fn(inputs):
+        time.sleep(seconds)
+        return value
+
+    return fn
+
+
+def test_hard_dependencies_feed_their_results():
+    graph = TaskGraph(max_workers=2)
+    graph.add("a", lambda inputs: 2)
+    graph.add("b", lambda inputs: 3)
+    graph.add("sum", lambda inputs: inputs["a"] + inputs["b"], deps=["a", "b"])
+    assert graph.run() == {"a": 2, "b": 3, "sum": 5}
+
+
+def test_soft_dependency_is_awaited_until_its_deadline():
+    graph = TaskGraph(max_workers=3)
+    graph.add("fast", _slow(0.05, "brief"))
+    graph.add("slow", _slow(1.0, "late"))
+    deadline = time.monotonic() + 0.3
+    graph.add("with_fast", lambda inputs: inputs["fast"], soft=["fast"], soft_deadline=deadline)
+    started = {}
+
+    def record(inputs):
+        started["at"] = time.monotonic()
+        return inputs["slow"]
+
+    graph.add("with_slow", record, soft=["slow"], soft_deadline=deadline)
+    results = graph.run()
+    assert results["with_fast"] == "brief"
+    # Ran at the deadline without the slow input rather than waiting for it
+    assert results["with_slow"] is None
+    assert deadline <= started["at"] < deadline + 0.3
+    assert results["slow"] == "late"
+
+
+def test_optional_failure_skips_only_its_dependents():
+    graph = TaskGraph(max_workers=2)
+
+    def broken(inputs):
+        raise RuntimeError("planner down")
+
+    graph.add("plan", broken, required=False)
+    graph.add("research", lambda inputs: "briefs", deps=["plan"], required=False)
+    graph.add("expert", lambda inputs: inputs["research"], soft=["research"], soft_deadline=time.monotonic() + 5)
+    results = graph.run()
+    assert "plan" not in results and "research" not in results
+    assert results == {"expert": None}
+
+
+def test_required_failure_aborts_the_graph():
+    graph = TaskGraph(max_workers=2)
+
+    def broken(inputs):
+        raise ValueError("architect failed")
+
+    graph.add("architect", broken)
+    graph.add("personas", lambda inputs: [], deps=["architect"])
+    graph.add("unrelated", _slow(2.0, None))
+    started = time.monotonic()
+    with pytest.raises(ValueError, match="architect failed"):
+        graph.run()
+    # Does not wait for nodes still in flight
+    assert time.monotonic() - started < 1.0
+
+
+def test_nodes_added_while_running_are_scheduled():
+    graph = TaskGraph(max_workers=2)
+
+    def cast(inputs):
+        for i in range(3):
+            graph.add(f"expert:{i}", lambda inputs, i=i: inputs["cast"] * i, deps=["cast"], required=False)
+        time.sleep(0.05)
+        return 10
+
+    graph.add("cast", cast)
+    results = graph.run()
+    assert [results[f"expert:{i}"] for i in range(3)] == [0, 10, 20]
+
+
+def test_duplicate_nodes_are_rejected():
+    graph = TaskGraph(max_workers=1)
+    graph.add("a", lambda inputs: None)
+    with pytest.raises(ValueError):
+        graph.add("a", lambda inputs: None)
+
+
+def test_unresolvable_dependency_is_reported():
+    graph = TaskGraph(max_workers=1)
+    graph.add("orphan", lambda inputs: None, deps=["missing"])
+    with pytest.raises(RuntimeError, match="orphan"):
+        graph.run()
+
+
+def test_cancel_stops_new_nodes_from_starting():
+    graph = TaskGraph(max_workers=2)
+    cancel = threading.Event()
+
+    def first(inputs):
+        cancel.set()
+        return 1
+
+    graph.add("first", first)
+    graph.add("second", lambda inputs: 2, deps=["first"])
+    assert graph.run(cancel_event=cancel) == {"first": 1}
@@ -0,0 +1,37 @@
+import pytest
+
+from server.db import documents as store
+from server.db import init_db
+from server.db.engagements import create_engagement
+from server.pipeline.documents import Retriever, ingest
+from server.pipeline.textsim import features
+
+URL = "https://example.com/pricing"
+
+
+@pytest.fixture
+def engagement():
+    init_db()
+    return create_engagement("board", "Pricing review")
+
+
+def _search(engagement_id, text):
+    return Retriever(engagement_id).search(dict.fromkeys(features(text), 1.0))
+
+
+def test_a_changed_page_replaces_its_previous_version(engagement):
+    first = ingest(engagement, URL, "Plans start at forty dollars a seat.", fmt="markdown", source="scrape")
+    assert first
+    # The unchanged page on the next run is not indexed again
+    assert ingest(engagement, URL, "Plans start at forty dollars a seat.", fmt="markdown", source="scrape") is None
+    second = ingest(engagement, URL, "Plans start at fifty dollars a seat.", fmt="markdown", source="scrape")
+    assert second and second != first
+    assert [(d["id"], d["name"]) for d in store.list_documents(engagement)] == [(second, URL)]
+    # Retrieval only sees the current version of the page
+    assert [h["text"] for h in _search(engagement, "plans dollars seat")] == ["Plans start at fifty dollars a seat."]
+
+
+def test_uploads_with_the_same_name_are_kept_side_by_side(engagement):
+    ingest(engagement, "notes.md", "Churn rose in the third quarter.")
+    ingest(engagement, "notes.md", "Churn fell in the fourth quarter.")
+    assert len(store.list_documents(engagement)) == 2
@@ -0,0 +1,117 @@
+import pytest
+
+from server.prompts import packing
+from server.prompts.packing import (
+    TRUNCATION_MARK,
+    Section,
+    estimate_tokens,
+    pack,
+    render_packed,
+    truncate_tokens,
+)
+from server.venice.usage import UsageLedger
+
+
+def _lines(n, word="insight"):
+    return "\n".join(f"- {word} number {i} about the market" for i in range(n))
+
+
+def test_estimate_tokens_heuristics():
+    assert estimate_tokens("") == estimate_tokens(None) == 0
+    assert estimate_tokens("hello world") == 2
+    assert estimate_tokens("internationalization") == 4  # long words split
+    assert estimate_tokens("123456789") == 3  # three digits per token
+    assert estimate_tokens("a, b.") == 4  # punctuation counts on its own
+    assert estimate_tokens("市场分析") == 4  # one per CJK character
+    assert estimate_tokens("word " * 100) == 100
+
+
+def test_truncate_tokens_cuts_at_a_line_within_the_limit():
+    text = _lines(200)
+    assert truncate_tokens(text, estimate_tokens(text)) == text
+    assert truncate_tokens(text, 0) == ""
+    cut = truncate_tokens(text, 150)
+    assert cut.endswith(TRUNCATION_MARK)
+    assert estimate_tokens(cut) <= 150
+    body = cut[: -len(TRUNCATION_MARK)]
+    assert text.startswith(body) and body.endswith("market")
+
+
+def test_pack_fills_by_priority_and_reports_cuts():
+    keep, spill = _lines(20, "first"), _lines(200, "second")
+    budget = estimate_tokens(keep) + 100
+    texts, report = pack([Section("spill", spill, priority=1), Section("keep", keep, priority=0)], budget)
+    assert texts["keep"] == keep
+    assert estimate_tokens(texts["spill"]) <= 100
+    assert report == [{
+        "section": "spill",
+        "tokens": estimate_tokens(spill),
+        "keptTokens": estimate_tokens(texts["spill"]),
+        "reason": "context",
+    }]
+
+
+def test_pack_applies_section_caps_below_the_budget():
+    text = _lines(100)
+    texts, report = pack([Section("history", text, max_tokens=50)], budget=100_000)
+    assert estimate_tokens(texts["history"]) <= 50
+    assert report[0]["reason"] == "cap"
+    # A section already within its cap is untouched and unreported
+    texts, report = pack([Section("history", "short", max_tokens=50)], budget=100_000)
+    assert texts == {"history": "short"} and report == []
+
+
+@pytest.fixture
+def window(monkeypatch):
+    def set_window(tokens):
+        monkeypatch.setattr(packing, "context_window", lambda model: tokens)
+
+    return set_window
+
+
+def _render(sections, ledger=None):
+    return render_packed(
+        "modes/board_response",
+        "model",
+        500,
+        sections,
+        ledger=ledger,
+        stage="debate",
+        name="Ada",
+        title="CFO",
+        background="",
+        perspective="cost",
+        problem="Should we expand?",
+    )
+
+
+def test_render_packed_fits_the_context_window_and_notes_cuts(window):
+    window(4000)
+    ledger = UsageLedger()
+    history = _lines(2000)
+    prompt = _render(
+        [Section("directed", "Bob: Ada is wrong.", 0), Section("brief", "", 1), Section("history", history, 2)],
+        ledger,
+    )
+    assert "Bob: Ada is wrong." in prompt
+    assert estimate_tokens(prompt) <= packing.context_budget("model", 500)
+    notes = ledger.totals()["notes"]
+    assert [n["stage"] for n in notes] == ["debate"]
+    assert notes[0]["template"] == "modes/board_response"
+    assert [c["section"] for c in notes[0]["cut"]] == ["history"]
+
+
+def test_render_packed_leaves_fitting_prompts_alone(window):
+    window(128_000)
+    ledger = UsageLedger()
+    prompt = _render([Section("directed", "x", 0), Section("brief", "y", 1), Section("history", "z", 2)], ledger)
+    assert TRUNCATION_MARK not in prompt
+    assert "notes" not in ledger.totals()
+
+
+def test_ledger_notes_survive_snapshot_and_restore():
+    ledger = UsageLedger()
+    ledger.record("debate", "model", {"prompt_tokens": 10, "completion_tokens": 5})
+    ledger.note("debate", {"template": "modes/board_response", "cut": []})
+    restored = UsageLedger.restore(ledger.snapshot())
+    assert restored.totals() == ledger.totals()
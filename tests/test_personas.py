@@ -0,0 +1,141 @@
+import random
+import re
+import string
+import threading
+from collections import Counter
+
+import pytest
+
+from server.db import init_db
+from server.pipeline import personas
+from server.pipeline.personas import (
+    MAX_DISCIPLINES_PER_CALL,
+    PERSONA_OUTPUT_TOKENS,
+    SPLIT_SEATS,
+    generate_personas,
+    plan_persona_calls,
+)
+
+
+def _request(name, count, note=""):
+    return {"disc": {"name": name}, "count": count, "seated": [], "note": note}
+
+
+@pytest.mark.parametrize("max_tokens", [3000, 1000, 600])
+def test_plan_covers_every_seat_once_within_the_budget(max_tokens):
+    rng = random.Random(max_tokens)
+    requests = [_request(f"D{i}", rng.randint(1, 13), note=f"note {i}") for i in range(15)]
+    calls = plan_persona_calls(requests, max_tokens=max_tokens)
+    limit = min(personas.MAX_SEATS_PER_CALL, max_tokens // PERSONA_OUTPUT_TOKENS)
+
+    seats = Counter()
+    notes = Counter()
+    for call in calls:
+        assert sum(r["count"] for r in call) * PERSONA_OUTPUT_TOKENS <= max_tokens
+        assert sum(r["count"] for r in call) <= limit
+        assert len(call) <= MAX_DISCIPLINES_PER_CALL
+        names = [r["disc"]["name"] for r in call]
+        assert len(names) == len(set(names))  # never two pieces of one discipline
+        for r in call:
+            assert 1 <= r["count"] <= min(SPLIT_SEATS, limit)
+            seats[r["disc"]["name"]] += r["count"]
+            notes[r["note"]] += 1
+    assert seats == {r["disc"]["name"]: r["count"] for r in requests}
+    # A split discipline's note rides on exactly one of its pieces
+    assert all(notes[r["note"]] == 1 for r in requests)
+
+
+def test_plan_packs_small_disciplines_into_shared_calls():
+    calls = plan_persona_calls([_request(f"D{i}", 1) for i in range(8)])
+    assert [len(call) for call in calls] == [MAX_DISCIPLINES_PER_CALL] * 2
+
+
+def _persona(rng, discipline=None):
+    def words(n):
+        # Random words, so no two profiles look alike to the dedupe
+        return " ".join("".join(rng.choices(string.ascii_lowercase, k=7)) for _ in range(n))
+
+    persona = {
+        "name": words(2).title(),
+        "title": words(3),
+        "background": words(12),
+        "focus_areas": [words(2) for _ in range(3)],
+        "perspective": words(8),
+    }
+    if discipline is not None:
+        persona["discipline"] = discipline
+    return persona
+
+
+class FakeCastingClient:
+    """Answers persona calls with exactly the seats asked for; shared calls
+    whose disciplines are in `fail_groups` raise the first time."""
+
+    def __init__(self, fail_groups=()):
+        self.fail_groups = set(fail_groups)
+        self.calls = []
+        self._rng = random.Random(0)
+        self._lock = threading.Lock()
+
+    def structured(self, model, messages, schema_name, schema, **kwargs):
+        prompt = messages[-1]["content"]
+        with self._lock:
+            if schema_name == "PersonaBatch":
+                count, name = re.search(r'Create exactly (\d+) distinct expert personas for the "(.+?)"', prompt).groups()
+                seats = [(name, int(count))]
+            else:
+                seats = [(name, int(n)) for name, n in re.findall(r"### (.+) — (\d+) persona", prompt)]
+            self.calls.append((schema_name, seats))
+            names = frozenset(name for name, _ in seats)
+            if schema_name == "PersonaGroup" and names in self.fail_groups:
+                self.fail_groups.discard(names)
+                raise RuntimeError("group call failed")
+            tagged = schema_name != "PersonaBatch"
+            return {
+                "personas": [
+                    _persona(self._rng, name if tagged else None) for name, n in seats for _ in range(n)
+                ]
+            }
+
+
+@pytest.fixture(autouse=True)
+def database():
+    init_db()
+
+
+def _blueprint(counts):
+    return {
+        "disciplines": [
+            {"name": name, "count": n, "rationale": "r", "industries": [], "seniorityMix": "mixed"}
+            for name, n in counts.items()
+        ],
+        "mandatedContrarians": [],
+    }
+
+
+def _cast(client, counts):
+    seated = []
+    cast = generate_personas(client, "m", "problem", _blueprint(counts), {}, 4, None, on_persona=seated.append)
+    assert seated == cast
+    return Counter(p["discipline"] for p in cast)
+
+
+def test_every_seat_is_cast_exactly_once():
+    counts = {"Finance": 11, "Marketing": 2, "Legal": 1, "Operations": 3, "Design": 1}
+    client = FakeCastingClient()
+    assert _cast(client, counts) == counts
+    assert all(kind != "PersonaBackfill" for kind, _ in client.calls)
+    # Finance is split, the small disciplines share calls
+    assert sum(1 for _, seats in client.calls if seats[0][0] == "Finance") == 3
+    assert any(len(seats) > 1 for _, seats in client.calls)
+
+
+def test_a_failed_shared_call_is_split_and_retried():
+    counts = {"Marketing": 2, "Legal": 1, "Design": 1}
+    client = FakeCastingClient(fail_groups=[frozenset(counts)])
+    assert _cast(client, counts) == counts
+    kinds = [kind for kind, _ in client.calls]
+    assert kinds[0] == "PersonaGroup"
+    # One per-discipline retry for each seat request of the failed call
+    assert sorted(seats[0] for kind, seats in client.calls[1:]) == sorted(counts.items())
+    assert set(kinds[1:]) == {"PersonaBatch"}
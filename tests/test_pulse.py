@@ -0,0 +1,150 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from server.pipeline.pulse import AdaptiveSampler, PulseAggregator
+
+
+def _entry(stance, discipline="Finance", confidence=3, concern=""):
+    return {
+        "persona": {"name": "x", "discipline": discipline},
+        "stance": stance,
+        "confidence": confidence,
+        "top_concern": concern,
+    }
+
+
+def test_aggregates_and_bootstrap_cis():
+    agg = PulseAggregator(capacity=4)  # forces the arrays to grow
+    stances = [1, 2, 3, 4, 5] * 8 + [4] * 10
+    for i, stance in enumerate(stances):
+        agg.add(_entry(stance, discipline="Finance" if i % 2 else "Ops"))
+    snap = agg.snapshot()
+
+    assert snap["count"] == len(stances)
+    assert snap["distribution"] == {"1": 8, "2": 8, "3": 8, "4": 18, "5": 8}
+    assert snap["mean_stance"] == round(sum(stances) / len(stances), 2)
+    assert snap["support_pct"] == round(100 * 26 / 50, 1)
+    assert snap["oppose_pct"] == round(100 * 16 / 50, 1)
+    low, high = snap["mean_stance_ci"]
+    assert 1 <= low < snap["mean_stance"] < high <= 5
+    low, high = snap["support_pct_ci"]
+    assert low < snap["support_pct"] < high
+    assert set(snap["by_discipline"]) == {"Finance", "Ops"}
+    assert sum(d["n"] for d in snap["by_discipline_ci"].values()) == len(stances)
+
+
+def test_concurrent_adds_each_get_their_own_count():
+    agg = PulseAggregator(capacity=4)
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        counts = list(pool.map(lambda n: agg.add(_entry(n % 5 + 1)), range(400)))
+    # Every step is reached exactly once, so a pulse every k completions
+    # is neither skipped nor repeated
+    assert sorted(counts) == list(range(1, 401))
+
+
+def test_snapshot_is_reproducible_for_the_same_answers():
+    agg = PulseAggregator()
+    for stance in [2, 3, 4, 4, 5, 1, 3]:
+        agg.add(_entry(stance))
+    assert agg.snapshot() == agg.snapshot()
+
+
+def test_ci_narrows_as_answers_accumulate():
+    agg = PulseAggregator()
+    widths = []
+    for n in range(100):
+        agg.add(_entry([2, 3, 4][n % 3]))
+        if n + 1 in (10, 100):
+            widths.append(agg.ci_halfwidth())
+    assert widths[1] < widths[0]
+
+
+def test_unanimous_panel_has_a_zero_width_ci():
+    agg = PulseAggregator()
+    assert agg.ci_halfwidth() is None
+    for _ in range(5):
+        agg.add(_entry(4))
+    assert agg.ci_halfwidth() == 0
+    assert agg.snapshot()["mean_stance_ci"] == [4.0, 4.0]
+
+
+def test_out_of_range_values_are_clamped_and_stanceless_entries_ignored():
+    agg = PulseAggregator()
+    assert agg.add({"persona": {}}) == 0
+    agg.add(_entry(9, confidence="high"))
+    agg.add(_entry(-3))
+    snap = agg.snapshot()
+    assert snap["distribution"]["5"] == 1 and snap["distribution"]["1"] == 1
+    assert snap["by_discipline"] == {"Finance": 3.0}
+
+
+def test_near_duplicate_concerns_are_merged():
+    agg = PulseAggregator()
+    for concern in ["Integration cost is too high", "integration cost is too high!", "Regulatory approval timeline"]:
+        agg.add(_entry(3, concern=concern))
+    counts = {c["text"].lower(): c["count"] for c in agg.snapshot()["concern_counts"]}
+    assert sorted(counts.values()) == [1, 2]
+
+
+def _drive(sampler, agg, personas, stance_of):
+    """Offer every persona, then answer seats as they are issued."""
+    pending = []
+    for i, persona in enumerate(personas):
+        seats, _ = sampler.offer(i, persona)
+        pending.extend(seats)
+    asked = []
+    while pending:
+        index, persona = pending.pop(0)
+        asked.append(index)
+        agg.add(_entry(stance_of(index), discipline=persona["discipline"]))
+        seats, _ = sampler.finished()
+        pending.extend(seats)
+    return asked
+
+
+def test_adaptive_sampler_stops_once_the_ci_is_tight():
+    agg = PulseAggregator()
+    sampler = AdaptiveSampler(agg, tolerance=0.15, min_seats=10, max_seats=100, window=4)
+    personas = [{"discipline": d} for d in ["A", "B", "C", "D"] * 25]
+    asked = _drive(sampler, agg, personas, lambda i: 4)
+    assert sampler.stopped == "converged"
+    assert 10 <= len(asked) < 100
+    # Round-robin: the first window already spans every discipline
+    assert {personas[i]["discipline"] for i in asked[:4]} == {"A", "B", "C", "D"}
+
+
+def test_adaptive_sampler_respects_min_and_max_seats():
+    agg = PulseAggregator()
+    sampler = AdaptiveSampler(agg, tolerance=0.01, min_seats=5, max_seats=12, window=3)
+    personas = [{"discipline": d} for d in ["A", "B"] * 20]
+    asked = _drive(sampler, agg, personas, lambda i: 1 + i % 5)
+    assert sampler.stopped == "max_seats"
+    assert len(asked) == 12
+
+
+def test_adaptive_sampler_does_not_stop_a_panel_the_size_of_the_cap():
+    agg = PulseAggregator()
+    sampler = AdaptiveSampler(agg, tolerance=0.01, min_seats=5, max_seats=12, window=3)
+    personas = [{"discipline": d} for d in ["A", "B"] * 6]
+    asked = _drive(sampler, agg, personas, lambda i: 1 + i % 5)
+    assert len(asked) == 12
+    assert sampler.stopped is None
+    assert sampler.asked == set(range(12))
+
+
+def test_adaptive_sampler_remembers_which_seats_were_asked():
+    agg = PulseAggregator()
+    sampler = AdaptiveSampler(agg, tolerance=0.01, min_seats=2, max_seats=4, window=2)
+    personas = [{"discipline": "A"}] * 6
+    asked = _drive(sampler, agg, personas, lambda i: 1 + i % 5)
+    assert sampler.stopped == "max_seats"
+    assert sampler.asked == set(asked) == {0, 1, 2, 3}
+
+
+def test_adaptive_sampler_keeps_the_window_bounded():
+    agg = PulseAggregator()
+    sampler = AdaptiveSampler(agg, tolerance=0.1, min_seats=20, max_seats=50, window=3)
+    issued = []
+    for i in range(10):
+        seats, _ = sampler.offer(i, {"discipline": "A"})
+        issued.extend(seats)
+    assert len(issued) == 3
@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+from flask import Flask
+
+from server.api.runs import bp
+from server.pipeline.events import REGISTRY
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = Flask(__name__)
+    app.register_blueprint(bp, url_prefix="/api")
+    return app.test_client()
+
+
+def test_negative_since_seq_is_rejected(client):
+    run = REGISTRY.create("deep_dive")
+    run.emit("run.started", {})
+    resp = client.get(f"/api/runs/{run.id}?sinceSeq=-1")
+    assert resp.status_code == 400
+    assert resp.get_json()["error"]["code"] == "bad_request"
+
+
+def test_since_seq_returns_only_later_events(client):
+    run = REGISTRY.create("deep_dive")
+    for i in range(3):
+        run.emit("stage.started", {"stage": str(i)})
+    body = client.get(f"/api/runs/{run.id}?sinceSeq=1").get_json()
+    assert [e["seq"] for e in body["events"]] == [2, 3]
+    assert body["lastSeq"] == 3
+
+
+def test_long_poll_wakes_on_a_status_change_without_events(client):
+    run = REGISTRY.create("deep_dive")
+    run.emit("run.started", {})
+    threading.Timer(0.2, lambda: setattr(run, "status", "waiting_input")).start()
+    started = time.monotonic()
+    body = client.get(f"/api/runs/{run.id}?sinceSeq=1&wait=5").get_json()
+    assert time.monotonic() - started < 2
+    assert body["status"] == "waiting_input" and body["events"] == []
@@ -0,0 +1,120 @@
+import threading
+import time
+
+from server.pipeline.scheduler import PRIORITY_INTERACTIVE, Scheduler
+
+
+def _blocked(scheduler, lane_key):
+    """Occupy the scheduler's only worker until the returned event is set."""
+    gate = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        gate.wait(5)
+
+    with scheduler.lane(lane_key):
+        scheduler.pool(label="block").submit(block)
+    assert started.wait(5)
+    return gate
+
+
+def _run_order(scheduler, submissions):
+    """Submit (lane, priority, label) tasks while the worker is blocked, then
+    release it and return the labels in execution order."""
+    gate = _blocked(scheduler, "blocker")
+    order, futures = [], []
+    for lane, priority, label in submissions:
+        with scheduler.lane(lane, priority=priority):
+            # One worker, so appends never race
+            futures.append(scheduler.pool(label=lane).submit(order.append, label))
+    gate.set()
+    for fut in futures:
+        fut.result(5)
+    return order
+
+
+def test_lanes_share_workers_fairly():
+    scheduler = Scheduler(1)
+    submissions = [("big", "batch", f"big{i}") for i in range(10)]
+    submissions += [("small", "batch", f"small{i}") for i in range(3)]
+    order = _run_order(scheduler, submissions)
+    # The small run queued behind ten big tasks is served alternately, not last
+    assert max(order.index(f"small{i}") for i in range(3)) < 7
+
+
+def test_interactive_lanes_go_first():
+    scheduler = Scheduler(1)
+    submissions = [("deep", "batch", f"batch{i}") for i in range(4)]
+    submissions += [("pulse", PRIORITY_INTERACTIVE, f"pulse{i}") for i in range(2)]
+    order = _run_order(scheduler, submissions)
+    assert order[:2] == ["pulse0", "pulse1"]
+
+
+def test_model_cap_bounds_inflight_calls():
+    scheduler = Scheduler(4, {"capped": 1})
+    lock = threading.Lock()
+    inflight = {"capped": 0, "free": 0}
+    peak = {"capped": 0, "free": 0}
+
+    def call(model):
+        with lock:
+            inflight[model] += 1
+            peak[model] = max(peak[model], inflight[model])
+        time.sleep(0.05)
+        with lock:
+            inflight[model] -= 1
+
+    with scheduler.lane("run"):
+        capped = scheduler.pool(model="capped")
+        free = scheduler.pool(model="free")
+        futures = [capped.submit(call, "capped") for _ in range(4)]
+        futures += [free.submit(call, "free") for _ in range(3)]
+    for fut in futures:
+        fut.result(5)
+    assert peak["capped"] == 1
+    assert peak["free"] > 1
+
+
+def test_pool_max_workers_limits_queued_tasks():
+    scheduler = Scheduler(8)
+    lock = threading.Lock()
+    state = {"now": 0, "peak": 0}
+
+    def call():
+        with lock:
+            state["now"] += 1
+            state["peak"] = max(state["peak"], state["now"])
+        time.sleep(0.02)
+        with lock:
+            state["now"] -= 1
+
+    with scheduler.lane("run"):
+        with scheduler.pool(max_workers=2) as pool:
+            for _ in range(8):
+                pool.submit(call)
+    assert state["peak"] == 2
+
+
+def test_cancel_lane_drops_queued_tasks():
+    scheduler = Scheduler(1)
+    gate = _blocked(scheduler, "run")
+    with scheduler.lane("run"):
+        futures = [scheduler.pool().submit(lambda: None) for _ in range(3)]
+    assert scheduler.cancel_lane("run") == 3
+    gate.set()
+    assert all(f.cancelled() for f in futures)
+
+
+def test_pool_shutdown_withdraws_queued_scheduler_tasks():
+    scheduler = Scheduler(1)
+    gate = _blocked(scheduler, "other")
+    ran = []
+    with scheduler.lane("run"):
+        pool = scheduler.pool()
+        futures = [pool.submit(ran.append, i) for i in range(3)]
+    pool.shutdown(wait=False, cancel_futures=True)
+    gate.set()
+    time.sleep(0.1)
+    assert ran == []
+    assert all(f.cancelled() for f in futures)
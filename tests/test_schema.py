@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from server.venice import schema as schema_module
+from server.venice.schema import compile_schema, outermost, validate
+from server.venice.usage import UsageLedger
+
+INSIGHT = {
+    "type": "object",
+    "properties": {
+        "insight": {"type": "string"},
+        "confidence": {"type": "string", "enum": ["Low", "Medium", "High"]},
+        "score": {"type": "integer", "minimum": 1, "maximum": 5},
+        "actionable": {"type": "boolean"},
+        "caveat": {"type": ["string", "null"]},
+    },
+    "required": ["insight", "confidence", "score", "actionable", "caveat"],
+    "additionalProperties": False,
+}
+ANSWER = {
+    "type": "object",
+    "properties": {
+        "summary": {"type": "string"},
+        "insights": {"type": "array", "items": INSIGHT, "minItems": 2, "maxItems": 3},
+        "sources": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["summary", "insights", "sources"],
+    "additionalProperties": False,
+}
+
+
+def _insight(**overrides):
+    item = {"insight": "x", "confidence": "High", "score": 3, "actionable": True, "caveat": None}
+    item.update(overrides)
+    return item
+
+
+def test_validate_coerces_cheap_deviations():
+    value = {
+        "summary": ["one", "two"],
+        "insights": [
+            _insight(confidence="medium", score="4 out of 5", actionable="yes", extra="dropped"),
+            _insight(confidence="Med", score=9.7),
+            _insight(score=0),
+            _insight(),
+        ],
+        "unknown": 1,
+    }
+    value, errors = validate(ANSWER, value)
+    assert errors == []
+    assert value["summary"] == "one; two"
+    assert value["sources"] == []  # missing array without minItems
+    assert "unknown" not in value
+    first, second, third = value["insights"]  # trimmed to maxItems
+    assert first == _insight(confidence="Medium", score=4)
+    assert (second["confidence"], second["score"]) == ("Medium", 5)
+    assert third["score"] == 1
+
+
+def test_validate_reports_what_it_cannot_fix():
+    value = {
+        "summary": "s",
+        "insights": [{"insight": "x", "confidence": "Maybe", "score": "n/a", "actionable": "perhaps"}],
+        "sources": None,
+    }
+    value, errors = validate(ANSWER, value)
+    problems = {path: problem for path, problem in errors}
+    assert problems[("insights", 0, "confidence")].startswith("must be one of")
+    assert "expected a integer" in problems[("insights", 0, "score")]
+    assert "expected a boolean" in problems[("insights", 0, "actionable")]
+    assert problems[("insights",)] == "needs at least 2 items, has 1"
+    assert problems[("sources",)] == "must not be null"
+    # Missing nullable fields are defaulted rather than reported
+    assert value["insights"][0]["caveat"] is None
+
+
+def test_outermost_drops_errors_nested_in_failing_paths():
+    errors = [(("a",), "bad"), (("a", 0), "worse"), (("b", 1), "x"), (("b", 1), "y")]
+    assert outermost(errors) == [(("a",), "bad"), (("b", 1), "x; y")]
+
+
+def test_compiled_schemas_are_bounded(monkeypatch):
+    monkeypatch.setattr(schema_module, "_compiled", type(schema_module._compiled)())
+    monkeypatch.setattr(schema_module, "MAX_COMPILED", 4)
+    schemas = [{"type": "string"} for _ in range(10)]
+    for s in schemas:
+        compile_schema(s)
+    assert len(schema_module._compiled) == 4
+    assert compile_schema(schemas[-1]) is compile_schema(schemas[-1])
+    compile_schema({"type": "string"}, cache=False)
+    assert len(schema_module._compiled) == 4
+
+
+def test_structured_repairs_only_the_failing_fields(venice):
+    answer = {
+        "summary": "s",
+        "insights": [_insight(), _insight(confidence="Unsure")],
+        "sources": [],
+    }
+    venice.replies = [json.dumps(answer), json.dumps({"f0": "Low"})]
+    ledger = UsageLedger()
+    result = venice.structured("m", [{"role": "user", "content": "task"}], "Answer", ANSWER, ledger=ledger, stage="s")
+    assert result["insights"][1]["confidence"] == "Low"
+    repair = venice.payloads[1]
+    fields = repair["response_format"]["json_schema"]["schema"]["properties"]
+    assert list(fields) == ["f0"]
+    assert fields["f0"]["enum"] == ["Low", "Medium", "High"]
+    assert "insights[1].confidence" in repair["messages"][0]["content"]
+    assert repair["venice_parameters"]["disable_thinking"] is True
+    assert ledger.totals()["by_stage"]["s"]["calls"] == 2
+
+
+def test_structured_keeps_the_answer_when_repair_fails(venice):
+    answer = {"summary": "s", "insights": [_insight(), _insight(score="?")], "sources": []}
+    # The repair call itself is retried once with thinking disabled
+    venice.replies = [json.dumps(answer), "not json at all", "still not json"]
+    result = venice.structured("m", [{"role": "user", "content": "task"}], "Answer", ANSWER)
+    assert result["insights"][1]["score"] == "?"
+    assert len(venice.payloads) == 3
+
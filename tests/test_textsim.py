@@ -0,0 +1,34 @@
+from server.pipeline.textsim import NearDuplicateIndex, near_duplicate_groups
+
+
+def test_near_duplicate_index_joins_the_best_matching_cluster():
+    index = NearDuplicateIndex(threshold=0.5)
+    index.add("cut prices for small teams")
+    close, is_new = index.add("prices for small teams across europe")
+    assert is_new  # 2 of 5 shingles shared
+    # Matches both representatives; the closer one wins, not the older one
+    cid, is_new = index.add("cut prices for small teams across europe")
+    assert (cid, is_new) == (close, False)
+    assert index.top() == [
+        {"text": "prices for small teams across europe", "count": 2},
+        {"text": "cut prices for small teams", "count": 1},
+    ]
+
+
+def test_near_duplicate_index_skips_empty_text():
+    index = NearDuplicateIndex()
+    assert index.add("the and of") == (None, False)
+    assert index.top() == []
+
+
+def test_near_duplicate_groups_follow_their_leaders():
+    texts = [
+        "expand into the german market next year",
+        "hire a regional sales lead",
+        "expand into the german market next spring",
+        "hire one regional sales lead",
+        "renegotiate the warehouse lease",
+    ]
+    assert near_duplicate_groups(texts, threshold=0.6) == [[0, 2], [1, 3], [4]]
+    # Small blocks give the same answer
+    assert near_duplicate_groups(texts, threshold=0.6, block=2) == [[0, 2], [1, 3], [4]]
@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from server.pipeline import synthesis
+from server.pipeline.clustering import cluster_texts
+from server.pipeline.themes import MAX_THEMES, ThemeBuilder
+
+CORES = {
+    "pricing": "subscription pricing tiers for enterprise customers",
+    "hiring": "hiring senior engineers in a tight labor market",
+    "supply": "supplier shipping delays through congested ports",
+}
+ANGLES = ["Raise", "Rethink", "Benchmark", "Monitor", "Simplify", "Test"]
+TOPICS = {topic: [f"{angle} {core}" for angle in ANGLES] for topic, core in CORES.items()}
+
+
+def _entries():
+    """One expert per topic line, insights labelled with their topic."""
+    entries = []
+    for topic, texts in TOPICS.items():
+        for n, text in enumerate(texts):
+            entries.append({
+                "persona": {"name": f"{topic}-{n}", "title": "Expert", "discipline": topic},
+                "insights_and_analysis": [
+                    {"insight": text, "supporting_reasoning": text, "confidence_level": "High"}
+                ],
+            })
+    # Interleave topics, as answers land in no particular order
+    return [entries[i] for k in range(6) for i in (k, 6 + k, 12 + k)]
+
+
+@pytest.fixture
+def fake_synthesis(monkeypatch):
+    calls = {"summaries": [], "named": 0}
+
+    def summarize_theme(client, model, problem, label, lines, ledger):
+        calls["summaries"].append(len(lines))
+        return f"summary of {len(lines)} insights"
+
+    def name_themes(client, model, problem, clusters, lines, ledger):
+        calls["named"] += 1
+        return {n: {"name": f"Named {n}", "description": ""} for n in range(len(clusters))}
+
+    monkeypatch.setattr(synthesis, "summarize_theme", summarize_theme)
+    monkeypatch.setattr(synthesis, "name_themes", name_themes)
+    return calls
+
+
+def _builder(emitted):
+    pool = ThreadPoolExecutor(max_workers=2)
+    return ThemeBuilder(None, "model", "problem", None, pool, emit=emitted.append), pool
+
+
+def test_cluster_texts_separates_distinct_topics():
+    texts = [t for texts in TOPICS.values() for t in texts]
+    clusters = cluster_texts(texts, min_k=3, max_k=3)
+    assert sorted(i for c in clusters for i in c["indices"]) == list(range(len(texts)))
+    assert [len(c["indices"]) for c in clusters] == sorted((len(c["indices"]) for c in clusters), reverse=True)
+    for cluster in clusters:
+        topics = {i // 6 for i in cluster["indices"]}
+        assert len(topics) == 1
+        assert set(cluster["representatives"]) <= set(cluster["indices"])
+
+
+def test_themes_form_and_summarize_while_answers_arrive(fake_synthesis):
+    emitted = []
+    builder, pool = _builder(emitted)
+    for entry in _entries():
+        builder.add_entry(entry)
+    builder._drain()
+    # Summaries were produced before finish() was called
+    assert emitted and fake_synthesis["summaries"]
+    digest = builder.finish()
+    pool.shutdown()
+
+    assert 2 <= len(builder._themes) <= MAX_THEMES
+    assert digest.count("### Theme:") == len(builder._themes)
+    assert fake_synthesis["named"] == 1
+    # Every line lands in exactly one theme, and each theme stays on topic
+    members = [i for t in builder._themes for i in t.members]
+    assert sorted(members) == list(range(len(builder._lines)))
+    for theme in builder._themes:
+        topics = [builder._lines[i]["name"].split("-")[0] for i in theme.members]
+        assert len(set(topics)) == 1
+
+
+def test_finish_without_insights_returns_none(fake_synthesis):
+    builder, pool = _builder([])
+    assert builder.finish() is None
+    pool.shutdown()
+
+
+def test_theme_naming_failure_falls_back_to_terms(fake_synthesis, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("naming down")
+
+    monkeypatch.setattr(synthesis, "name_themes", broken)
+    builder, pool = _builder([])
+    for entry in _entries():
+        builder.add_entry(entry)
+    digest = builder.finish()
+    pool.shutdown()
+    assert digest and "Named" not in digest
+    assert digest.count("### Theme:") == len(builder._themes)
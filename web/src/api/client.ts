@@ -17,6 +17,7 @@ export interface ModeInfo {
   description: string
   status: 'available' | 'coming_soon'
   flow: 'panel' | 'board' | 'workchart'
+  quantitative?: boolean
   defaults: { panelSize: number; maxPanelSize: number }
 }
 
@@ -81,7 +82,8 @@ export const api = {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify(body),
     }).then((r) => json<{ runId: string; engagementId: number; estimate: Estimate }>(r)),
-  getRun: (runId: string) => fetch(`/api/runs/${runId}`).then((r) => json<{ status: string; events: RunEvent[] }>(r)),
+  getRun: (runId: string) =>
+    fetch(`/api/runs/${runId}`).then((r) => json<{ status: string; lastSeq: number; events: RunEvent[] }>(r)),
   answer: (runId: string, answers: Record<string, string>) =>
     fetch(`/api/runs/${runId}/answers`, {
       method: 'POST',
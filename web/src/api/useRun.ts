@@ -14,6 +14,7 @@ export interface MarketBrief {
   channel: string
   findings: string
   citations: { index: number; url: string; title: string }[]
+  provenance?: { source: 'live' | 'cache' | 'failed'; cachedAt?: string; ageHours?: number }
 }
 
 export interface BoardTurn {
@@ -39,7 +40,7 @@ export interface ActivityItem {
 }
 
 export interface RunState {
-  status: 'connecting' | 'running' | 'waiting_input' | 'completed' | 'failed'
+  status: 'connecting' | 'queued' | 'running' | 'waiting_input' | 'completed' | 'failed' | 'cancelled'
   stages: string[]
   currentStage?: string
   completedStages: string[]
@@ -49,11 +50,14 @@ export interface RunState {
   market: MarketBrief[]
   marketTopics: MarketTopic[]
   boardTurns: BoardTurn[]
+  /** Turns still being spoken, keyed `${round}:${speaker}` (from board.delta). */
+  liveTurns: Record<string, BoardTurn>
   activity: ActivityItem[]
   clarifyQuestions: { id: string; question: string; why: string }[] | null
   chart?: Record<string, unknown>
   aggregates?: Record<string, unknown>
   totalCostUsd: number
+  queue?: { position: number; queueLength: number; etaSeconds?: number }
   engagementId?: number
   error?: string
 }
@@ -67,6 +71,7 @@ const initial = (): RunState => ({
   market: [],
   marketTopics: [],
   boardTurns: [],
+  liveTurns: {},
   activity: [],
   clarifyQuestions: null,
   totalCostUsd: 0,
@@ -88,6 +93,13 @@ function log(state: RunState, item: Omit<ActivityItem, 'id' | 'at'>): ActivityIt
 function reduce(state: RunState, event: RunEvent): RunState {
   const d = event.data as Record<string, any>
   switch (event.type) {
+    case 'run.queued':
+      return {
+        ...state,
+        status: 'queued',
+        queue: { position: d.position, queueLength: d.queueLength, etaSeconds: d.etaSeconds },
+        activity: state.queue ? state.activity : log(state, { icon: '⧗', text: `Queued — position ${d.position}`, tone: 'info' }),
+      }
     case 'run.started':
       return { ...state, status: 'running', stages: (d.stages as string[]) ?? [], activity: log(state, { icon: '✦', text: 'Engagement started', tone: 'info' }) }
     case 'stage.started':
@@ -128,10 +140,15 @@ function reduce(state: RunState, event: RunEvent): RunState {
     }
     case 'market.completed': {
       const marketTopics = state.marketTopics.map((t) => (t.title === d.topic ? { ...t, done: true } : t))
-      return { ...state, market: [...state.market, d as MarketBrief], marketTopics, activity: log(state, { icon: d.channel === 'x' ? '𝕏' : '⌕', text: `Researched: ${d.topic}`, detail: `${(d.citations ?? []).length} sources cited`, tone: 'search' }) }
+      return { ...state, market: [...state.market, d as MarketBrief], marketTopics, activity: log(state, { icon: d.channel === 'x' ? '𝕏' : '⌕', text: `Researched: ${d.topic}`, detail: `${(d.citations ?? []).length} sources cited${d.provenance?.source === 'cache' ? ` · cached ${d.provenance.ageHours}h ago` : ''}`, tone: 'search' }) }
+    }
+    case 'board.delta':
+      return { ...state, liveTurns: { ...state.liveTurns, [`${d.round}:${d.speaker}`]: { round: d.round, speaker: d.speaker, statement: d.text } } }
+    case 'board.turn': {
+      const liveTurns = { ...state.liveTurns }
+      delete liveTurns[`${d.round}:${d.speaker}`]
+      return { ...state, boardTurns: [...state.boardTurns, d as BoardTurn], liveTurns, activity: log(state, { icon: '❝', text: `${d.speaker} spoke (round ${d.round})`, tone: 'expert' }) }
     }
-    case 'board.turn':
-      return { ...state, boardTurns: [...state.boardTurns, d as BoardTurn], activity: log(state, { icon: '❝', text: `${d.speaker} spoke (round ${d.round})`, tone: 'expert' }) }
     case 'clarify':
       return { ...state, status: 'waiting_input', clarifyQuestions: d.questions, activity: log(state, { icon: '?', text: 'Awaiting your answers', tone: 'info' }) }
     case 'chart.draft':
@@ -142,6 +159,10 @@ function reduce(state: RunState, event: RunEvent): RunState {
       return { ...state, chart: state.chart ? { ...state.chart, breakthroughOpportunities: d.opportunities } : state.chart, activity: log(state, { icon: '✧', text: `${(d.opportunities ?? []).length} breakthrough opportunities identified`, tone: 'good' }) }
     case 'pulse.batch':
       return { ...state, aggregates: d.aggregates }
+    case 'synthesis.theme':
+      return { ...state, activity: log(state, { icon: '❖', text: `Theme drafted: ${d.label}`, detail: `${d.insights} insights so far`, tone: 'good' }) }
+    case 'pulse.stopped':
+      return { ...state, activity: log(state, { icon: '◎', text: d.stopReason === 'converged' ? 'Pulse converged — no more seats asked' : 'Seat limit reached', detail: d.label, tone: 'good' }) }
     case 'run.completed':
       return {
         ...state,
@@ -152,6 +173,14 @@ function reduce(state: RunState, event: RunEvent): RunState {
       }
     case 'run.error':
       return { ...state, status: 'failed', error: d.message, activity: log(state, { icon: '!', text: `Failed: ${d.message}`, tone: 'info' }) }
+    case 'run.cancelled':
+      return {
+        ...state,
+        status: 'cancelled',
+        engagementId: d.engagementId,
+        totalCostUsd: d.usage?.total_cost_usd ?? state.totalCostUsd,
+        activity: log(state, { icon: '■', text: 'Run cancelled', tone: 'info' }),
+      }
     default:
       return state
   }
@@ -169,22 +198,34 @@ export function useRun(runId: string | null) {
     let closed = false
 
     const connect = () => {
-      source = new EventSource(`/api/runs/${runId}/events?lastEventId=${lastSeq.current}`)
-      const handle = (e: MessageEvent, type: string) => {
-        const seq = Number((e as MessageEvent).lastEventId || 0)
-        if (seq) lastSeq.current = seq
-        const event: RunEvent = { seq, type, data: JSON.parse(e.data) }
-        setState((s) => reduce(s, event))
-        if (type === 'run.completed' || type === 'run.error') {
+      // batch=250ms: the server coalesces bursts (large panels emit hundreds
+      // of events) into one frame, reduced here in a single state update.
+      source = new EventSource(`/api/runs/${runId}/events?lastEventId=${lastSeq.current}&batch=250ms`)
+      const apply = (events: RunEvent[]) => {
+        setState((s) => events.reduce(reduce, s))
+        if (events.some((ev) => ev.type === 'run.completed' || ev.type === 'run.error' || ev.type === 'run.cancelled')) {
           closed = true
           source?.close()
         }
       }
+      const handle = (e: MessageEvent, type: string) => {
+        // Ephemeral events (board.delta) carry no id; lastEventId then
+        // still holds the previous frame's id, which is harmless here.
+        const seq = Number((e as MessageEvent).lastEventId || 0)
+        if (seq) lastSeq.current = seq
+        apply([{ seq, type, data: JSON.parse(e.data) }])
+      }
+      source.addEventListener('batch', (e) => {
+        const msg = e as MessageEvent
+        const seq = Number(msg.lastEventId || 0)
+        if (seq) lastSeq.current = seq
+        apply((JSON.parse(msg.data).events ?? []) as RunEvent[])
+      })
       const types = [
-        'run.started', 'stage.started', 'stage.completed', 'blueprint.ready',
+        'run.queued', 'run.started', 'stage.started', 'stage.completed', 'blueprint.ready',
         'persona.created', 'expert.started', 'expert.completed', 'market.planned',
-        'market.completed', 'board.turn', 'clarify', 'chart.draft', 'chart.final',
-        'breakthrough.ready', 'pulse.batch', 'run.completed', 'run.error',
+        'market.completed', 'board.delta', 'board.turn', 'clarify', 'chart.draft', 'chart.final',
+        'breakthrough.ready', 'pulse.batch', 'pulse.stopped', 'synthesis.theme', 'run.completed', 'run.error', 'run.cancelled',
       ]
       for (const t of types) source.addEventListener(t, (e) => handle(e as MessageEvent, t))
       source.onerror = () => {
@@ -12,8 +12,20 @@ export interface PulseAggregates {
   oppose_pct: number
   by_discipline: Record<string, number>
   top_concerns: string[]
+  // 95% bootstrap intervals (absent on results saved before they existed)
+  mean_stance_ci?: [number, number]
+  support_pct_ci?: [number, number]
+  oppose_pct_ci?: [number, number]
+  weighted_mean_stance?: number
+  by_discipline_ci?: Record<string, { n: number; mean: number; ci: [number, number] }>
+  concern_counts?: { text: string; count: number }[]
+  // adaptive pulses only
+  sampling?: { answered: number; total: number; ciHalfWidth: number | null; stopReason: string; label: string }
 }
 
+const range = (ci: [number, number] | undefined, digits: number, unit = '') =>
+  ci ? `95% CI ${ci[0].toFixed(digits)}–${ci[1].toFixed(digits)}${unit}` : undefined
+
 function Tile({ label, value, sub }: { label: string; value: string; sub?: string }) {
   return (
     <div className="card" style={{ padding: '14px 18px', flex: 1, minWidth: 130 }}>
@@ -36,16 +48,16 @@ export default function PulseChart({ aggregates }: { aggregates: PulseAggregates
     label: d,
     value: v,
     color: v >= 3 ? 'var(--div-pos-2)' : 'var(--div-neg-2)',
-    detail: `mean stance ${v.toFixed(2)} / 5`,
+    detail: `mean stance ${v.toFixed(2)} / 5${aggregates.by_discipline_ci?.[d] ? ` · ${range(aggregates.by_discipline_ci[d].ci, 2)} · n=${aggregates.by_discipline_ci[d].n}` : ''}`,
   }))
 
   return (
     <div style={{ display: 'grid', gap: 16 }}>
       <div style={{ display: 'flex', gap: 12, flexWrap: 'wrap' }}>
-        <Tile label="Panel size" value={String(aggregates.count)} />
-        <Tile label="Mean stance" value={aggregates.mean_stance?.toFixed(2) ?? '—'} sub="1 = oppose · 5 = support" />
-        <Tile label="Support" value={`${aggregates.support_pct}%`} sub="stance 4-5" />
-        <Tile label="Oppose" value={`${aggregates.oppose_pct}%`} sub="stance 1-2" />
+        <Tile label="Panel size" value={String(aggregates.count)} sub={aggregates.sampling?.label} />
+        <Tile label="Mean stance" value={aggregates.mean_stance?.toFixed(2) ?? '—'} sub={range(aggregates.mean_stance_ci, 2) ?? '1 = oppose · 5 = support'} />
+        <Tile label="Support" value={`${aggregates.support_pct}%`} sub={range(aggregates.support_pct_ci, 0, '%') ?? 'stance 4-5'} />
+        <Tile label="Oppose" value={`${aggregates.oppose_pct}%`} sub={range(aggregates.oppose_pct_ci, 0, '%') ?? 'stance 1-2'} />
       </div>
       <div className="card">
         <h3 style={{ margin: '0 0 12px' }}>Stance distribution</h3>
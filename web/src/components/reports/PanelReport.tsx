@@ -27,7 +27,7 @@ interface Synthesis {
 
 export interface PanelResult {
   problem: string
-  blueprint?: { disciplines: { name: string; count: number; rationale: string }[]; mandatedContrarians?: { stance: string; rationale: string }[]; coverageNotes?: string }
+  blueprint?: { disciplines: { name: string; count: number; rationale: string }[]; mandatedContrarians?: { stance: string; rationale: string }[]; coverageNotes?: string; adjustments?: string[] }
   personas: Persona[]
   insights: InsightEntry[]
   market_intelligence?: { topic: string; channel: string; findings: string; citations: Citation[] }[]
@@ -193,6 +193,14 @@ export default function PanelReport({ result }: { result: PanelResult }) {
               ))}
             </div>
           )}
+          {!!result.blueprint.adjustments?.length && (
+            <div style={{ marginTop: 14 }}>
+              <div className="label">Adjusted after design</div>
+              {result.blueprint.adjustments.map((a, i) => (
+                <div key={i} className="dim" style={{ fontSize: 13 }}>{a}</div>
+              ))}
+            </div>
+          )}
         </div>
       )}
     </div>
@@ -15,12 +15,16 @@ export default function NewEngagement() {
   const [modeId, setModeId] = useState(params.get('mode') ?? 'deep_dive')
   const [problem, setProblem] = useState('')
   const [urls, setUrls] = useState('')
+  const [docs, setDocs] = useState<{ name: string; content: string; format: string }[]>([])
   const [panelSize, setPanelSize] = useState<number | null>(null)
   const [pinned, setPinned] = useState('')
   const [excluded, setExcluded] = useState('')
   const [seed, setSeed] = useState('')
   const [webSearch, setWebSearch] = useState(true)
   const [xSearch, setXSearch] = useState(false)
+  const [adaptive, setAdaptive] = useState(false)
+  const [incremental, setIncremental] = useState(false)
+  const [personaSource, setPersonaSource] = useState<'generate' | 'hybrid' | 'library'>('generate')
   const [industry, setIndustry] = useState('')
   const [constraints, setConstraints] = useState('')
   const [estimate, setEstimate] = useState<Estimate | null>(null)
@@ -46,6 +50,7 @@ export default function NewEngagement() {
     input: {
       problem,
       urls: urls.split(/\s+/).filter(Boolean),
+      documents: docs.length ? docs : undefined,
       industry: industry || undefined,
       constraints: constraints || undefined,
     },
@@ -54,11 +59,23 @@ export default function NewEngagement() {
       pinnedExperts: pinned.split('\n').map((s) => s.trim()).filter(Boolean),
       excludedDomains: excluded.split(',').map((s) => s.trim()).filter(Boolean),
       seedPerspectives: seed || undefined,
+      adaptive: mode?.quantitative && adaptive ? true : undefined,
+      personaSource,
     },
     search: { web: webSearch, x: xSearch, scrapeUrls: true },
+    synthesis: mode?.flow === 'panel' && !mode.quantitative && incremental ? { incremental: true } : undefined,
     models: getModelSettings(),
   })
 
+  const attach = async (files: FileList | null) => {
+    const read = await Promise.all(Array.from(files ?? []).map(async (f) => ({
+      name: f.name,
+      content: await f.text(),
+      format: /\.html?$/i.test(f.name) ? 'html' : /\.(md|markdown)$/i.test(f.name) ? 'markdown' : 'text',
+    })))
+    setDocs(read)
+  }
+
   const launch = async () => {
     setSubmitting(true)
     setError('')
@@ -129,6 +146,10 @@ export default function NewEngagement() {
               <label className="label">Context URLs (scraped live — company site, competitors, docs)</label>
               <input className="input" value={urls} onChange={(e) => setUrls(e.target.value)} placeholder="https://yourcompany.com https://competitor.com" />
             </div>
+            <div>
+              <label className="label">Client documents (text, markdown or HTML — each expert sees the passages relevant to them)</label>
+              <input className="input" type="file" multiple accept=".txt,.md,.markdown,.html,.htm,text/plain,text/markdown,text/html" onChange={(e) => attach(e.target.files)} />
+            </div>
             <div>
               <label className="label">Panel size — {size} experts</label>
               <input
@@ -158,6 +179,14 @@ export default function NewEngagement() {
                   <label className="label">Perspectives to represent</label>
                   <input className="input" value={seed} onChange={(e) => setSeed(e.target.value)} placeholder="e.g. emerging-market growth view; privacy-first counterweight" />
                 </div>
+                <div>
+                  <label className="label">Personas</label>
+                  <select className="select" value={personaSource} onChange={(e) => setPersonaSource(e.target.value as typeof personaSource)}>
+                    <option value="generate">Cast fresh for this engagement</option>
+                    <option value="hybrid">Mix — up to half reused from the persona library</option>
+                    <option value="library">Reuse from the persona library, cast only the shortfall</option>
+                  </select>
+                </div>
               </div>
             </details>
             {mode?.flow === 'panel' && (
@@ -170,6 +199,18 @@ export default function NewEngagement() {
                   <input type="checkbox" checked={xSearch} onChange={(e) => setXSearch(e.target.checked)} style={{ accentColor: 'var(--indigo-deep)' }} />
                   X / social sentiment
                 </label>
+                {!mode.quantitative && (
+                  <label style={{ display: 'flex', gap: 8, alignItems: 'center', fontSize: 14 }} title="Theme summaries are drafted while experts are still answering, so the report lands seconds after the last expert">
+                    <input type="checkbox" checked={incremental} onChange={(e) => setIncremental(e.target.checked)} style={{ accentColor: 'var(--indigo-deep)' }} />
+                    Synthesize as experts report
+                  </label>
+                )}
+                {mode.quantitative && (
+                  <label style={{ display: 'flex', gap: 8, alignItems: 'center', fontSize: 14 }} title="Seats are asked discipline by discipline; no new seats are asked once the mean stance is pinned down">
+                    <input type="checkbox" checked={adaptive} onChange={(e) => setAdaptive(e.target.checked)} style={{ accentColor: 'var(--indigo-deep)' }} />
+                    Stop early once the result converges
+                  </label>
+                )}
               </div>
             )}
           </>
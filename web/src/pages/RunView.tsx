@@ -74,7 +74,7 @@ export default function RunView() {
   const [selected, setSelected] = useState<ExpertState | null>(null)
 
   const [now, setNow] = useState(Date.now())
-  const live = run.status === 'running' || run.status === 'connecting' || run.status === 'waiting_input'
+  const live = run.status === 'running' || run.status === 'connecting' || run.status === 'waiting_input' || run.status === 'queued'
 
   useEffect(() => {
     if (!live) return
@@ -111,13 +111,13 @@ export default function RunView() {
             </svg>
           )}
           <span>
-            {run.status === 'completed' ? 'Engagement complete' : run.status === 'failed' ? 'Engagement failed' : 'Engagement '}
-            {run.status !== 'completed' && run.status !== 'failed' && <span className="gradient-text">in motion</span>}
+            {run.status === 'completed' ? 'Engagement complete' : run.status === 'failed' ? 'Engagement failed' : run.status === 'cancelled' ? 'Engagement cancelled' : 'Engagement '}
+            {live && <span className="gradient-text">in motion</span>}
           </span>
         </h1>
         <div style={{ display: 'flex', gap: 10, alignItems: 'center' }}>
           <CostBadge usd={run.totalCostUsd} />
-          {run.status === 'running' && (
+          {(run.status === 'running' || run.status === 'queued' || run.status === 'waiting_input') && (
             <button className="btn btn-danger" onClick={() => runId && api.cancelRun(runId)}>Cancel</button>
           )}
         </div>
@@ -127,11 +127,22 @@ export default function RunView() {
         <ProgressRail stages={run.stages} currentStage={run.currentStage} completedStages={run.completedStages} />
       </div>
 
+      {run.status === 'queued' && run.queue && (
+        <div className="card" style={{ borderColor: 'var(--indigo-line)' }}>
+          <strong>Queued</strong> — position {run.queue.position} of {run.queue.queueLength}
+          {run.queue.etaSeconds != null && <span className="dim"> · starts in about {Math.max(1, Math.round(run.queue.etaSeconds / 60))} min</span>}
+        </div>
+      )}
       {run.status === 'failed' && (
         <div className="card" style={{ borderColor: 'var(--status-critical)' }}>
           <strong>Run failed:</strong> {run.error}
         </div>
       )}
+      {run.status === 'cancelled' && (
+        <div className="card">
+          <strong>Run cancelled.</strong> <span className="dim">Spend up to the cancel is recorded on the engagement.</span>
+        </div>
+      )}
       {run.status === 'completed' && (
         <div className="card" style={{ borderColor: 'var(--status-good)' }}>
           ✦ Engagement complete — opening the report…
@@ -220,13 +231,14 @@ export default function RunView() {
         )}
       </div>
 
-      {run.boardTurns.length > 0 && (
+      {(run.boardTurns.length > 0 || Object.keys(run.liveTurns).length > 0) && (
         <div className="card" style={{ marginTop: 18 }}>
           <h3 style={{ marginTop: 0 }}>Board transcript</h3>
-          {run.boardTurns.map((t, i) => (
+          {[...run.boardTurns, ...Object.values(run.liveTurns)].map((t, i) => (
             <div key={i} style={{ borderTop: i ? '1px solid var(--hairline)' : 'none', padding: '10px 0' }}>
               <div style={{ fontWeight: 600, fontSize: 13 }}>
                 <span className="chip" style={{ marginRight: 8 }}>R{t.round}</span>{t.speaker}
+                {i >= run.boardTurns.length && <span className="dim" style={{ marginLeft: 8, fontWeight: 400 }}>speaking…</span>}
               </div>
               <div className="muted" style={{ fontSize: 14, marginTop: 4 }}>{t.statement}</div>
             </div>
@@ -256,8 +268,22 @@ export default function RunView() {
 
       {run.aggregates != null && (
         <div className="card" style={{ marginTop: 18 }}>
-          <h3 style={{ marginTop: 0 }}>Pulse results are in</h3>
-          <p className="muted">Opening the full report…</p>
+          {run.status === 'completed' ? (
+            <>
+              <h3 style={{ marginTop: 0 }}>Pulse results are in</h3>
+              <p className="muted">Opening the full report…</p>
+            </>
+          ) : (
+            <>
+              <h3 style={{ marginTop: 0 }}>Live pulse</h3>
+              <p className="muted">
+                {String((run.aggregates as any).count ?? 0)} answers so far · mean stance{' '}
+                <strong>{(run.aggregates as any).mean_stance ?? '—'}</strong>
+                {(run.aggregates as any).mean_stance_ci && <span className="dim"> (95% CI {(run.aggregates as any).mean_stance_ci.join('–')})</span>}
+                {' '}· support {(run.aggregates as any).support_pct ?? 0}% · oppose {(run.aggregates as any).oppose_pct ?? 0}%
+              </p>
+            </>
+          )}
         </div>
       )}
     </div>